@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Benchmark routing accuracy and cost for an instruction variant, and diff against a baseline."""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+from src.model_router import ModelRouter
+from src.models.config import ModelDeploymentConfig, ModelRouterConfig
+from src.routing_benchmark import (
+    AgentBackend,
+    ReplayBackend,
+    RulesBackend,
+    compare,
+    instruction_fingerprint,
+    load_cases,
+    prompt_text,
+    run_benchmark,
+)
+
+# Load environment variables
+load_dotenv()
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "WARNING"),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Routing accuracy-versus-cost benchmark.")
+    parser.add_argument("cases", nargs="?", default="config/benchmarks/routing_cases.jsonl",
+                        help="Labelled cases JSONL")
+    parser.add_argument("--backend", choices=["rules", "agent", "replay"], default="rules")
+    parser.add_argument("--instructions", default="routing",
+                        help="Instruction type (e.g. routing) or path to an instructions .md file")
+    parser.add_argument("--deployment", default=os.getenv("MODEL_DEPLOYMENT", "gpt-4o"),
+                        help="Model deployment for the agent backend")
+    parser.add_argument("--record", help="Append agent responses to this JSONL for later replay")
+    parser.add_argument("--replay", help="Recorded responses JSONL for the replay backend")
+    parser.add_argument("--any-variant", action="store_true",
+                        help="Replay recordings regardless of the instruction fingerprint")
+    parser.add_argument("--replay-latency", action="store_true", help="Sleep for recorded latencies when replaying")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("-o", "--output", help="Write the full report JSON here")
+    parser.add_argument("--baseline", help="Baseline report JSON to diff against")
+    parser.add_argument("--save-baseline", help="Also write the report as a new baseline")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit 1 when the diff shows a regression")
+    return parser.parse_args()
+
+
+def load_instructions(variant: str) -> str:
+    """Instruction text for a variant name or file path."""
+    path = Path(variant)
+    if path.suffix == ".md" and path.exists():
+        return path.read_text(encoding="utf-8")
+    return (Path(__file__).parent / "config" / f"instructions_{variant}.md").read_text(encoding="utf-8")
+
+
+async def main() -> int:
+    """Run the benchmark and print the summary (and diff)."""
+    args = parse_args()
+    cases = load_cases(args.cases)
+    agent = None
+
+    if args.backend == "rules":
+        backend = RulesBackend()
+    elif args.backend == "replay":
+        if not args.replay:
+            raise SystemExit("--replay is required for the replay backend")
+        fingerprint = None if args.any_variant else instruction_fingerprint(
+            prompt_text(load_instructions(args.instructions)), args.deployment
+        )
+        backend = ReplayBackend(args.replay, fingerprint=fingerprint, latency=args.replay_latency)
+    else:
+        from src.agent import TechRobAgent
+
+        # Pin every run to --deployment (MODEL_DEPLOYMENTS would spread them), so the
+        # report's accuracy and cost are attributed to the model that produced them
+        pinned = ModelRouter(ModelRouterConfig(
+            deployments=[ModelDeploymentConfig(name=args.deployment, deployment=args.deployment)]
+        ))
+        agent = TechRobAgent(
+            project_endpoint=os.getenv("FOUNDRY_PROJECT_ENDPOINT"),
+            model_deployment_name=args.deployment,
+            ado_org_name=os.getenv("ADO_ORG_NAME", "UnifiedActionTracker"),
+            ado_project_name=os.getenv("ADO_PROJECT_NAME", "Unified Action Tracker"),
+            instructions=load_instructions(args.instructions),
+            instruction_type="routing",
+            model_router=pinned,
+        )
+        backend = AgentBackend(agent, record_path=args.record)
+
+    try:
+        report = await run_benchmark(cases, backend, concurrency=args.concurrency, variant=args.instructions)
+    finally:
+        if agent:
+            await agent.cleanup()
+
+    output = {"meta": report["meta"], "summary": report["summary"], "confusion": report["confusion"]}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            output["diff"] = compare(report, json.load(f))
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+    print(json.dumps(output, indent=2, default=str))
+
+    if args.fail_on_regression and output.get("diff", {}).get("regressed"):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
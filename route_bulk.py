@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Route (or re-route) an exported file of Actions offline."""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+from dotenv import load_dotenv
+from src.bulk_routing import BulkRouter, agent_fallback
+
+# Load environment variables
+load_dotenv()
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Bulk-route exported Actions (JSONL, JSON or CSV).")
+    parser.add_argument("input", help="Export file (.jsonl, .ndjson, .json or .csv)")
+    parser.add_argument("-o", "--output", default="routing_results.jsonl",
+                        help="JSONL results file, also used as the resume checkpoint")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Process pool size (default: CPU count, 0 = in-process)")
+    parser.add_argument("--batch-size", type=int, default=200, help="Records per process pool task")
+    parser.add_argument("--limit", type=int, default=None, help="Route at most N new records")
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite the output instead of resuming")
+    parser.add_argument("--model-fallback", action="store_true",
+                        help="Ask the routing agent about LOW/MEDIUM confidence decisions")
+    parser.add_argument("--fallback-concurrency", type=int, default=4, help="Concurrent model fallback calls")
+    parser.add_argument("--fallback-confidence", default="LOW,MEDIUM",
+                        help="Comma-separated rule confidences that trigger the fallback")
+    return parser.parse_args()
+
+
+async def main() -> None:
+    """Run the bulk routing job."""
+    args = parse_args()
+    agent = None
+    fallback = None
+    if args.model_fallback:
+        from src.agent import TechRobAgent
+
+        agent = TechRobAgent(
+            project_endpoint=os.getenv("FOUNDRY_PROJECT_ENDPOINT"),
+            model_deployment_name=os.getenv("MODEL_DEPLOYMENT", "gpt-4o"),
+            ado_org_name=os.getenv("ADO_ORG_NAME", "UnifiedActionTracker"),
+            ado_project_name=os.getenv("ADO_PROJECT_NAME", "Unified Action Tracker"),
+            instruction_type="routing",
+        )
+        fallback = agent_fallback(agent)
+
+    router = BulkRouter(
+        workers=args.workers,
+        batch_size=args.batch_size,
+        fallback=fallback,
+        fallback_concurrency=args.fallback_concurrency,
+        fallback_confidence=tuple(c.strip().upper() for c in args.fallback_confidence.split(",") if c.strip()),
+    )
+    try:
+        summary = await router.run(args.input, args.output, resume=not args.no_resume, limit=args.limit)
+        print(json.dumps(summary, indent=2))
+    finally:
+        if agent:
+            await agent.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,11 +3,17 @@
 
 import asyncio
 import logging
-import os
 from pathlib import Path
 from dotenv import load_dotenv
+from src.action_mirror import ActionMirror
+from src.action_search import ActionSearchIndex
 from src.agent import TechRobAgent
 from src.api import AgentAPI
+from src.config_loader import ConfigReloader, config_path_from_env, load_config
+from src.model_router import ModelRouter
+from src.prefetch import RelatedItemPrefetcher
+from src.session_store import SessionStore
+from src.work_items import WorkItemClient
 
 # Load environment variables
 load_dotenv()
@@ -22,9 +28,13 @@ log_file.touch(exist_ok=True)
 with open(log_file, 'w') as f:
     f.write("")
 
+# Settings come from config/agent_config.yaml (or AGENT_CONFIG_PATH) over the environment
+config_path = config_path_from_env()
+config = load_config(config_path)
+
 # Configure logging with both console and file handlers
-log_level = os.getenv("LOG_LEVEL", "INFO")
-log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+log_level = config.logging.level.upper()
+log_format = config.logging.format
 
 # Root logger
 root_logger = logging.getLogger()
@@ -56,19 +66,45 @@ def main():
     logger.info("Initializing TechRob Action360 Agent...")
     logger.info(f"[LOG] Logging to file: {log_file.absolute()}")
     
+    logger.info(f"[CONFIG] Loaded {config_path}" if config_path.exists() else "[CONFIG] No config file, using environment")
+    foundry, mcp = config.agent.foundry, config.agent.mcp
+    
+    # Open the local work item mirror if enabled (synced in the background by the API)
+    mirror = ActionMirror.from_config(config.mirror) if config.mirror.enabled else None
+    search_index = ActionSearchIndex(mirror) if mirror else None
+    
+    # Direct work item client shared by the API and the speculative prefetcher
+    work_items = WorkItemClient(mcp.organization_name, mcp.project_name)
+    prefetcher = RelatedItemPrefetcher(work_items, config.prefetch) if config.prefetch.enabled else None
+    
     # Create agent (don't initialize yet - it will initialize on first query)
     agent = TechRobAgent(
-        project_endpoint=os.getenv("FOUNDRY_PROJECT_ENDPOINT"),
-        model_deployment_name=os.getenv("MODEL_DEPLOYMENT", "gpt-4o"),
-        ado_org_name=os.getenv("ADO_ORG_NAME", "UnifiedActionTracker"),
-        ado_project_name=os.getenv("ADO_PROJECT_NAME", "Unified Action Tracker"),
+        project_endpoint=foundry.project_endpoint,
+        model_deployment_name=foundry.model_deployment,
+        ado_org_name=mcp.organization_name,
+        ado_project_name=mcp.project_name,
+        enable_mcp=mcp.enabled,
+        model_router=ModelRouter(config.model_router) if config.model_router.deployments else None,
+        mirror=mirror,
+        mirror_max_staleness_seconds=config.mirror.max_staleness_seconds,
+        search_index=search_index,
+        instruction_config=config.instructions,
+        prefetcher=prefetcher,
+        credential_config=config.credentials,
     )
     
-    # Create API
+    # Create API; edits to the config file (or SIGHUP) are applied while it runs
     api = AgentAPI(
         agent=agent,
-        port=int(os.getenv("API_PORT", 8000)),
-        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=config.agent.api.port,
+        host=config.agent.api.host,
+        sessions=SessionStore(config.sessions),
+        work_items=work_items,
+        mirror_config=config.mirror,
+        precompute_config=config.precompute,
+        scheduler_config=config.scheduler,
+        config_reloader=ConfigReloader(config_path, config),
+        profiling_config=config.profiling,
     )
     
     # Start API server
@@ -77,6 +113,15 @@ def main():
         logger.info("Available endpoints:")
         logger.info("  POST /api/query - Send a query to the agent")
         logger.info("  POST /api/query/stream - Stream agent response (Server-Sent Events)")
+        logger.info("  POST /api/actions/list - List Actions (json, ndjson or markdown table)")
+        logger.info("  GET /api/actions/search - Keyword and faceted search over mirrored Actions")
+        logger.info("  GET /api/mirror - Local work item mirror status")
+        logger.info("  GET /api/precompute - Background pre-computation status")
+        logger.info("  GET /api/scheduler - Scheduler queues and wait times")
+        logger.info("  GET /api/config - Config reload status (?reload=true to reload now)")
+        if config.profiling.enabled:
+            logger.info("  GET /api/debug/profile|loop|memory - Live diagnostics (DEBUG_TOKEN required)")
+        logger.info("  POST /api/webhooks/workitem - Work item change notifications")
         logger.info("  GET /api/health - Health check")
         logger.info("  GET /api/tools - List available tools")
         api.run()
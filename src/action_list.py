@@ -0,0 +1,251 @@
+"""Native list path for Action list requests: WIQL, batch fetch, sort and page without the model."""
+
+import base64
+import hashlib
+import json
+import logging
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from src.models.actions import ActionListQuery, ActionPage
+
+logger = logging.getLogger(__name__)
+
+# Column name -> (table header, field reference name).
+# Custom.* reference names follow the Unified Action Tracker process template.
+LIST_COLUMNS: Dict[str, Tuple[str, str]] = {
+    "id": ("Action ID", "System.Id"),
+    "title": ("Title", "System.Title"),
+    "state": ("State", "System.State"),
+    "priority": ("Priority", "Custom.ActionPriority"),
+    "assigned_to": ("Assigned To", "System.AssignedTo"),
+    "account": ("Account", "Custom.Account"),
+    "help_needed": ("Help Needed", "Custom.MilestoneHelpNeeded"),
+    "area_path": ("Area Path", "System.AreaPath"),
+    "created_date": ("Created", "System.CreatedDate"),
+    "changed_date": ("Last Modified", "System.ChangedDate"),
+}
+
+# Columns shown in rendered tables, matching the summary instructions' list format
+TABLE_COLUMNS = ["id", "title", "state", "priority", "assigned_to", "account", "help_needed", "changed_date"]
+
+ACTION_WORK_ITEM_TYPE = "Action"
+
+
+def _wiql_literal(value: str) -> str:
+    """Quote a value for WIQL, escaping embedded single quotes."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def build_wiql(query: ActionListQuery, project: str) -> str:
+    """
+    Build the WIQL query selecting Action ids for the given filters.
+
+    Args:
+        query: List filters
+        project: Azure DevOps project name
+
+    Returns:
+        WIQL query text
+    """
+    clauses = [
+        f"[System.TeamProject] = {_wiql_literal(project)}",
+        f"[System.WorkItemType] = {_wiql_literal(ACTION_WORK_ITEM_TYPE)}",
+    ]
+    if query.state:
+        clauses.append(f"[System.State] IN ({', '.join(_wiql_literal(s) for s in query.state)})")
+    if query.priority:
+        clauses.append(f"[{LIST_COLUMNS['priority'][1]}] IN ({', '.join(_wiql_literal(p) for p in query.priority)})")
+    if query.assigned_to:
+        clauses.append(f"[System.AssignedTo] = {_wiql_literal(query.assigned_to)}")
+    if query.area_path:
+        clauses.append(f"[System.AreaPath] UNDER {_wiql_literal(query.area_path)}")
+    if query.keywords:
+        clauses.append(f"[System.Title] CONTAINS {_wiql_literal(query.keywords)}")
+    if query.created_after:
+        clauses.append(f"[System.CreatedDate] >= {_wiql_literal(query.created_after)}")
+    if query.changed_after:
+        clauses.append(f"[System.ChangedDate] >= {_wiql_literal(query.changed_after)}")
+    return f"SELECT [System.Id] FROM WorkItems WHERE {' AND '.join(clauses)}"
+
+
+def row_from_work_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Flatten a work item into a list row keyed by column name.
+
+    Identity fields are reduced to their display name.
+    """
+    fields = item.get("fields") or {}
+    row: Dict[str, Any] = {}
+    for column, (_, reference) in LIST_COLUMNS.items():
+        value = fields.get(reference)
+        if isinstance(value, dict):
+            value = value.get("displayName") or value.get("uniqueName")
+        row[column] = value
+    row["id"] = int(item.get("id") or fields.get("System.Id"))
+    return row
+
+
+def _sort_value(value: Any) -> Tuple[int, float, str]:
+    """Normalize mixed-type column values into comparable tuples."""
+    if isinstance(value, bool) or value is None:
+        return (1, 0.0, str(value or ""))
+    if isinstance(value, (int, float)):
+        return (0, float(value), "")
+    return (1, 0.0, str(value).lower())
+
+
+def _row_key(row: Dict[str, Any], sort_by: str, descending: bool) -> Tuple[bool, Tuple[int, float, str], int]:
+    value = row.get(sort_by)
+    # Missing values sort last in either direction (the key is reversed for descending sorts)
+    missing = value is None
+    return (not missing if descending else missing, _sort_value(value), row["id"])
+
+
+def _fingerprint(query: ActionListQuery) -> str:
+    """Hash of everything but the cursor, so cursors can't be replayed against other queries."""
+    payload = query.model_dump(exclude={"cursor", "page_size"})
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def encode_cursor(query: ActionListQuery, last_row: Dict[str, Any]) -> str:
+    """Encode a keyset cursor pointing just past `last_row`."""
+    payload = {"f": _fingerprint(query), "v": last_row.get(query.sort_by), "id": last_row["id"]}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(query: ActionListQuery) -> Optional[Dict[str, Any]]:
+    """
+    Decode the query's cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to a different query
+    """
+    if not query.cursor:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(query.cursor.encode("ascii")))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if payload.get("f") != _fingerprint(query):
+        raise ValueError("Cursor does not match this query's filters or sort order")
+    return payload
+
+
+def paginate(rows: List[Dict[str, Any]], query: ActionListQuery) -> ActionPage:
+    """
+    Sort rows and cut the page after the query's cursor.
+
+    Keyset paging keeps pages stable when Actions are added or removed between requests.
+    """
+    if query.sort_by not in LIST_COLUMNS:
+        raise ValueError(f"Unknown sort column '{query.sort_by}'. Valid: {', '.join(LIST_COLUMNS)}")
+
+    ordered = sorted(rows, key=lambda r: _row_key(r, query.sort_by, query.descending), reverse=query.descending)
+    cursor = decode_cursor(query)
+    start = 0
+    if cursor is not None:
+        boundary = _row_key({query.sort_by: cursor.get("v"), "id": cursor["id"]}, query.sort_by, query.descending)
+        for start, row in enumerate(ordered):
+            key = _row_key(row, query.sort_by, query.descending)
+            if (key < boundary) if query.descending else (key > boundary):
+                break
+        else:
+            start = len(ordered)
+
+    page = ordered[start:start + query.page_size]
+    has_more = start + query.page_size < len(ordered)
+    return ActionPage(
+        items=page,
+        total=len(ordered),
+        next_cursor=encode_cursor(query, page[-1]) if page and has_more else None,
+        sort_by=query.sort_by,
+        descending=query.descending,
+    )
+
+
+def render_table(page: ActionPage, columns: Optional[List[str]] = None) -> str:
+    """
+    Render a page as the markdown table format used by the summary instructions.
+
+    Args:
+        page: Page of Actions
+        columns: Column names to include. Defaults to TABLE_COLUMNS.
+    """
+    columns = columns or TABLE_COLUMNS
+    direction = "newest first" if page.descending else "oldest first"
+    sort_label = LIST_COLUMNS.get(page.sort_by, (page.sort_by, ""))[0]
+    lines = [
+        f"**Showing {len(page.items)} of {page.total} results** (sorted by {sort_label}, {direction})",
+        "",
+        "| " + " | ".join(LIST_COLUMNS[c][0] for c in columns) + " |",
+        "|" + "|".join("---" for _ in columns) + "|",
+    ]
+    for row in page.items:
+        cells = []
+        for column in columns:
+            value = row.get(column)
+            text = "" if value is None else str(value)
+            if column == "changed_date" or column == "created_date":
+                text = text[:10]
+            cells.append(text.replace("|", "\\|").replace("\n", " "))
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+class ActionLister:
+    """
+    Lists Actions without a model in the loop.
+
+    Runs a WIQL query through the MCP server, batch-fetches only the list
+    columns, then sorts and pages in Python.
+    """
+
+    def __init__(self, source: Any):
+        """
+        Initialize the lister.
+
+        Args:
+            source: Work item source exposing `ado_project_name`, `query_ids(wiql)` and
+                    `get_work_items(ids, fields)` (e.g. WorkItemClient). Sources that also
+                    expose `local_ids(query)` (the mirror) can answer filters without WIQL.
+        """
+        self.source = source
+
+    async def list_page(self, query: ActionListQuery) -> ActionPage:
+        """
+        Fetch one page of Actions.
+
+        Raises:
+            ValueError: For an unknown sort column or a bad cursor
+        """
+        if query.sort_by not in LIST_COLUMNS:
+            raise ValueError(f"Unknown sort column '{query.sort_by}'. Valid: {', '.join(LIST_COLUMNS)}")
+        decode_cursor(query)
+
+        ids = self.source.local_ids(query) if hasattr(self.source, 'local_ids') else None
+        if ids is None:
+            wiql = build_wiql(query, self.source.ado_project_name)
+            logger.info(f"[LIST] WIQL: {wiql}")
+            ids = await self.source.query_ids(wiql)
+        else:
+            logger.info("[LIST] Filters evaluated against local mirror")
+        fields = [reference for _, reference in LIST_COLUMNS.values()]
+        items = await self.source.get_work_items(ids, fields)
+        rows = [row_from_work_item(item) for item in items]
+        page = paginate(rows, query)
+        logger.info(f"[LIST] {page.total} match(es), returning {len(page.items)}")
+        return page
+
+    @staticmethod
+    async def iter_ndjson(page: ActionPage) -> AsyncGenerator[str, None]:
+        """
+        Serialize a page as NDJSON lines: one "item" line per row, then a "page" line.
+        """
+        for row in page.items:
+            yield json.dumps({"type": "item", **row}, default=str) + "\n"
+        yield json.dumps({
+            "type": "page",
+            "count": len(page.items),
+            "total": page.total,
+            "next_cursor": page.next_cursor,
+        }) + "\n"
@@ -0,0 +1,507 @@
+"""Local SQLite mirror of Unified Action Tracker work items, kept current by a background sync worker."""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.action_list import ACTION_WORK_ITEM_TYPE, LIST_COLUMNS, build_wiql
+from src.models.actions import ActionListQuery
+from src.models.config import MirrorConfig
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_KEY = "changed_date_watermark"
+LAST_SYNC_KEY = "last_sync_at"
+COMPLETE_KEY = "backfill_complete"
+BACKFILL_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_items (
+    id INTEGER PRIMARY KEY,
+    rev INTEGER NOT NULL,
+    work_item_type TEXT,
+    title TEXT,
+    state TEXT,
+    priority TEXT,
+    assigned_to TEXT,
+    area_path TEXT,
+    created_date TEXT,
+    changed_date TEXT,
+    fields TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_work_items_changed ON work_items (changed_date);
+CREATE TABLE IF NOT EXISTS work_item_revisions (
+    id INTEGER NOT NULL,
+    rev INTEGER NOT NULL,
+    changed_date TEXT,
+    fields TEXT NOT NULL,
+    PRIMARY KEY (id, rev)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+ChangeListener = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+
+def _identity(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        return value.get("displayName") or value.get("uniqueName")
+    return value
+
+
+class ActionMirror:
+    """
+    SQLite store of mirrored work items with revision tracking.
+
+    Only newer revisions replace stored items; the last few revisions of each
+    item are kept for change history.
+    """
+
+    def __init__(self, db_path: str = ":memory:", keep_revisions: int = 5):
+        """
+        Open (or create) the mirror database.
+
+        Args:
+            db_path: SQLite file path, or ":memory:"
+            keep_revisions: Revisions kept per work item in work_item_revisions
+        """
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.keep_revisions = keep_revisions
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            if db_path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+        logger.info(f"[MIRROR] Opened {db_path} ({self.count()} work items)")
+
+    @classmethod
+    def from_config(cls, config: MirrorConfig) -> "ActionMirror":
+        """Open the mirror described by a MirrorConfig."""
+        return cls(config.db_path, keep_revisions=config.keep_revisions)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Underlying connection, for modules that add their own tables (e.g. the search index)."""
+        return self._conn
+
+    @property
+    def lock(self) -> threading.Lock:
+        """Lock guarding the connection."""
+        return self._lock
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
+
+    def count(self) -> int:
+        """Number of mirrored work items."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM work_items").fetchone()[0]
+
+    def get_state(self, key: str) -> Optional[str]:
+        """Read a sync_state value."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, key: str, value: str) -> None:
+        """Write a sync_state value."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+            self._conn.commit()
+
+    @property
+    def watermark(self) -> Optional[str]:
+        """Highest System.ChangedDate seen by the sync worker."""
+        return self.get_state(WATERMARK_KEY)
+
+    @property
+    def complete(self) -> bool:
+        """Whether every Action (not just those inside the initial lookback) has been mirrored."""
+        return self.get_state(COMPLETE_KEY) == "1"
+
+    def age_seconds(self) -> Optional[float]:
+        """Seconds since the last successful sync, or None if never synced."""
+        last = self.get_state(LAST_SYNC_KEY)
+        return time.time() - float(last) if last else None
+
+    def revisions(self, ids: List[int]) -> Dict[int, int]:
+        """Stored revision numbers for the given ids (missing ids are omitted)."""
+        if not ids:
+            return {}
+        placeholders = ",".join("?" for _ in ids)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, rev FROM work_items WHERE id IN ({placeholders})", [int(i) for i in ids]
+            ).fetchall()
+        return {row["id"]: row["rev"] for row in rows}
+
+    def upsert(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Store work items whose revision is newer than the mirrored one.
+
+        Args:
+            items: Work items as {"id", "rev", "fields"} dicts with full fields
+
+        Returns:
+            The items that were new or changed
+        """
+        changed = []
+        now = time.time()
+        with self._lock:
+            for item in items:
+                fields = item.get("fields") or {}
+                work_item_id = int(item.get("id") or fields.get("System.Id"))
+                rev = int(item.get("rev") or fields.get("System.Rev") or 0)
+                row = self._conn.execute("SELECT rev FROM work_items WHERE id = ?", (work_item_id,)).fetchone()
+                if row is not None and row["rev"] >= rev:
+                    continue
+                payload = json.dumps(fields, default=str)
+                changed_date = fields.get("System.ChangedDate")
+                self._conn.execute(
+                    """
+                    INSERT INTO work_items (id, rev, work_item_type, title, state, priority, assigned_to,
+                                            area_path, created_date, changed_date, fields, synced_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        rev = excluded.rev, work_item_type = excluded.work_item_type, title = excluded.title,
+                        state = excluded.state, priority = excluded.priority, assigned_to = excluded.assigned_to,
+                        area_path = excluded.area_path, created_date = excluded.created_date,
+                        changed_date = excluded.changed_date, fields = excluded.fields, synced_at = excluded.synced_at
+                    """,
+                    (
+                        work_item_id,
+                        rev,
+                        fields.get("System.WorkItemType"),
+                        fields.get("System.Title"),
+                        fields.get("System.State"),
+                        None if fields.get(LIST_COLUMNS["priority"][1]) is None else str(fields.get(LIST_COLUMNS["priority"][1])),
+                        _identity(fields.get("System.AssignedTo")),
+                        fields.get("System.AreaPath"),
+                        fields.get("System.CreatedDate"),
+                        changed_date,
+                        payload,
+                        now,
+                    ),
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO work_item_revisions (id, rev, changed_date, fields) VALUES (?, ?, ?, ?)",
+                    (work_item_id, rev, changed_date, payload),
+                )
+                self._conn.execute(
+                    "DELETE FROM work_item_revisions WHERE id = ? AND rev NOT IN "
+                    "(SELECT rev FROM work_item_revisions WHERE id = ? ORDER BY rev DESC LIMIT ?)",
+                    (work_item_id, work_item_id, self.keep_revisions),
+                )
+                changed.append({"id": work_item_id, "rev": rev, "fields": fields})
+            self._conn.commit()
+        return changed
+
+    def get_work_items(self, ids: List[int], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Read mirrored work items.
+
+        Args:
+            ids: Work item ids (ids not in the mirror are skipped)
+            fields: Field reference names to keep (all fields when omitted)
+
+        Returns:
+            Work items as {"id", "rev", "fields"} dicts
+        """
+        if not ids:
+            return []
+        placeholders = ",".join("?" for _ in ids)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, rev, fields FROM work_items WHERE id IN ({placeholders})", [int(i) for i in ids]
+            ).fetchall()
+        items = []
+        for row in rows:
+            stored = json.loads(row["fields"])
+            if fields:
+                stored = {name: stored[name] for name in fields if name in stored}
+            items.append({"id": row["id"], "rev": row["rev"], "fields": stored})
+        return items
+
+    def query_ids(self, query: ActionListQuery) -> List[int]:
+        """
+        Evaluate list filters against the mirror instead of running WIQL.
+
+        Mirrors the semantics of action_list.build_wiql.
+        """
+        clauses = ["work_item_type = ?"]
+        params: List[Any] = [ACTION_WORK_ITEM_TYPE]
+        if query.state:
+            clauses.append(f"state IN ({','.join('?' for _ in query.state)})")
+            params.extend(query.state)
+        if query.priority:
+            clauses.append(f"priority IN ({','.join('?' for _ in query.priority)})")
+            params.extend(str(p) for p in query.priority)
+        if query.assigned_to:
+            clauses.append("(assigned_to = ? COLLATE NOCASE OR json_extract(fields, '$.\"System.AssignedTo\".uniqueName') = ? COLLATE NOCASE)")
+            params.extend([query.assigned_to, query.assigned_to])
+        if query.area_path:
+            clauses.append("(area_path = ? OR area_path LIKE ? ESCAPE '!')")
+            escaped = query.area_path.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+            params.extend([query.area_path, escaped + "\\%"])
+        if query.keywords:
+            clauses.append("instr(lower(title), lower(?)) > 0")
+            params.append(query.keywords)
+        if query.created_after:
+            clauses.append("created_date >= ?")
+            params.append(query.created_after)
+        if query.changed_after:
+            clauses.append("changed_date >= ?")
+            params.append(query.changed_after)
+        with self._lock:
+            rows = self._conn.execute(f"SELECT id FROM work_items WHERE {' AND '.join(clauses)}", params).fetchall()
+        return [row["id"] for row in rows]
+
+
+class MirroredWorkItemSource:
+    """
+    Work item source that reads from the mirror first and falls back to live fetches.
+
+    Drop-in replacement for WorkItemClient in ActionLister. While the mirror is
+    fresh, list filters are evaluated locally and ADO is not called at all.
+    """
+
+    def __init__(self, mirror: ActionMirror, live: Any, max_staleness_seconds: float = 900.0):
+        """
+        Initialize the source.
+
+        Args:
+            mirror: Local mirror
+            live: Live work item client (e.g. WorkItemClient)
+            max_staleness_seconds: Mirror age beyond which list filters run live
+        """
+        self.mirror = mirror
+        self.live = live
+        self.max_staleness_seconds = max_staleness_seconds
+
+    @property
+    def ado_project_name(self) -> str:
+        return self.live.ado_project_name
+
+    def is_fresh(self) -> bool:
+        """Whether the mirror synced recently enough to answer queries on its own."""
+        age = self.mirror.age_seconds()
+        return age is not None and age <= self.max_staleness_seconds
+
+    def local_ids(self, query: ActionListQuery) -> Optional[List[int]]:
+        """
+        Ids matching the list filters from the mirror.
+
+        Returns None (so the caller runs WIQL) while the mirror is stale, or
+        before the backfill has mirrored Actions older than the initial lookback.
+        """
+        if not self.is_fresh() or not self.mirror.complete:
+            return None
+        return self.mirror.query_ids(query)
+
+    async def query_ids(self, wiql: str) -> List[int]:
+        return await self.live.query_ids(wiql)
+
+    async def get_work_items(self, ids: List[int], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Read ids from the mirror, fetching (and mirroring) any that are missing.
+
+        While the mirror is stale (e.g. sync is failing) every id is fetched live,
+        so rows matched by a live WIQL filter don't show outdated fields.
+        """
+        fresh = self.is_fresh()
+        items = self.mirror.get_work_items(ids, fields) if fresh else []
+        missing = sorted(set(int(i) for i in ids) - {item["id"] for item in items})
+        if missing:
+            if fresh:
+                logger.info(f"[MIRROR] {len(items)} hit(s), fetching {len(missing)} live")
+            else:
+                logger.info(f"[MIRROR] Mirror is stale, fetching {len(missing)} live")
+            fetched = await self.live.get_work_items(missing)
+            await asyncio.to_thread(self.mirror.upsert, fetched)
+            if fields:
+                fetched = [
+                    {**item, "fields": {name: value for name, value in (item.get("fields") or {}).items() if name in fields}}
+                    for item in fetched
+                ]
+            items.extend(fetched)
+        return items
+
+
+class MirrorSyncWorker:
+    """
+    Background task polling ADO for changed Actions and upserting them into the mirror.
+
+    Each poll queries ids changed since the watermark, compares revisions
+    cheaply, and fetches full fields only for items that actually changed.
+    """
+
+    def __init__(self, mirror: ActionMirror, client: Any, config: Optional[MirrorConfig] = None):
+        """
+        Initialize the worker.
+
+        Args:
+            mirror: Mirror to keep current
+            client: Live work item client (e.g. WorkItemClient)
+            config: Poll interval and initial lookback settings
+        """
+        self.mirror = mirror
+        self.client = client
+        self.config = config or MirrorConfig()
+        self._listeners: List[ChangeListener] = []
+        self._backfill_listeners: List[ChangeListener] = []
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def reconfigure(self, config: MirrorConfig) -> None:
+        """Apply new sync settings; the poll interval takes effect after the current wait."""
+        self.config = config
+
+    def add_listener(self, listener: ChangeListener, backfill: bool = False) -> None:
+        """
+        Register an async callback receiving the list of changed work items after each sync.
+
+        Args:
+            listener: Callback
+            backfill: Also call it with historical Actions loaded by the backfill
+                      (e.g. to index them; not for reacting to changes)
+        """
+        self._listeners.append(listener)
+        if backfill:
+            self._backfill_listeners.append(listener)
+
+    async def _notify(self, listeners: List[ChangeListener], items: List[Dict[str, Any]]) -> None:
+        for listener in listeners:
+            try:
+                await listener(items)
+            except Exception as e:
+                logger.error(f"[MIRROR] Change listener failed: {e}")
+
+    async def backfill(self) -> int:
+        """
+        Mirror Actions the incremental sync never saw (changed before the initial lookback).
+
+        Runs in chunks, so an interrupted backfill resumes where it stopped on the
+        next sync. Marks the mirror complete when done.
+
+        Returns:
+            Number of work items added
+        """
+        ids = await self.client.query_ids(build_wiql(ActionListQuery(), self.client.ado_project_name))
+        known = self.mirror.revisions(ids)
+        missing = [int(i) for i in ids if int(i) not in known]
+        added = 0
+        for start in range(0, len(missing), BACKFILL_CHUNK):
+            items = await self.client.get_work_items(missing[start:start + BACKFILL_CHUNK])
+            stored = await asyncio.to_thread(self.mirror.upsert, items)
+            added += len(stored)
+            await self._notify(self._backfill_listeners, stored)
+        self.mirror.set_state(COMPLETE_KEY, "1")
+        logger.info(f"[MIRROR] Backfill complete: {len(ids)} Action(s), {added} added")
+        return added
+
+    def _since(self) -> str:
+        watermark = self.mirror.watermark
+        if watermark:
+            # WIQL compares dates at day precision, so re-scan the watermark's day
+            return watermark[:10]
+        start = datetime.now(timezone.utc) - timedelta(days=self.config.initial_lookback_days)
+        return start.strftime("%Y-%m-%d")
+
+    async def sync_once(self) -> List[Dict[str, Any]]:
+        """
+        Run one incremental sync.
+
+        Returns:
+            Work items that were new or changed
+        """
+        since = self._since()
+        wiql = build_wiql(ActionListQuery(changed_after=since), self.client.ado_project_name)
+        ids = await self.client.query_ids(wiql)
+
+        # Cheap revision check first, so unchanged items aren't refetched in full
+        heads = await self.client.get_work_items(ids, ["System.Id", "System.Rev"]) if ids else []
+        known = self.mirror.revisions(ids)
+        stale = [
+            int(item["id"]) for item in heads
+            if known.get(int(item["id"]), -1) < int(item.get("rev") or (item.get("fields") or {}).get("System.Rev") or 0)
+        ]
+        changed: List[Dict[str, Any]] = []
+        if stale:
+            items = await self.client.get_work_items(stale)
+            changed = await asyncio.to_thread(self.mirror.upsert, items)
+
+        if changed:
+            latest = max((item["fields"].get("System.ChangedDate") or "" for item in changed), default="")
+            if latest and latest > (self.mirror.watermark or ""):
+                self.mirror.set_state(WATERMARK_KEY, latest)
+        elif not self.mirror.watermark:
+            self.mirror.set_state(WATERMARK_KEY, since)
+        self.mirror.set_state(LAST_SYNC_KEY, str(time.time()))
+        logger.info(f"[MIRROR] Sync since {since}: {len(ids)} candidate(s), {len(changed)} changed")
+
+        await self._notify(self._listeners, changed)
+        if self.config.backfill and not self.mirror.complete:
+            await self.backfill()
+        return changed
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self.sync_once()
+            except Exception as e:
+                logger.error(f"[MIRROR] Sync failed: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.config.poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        """Start polling in the background."""
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"[MIRROR] Sync worker started (every {self.config.poll_interval_seconds}s)")
+
+    async def stop(self) -> None:
+        """Stop polling and wait for the current sync to finish."""
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+            logger.info("[MIRROR] Sync worker stopped")
+
+
+def mirror_config_from_env() -> MirrorConfig:
+    """Build a MirrorConfig from MIRROR_* environment variables."""
+    defaults = MirrorConfig()
+    return MirrorConfig(
+        enabled=os.getenv("MIRROR_ENABLED", str(defaults.enabled)).lower() in ("1", "true", "yes"),
+        db_path=os.getenv("MIRROR_DB_PATH", defaults.db_path),
+        poll_interval_seconds=float(os.getenv("MIRROR_POLL_SECONDS", defaults.poll_interval_seconds)),
+        initial_lookback_days=int(os.getenv("MIRROR_INITIAL_DAYS", defaults.initial_lookback_days)),
+        backfill=os.getenv("MIRROR_BACKFILL", str(defaults.backfill)).lower() in ("1", "true", "yes"),
+        max_staleness_seconds=float(os.getenv("MIRROR_MAX_STALENESS_SECONDS", defaults.max_staleness_seconds)),
+        keep_revisions=int(os.getenv("MIRROR_KEEP_REVISIONS", defaults.keep_revisions)),
+    )
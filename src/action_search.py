@@ -0,0 +1,264 @@
+"""Full-text and faceted search over mirrored Actions using SQLite FTS5."""
+
+import asyncio
+import html
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from src.action_mirror import ActionMirror
+
+logger = logging.getLogger(__name__)
+
+# Facet name -> work_items column in the mirror
+FACETS = {
+    "state": "state",
+    "priority": "priority",
+    "assigned_to": "assigned_to",
+    "area_path": "area_path",
+}
+
+# FTS column -> work item field reference names concatenated into it
+TEXT_FIELDS = {
+    "title": ["System.Title"],
+    "description": ["System.Description", "Custom.CustomerScenarioAndDesiredOutcome", "Custom.CustomerImpactData"],
+}
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS action_fts USING fts5(
+    title, description, comments,
+    tokenize = 'porter unicode61'
+);
+"""
+
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def _plain_text(value: Any) -> str:
+    """Strip HTML markup from rich-text work item fields."""
+    if value is None:
+        return ""
+    return html.unescape(_TAG_PATTERN.sub(" ", str(value)))
+
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Every word must match (implicit AND) and the last word matches as a prefix,
+    so partially typed queries still find results. FTS operators in the input
+    are treated as plain words.
+    """
+    tokens = _TOKEN_PATTERN.findall(text or "")
+    if not tokens:
+        return None
+    quoted = [f'"{token}"' for token in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+class ActionSearchIndex:
+    """
+    FTS5 index stored alongside the mirror, with the mirror's columns as facets.
+
+    Titles, descriptions and comments are searchable; state, priority,
+    assignee and area path filter and are counted per result set.
+    """
+
+    def __init__(self, mirror: ActionMirror):
+        """
+        Attach the index to a mirror database.
+
+        Args:
+            mirror: Mirror whose work items are indexed
+        """
+        self.mirror = mirror
+        with mirror.lock:
+            mirror.connection.executescript(_FTS_SCHEMA)
+            mirror.connection.commit()
+
+    def count(self) -> int:
+        """Number of indexed Actions."""
+        with self.mirror.lock:
+            return self.mirror.connection.execute("SELECT COUNT(*) FROM action_fts").fetchone()[0]
+
+    def index_items(self, items: List[Dict[str, Any]], comments: Optional[Dict[int, List[str]]] = None) -> None:
+        """
+        Add or replace work items in the index.
+
+        Args:
+            items: Work items as {"id", "fields"} dicts
+            comments: Comment texts per work item id. Items without an entry keep
+                      previously indexed comments.
+        """
+        comments = comments or {}
+        conn = self.mirror.connection
+        with self.mirror.lock:
+            for item in items:
+                work_item_id = int(item["id"])
+                fields = item.get("fields") or {}
+                if work_item_id in comments:
+                    comment_text = "\n".join(_plain_text(c) for c in comments[work_item_id])
+                else:
+                    row = conn.execute("SELECT comments FROM action_fts WHERE rowid = ?", (work_item_id,)).fetchone()
+                    comment_text = row[0] if row else ""
+                texts = {
+                    column: "\n".join(_plain_text(fields.get(name)) for name in names if fields.get(name))
+                    for column, names in TEXT_FIELDS.items()
+                }
+                conn.execute("DELETE FROM action_fts WHERE rowid = ?", (work_item_id,))
+                conn.execute(
+                    "INSERT INTO action_fts (rowid, title, description, comments) VALUES (?, ?, ?, ?)",
+                    (work_item_id, texts["title"], texts["description"], comment_text),
+                )
+            conn.commit()
+
+    def rebuild(self) -> int:
+        """
+        Re-index every mirrored work item (keeping indexed comments).
+
+        Returns:
+            Number of items indexed
+        """
+        with self.mirror.lock:
+            rows = self.mirror.connection.execute("SELECT id, fields FROM work_items").fetchall()
+        items = [{"id": row["id"], "fields": json.loads(row["fields"])} for row in rows]
+        self.index_items(items)
+        logger.info(f"[SEARCH] Rebuilt index ({len(items)} Actions)")
+        return len(items)
+
+    async def index_changes(self, changed: List[Dict[str, Any]], client: Optional[Any] = None) -> None:
+        """
+        Mirror sync listener: index changed items, fetching their comments when a client is given.
+
+        Args:
+            changed: Changed work items from MirrorSyncWorker
+            client: Live work item client exposing `get_comments(id)`, or None to skip comments
+        """
+        if not changed:
+            return
+        comments: Dict[int, List[str]] = {}
+        if client is not None:
+            async def _fetch(work_item_id: int) -> None:
+                try:
+                    fetched = await client.get_comments(work_item_id)
+                    comments[work_item_id] = [c.get("text") or "" for c in fetched]
+                except Exception as e:
+                    logger.warning(f"[SEARCH] Could not fetch comments for {work_item_id}: {e}")
+            await asyncio.gather(*(_fetch(int(item["id"])) for item in changed))
+        await asyncio.to_thread(self.index_items, changed, comments)
+        logger.info(f"[SEARCH] Indexed {len(changed)} changed Action(s)")
+
+    def search(
+        self,
+        text: Optional[str] = None,
+        filters: Optional[Dict[str, List[str]]] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        Keyword and faceted search.
+
+        Args:
+            text: Free-text query over title, description and comments (optional)
+            filters: Facet name -> accepted values, e.g. {"state": ["Active"]}. Area paths
+                     also match their child areas.
+            limit: Maximum results to return
+            offset: Results to skip
+
+        Returns:
+            {"total", "items": [...], "facets": {facet: {value: count}}}. Items are
+            ranked by relevance when text is given, else newest change first.
+
+        Raises:
+            ValueError: For an unknown facet name
+        """
+        clauses: List[str] = ["w.work_item_type = 'Action'"]
+        params: List[Any] = []
+        match = fts_query(text) if text else None
+        if match:
+            clauses.append("action_fts MATCH ?")
+            params.append(match)
+        for facet, values in (filters or {}).items():
+            if facet not in FACETS:
+                raise ValueError(f"Unknown facet '{facet}'. Valid: {', '.join(FACETS)}")
+            if not values:
+                continue
+            values = [str(v) for v in values]
+            if facet == "area_path":
+                # Area paths match their subtree, like WIQL UNDER and ActionMirror.query_ids
+                under = []
+                for value in values:
+                    under.append("(w.area_path = ? OR w.area_path LIKE ? ESCAPE '!')")
+                    escaped = value.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+                    params.extend([value, escaped + "\\%"])
+                clauses.append(f"({' OR '.join(under)})")
+                continue
+            clauses.append(f"w.{FACETS[facet]} IN ({','.join('?' for _ in values)})")
+            params.extend(values)
+
+        source = "work_items w JOIN action_fts ON action_fts.rowid = w.id" if match else "work_items w"
+        where = " AND ".join(clauses)
+        select_snippet = "snippet(action_fts, -1, '[', ']', '…', 12)" if match else "NULL"
+        order = "bm25(action_fts, 10.0, 2.0, 1.0)" if match else "w.changed_date DESC"
+
+        conn = self.mirror.connection
+        with self.mirror.lock:
+            total = conn.execute(f"SELECT COUNT(*) FROM {source} WHERE {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT w.id, w.title, w.state, w.priority, w.assigned_to, w.area_path, w.changed_date, "
+                f"{select_snippet} AS snippet FROM {source} WHERE {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [int(limit), int(offset)],
+            ).fetchall()
+            facets = {}
+            for facet, column in FACETS.items():
+                counts = conn.execute(
+                    f"SELECT w.{column} AS value, COUNT(*) AS n FROM {source} WHERE {where} "
+                    f"GROUP BY w.{column} ORDER BY n DESC LIMIT 20",
+                    params,
+                ).fetchall()
+                facets[facet] = {str(row["value"]): row["n"] for row in counts if row["value"] is not None}
+
+        return {
+            "total": total,
+            "items": [dict(row) for row in rows],
+            "facets": facets,
+        }
+
+    def as_tool(self) -> Callable[..., Any]:
+        """
+        Expose search as a function tool the agent can call.
+
+        Returns:
+            An async function whose signature and docstring describe the tool to the model
+        """
+        index = self
+
+        async def search_actions(
+            keywords: Optional[str] = None,
+            state: Optional[List[str]] = None,
+            priority: Optional[List[str]] = None,
+            assigned_to: Optional[str] = None,
+            area_path: Optional[str] = None,
+            limit: int = 10,
+        ) -> str:
+            """
+            Search Unified Action Tracker Actions by keyword and filters using the local index.
+            Much faster than composing Azure DevOps queries; prefer it for keyword, state,
+            priority, assignee and area path lookups. Returns JSON with total, ranked items
+            (id, title, state, priority, assigned_to, area_path, changed_date, snippet) and facet counts.
+            """
+            filters = {
+                "state": state,
+                "priority": priority,
+                "assigned_to": [assigned_to] if assigned_to else None,
+                "area_path": [area_path] if area_path else None,
+            }
+            results = await asyncio.to_thread(
+                index.search, keywords, {k: v for k, v in filters.items() if v}, max(1, min(limit, 50))
+            )
+            return json.dumps(results, default=str)
+
+        return search_actions
@@ -1,15 +1,38 @@
 """Core agent implementation using Microsoft Agent Framework."""
 
+import asyncio
+import json
 import logging
 import os
+import re
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, AsyncGenerator
-from azure.identity.aio import DefaultAzureCredential
+from typing import Any, Dict, List, Optional, AsyncGenerator, Tuple
 from agent_framework.azure import AzureAIClient
 from agent_framework import MCPStdioTool
+from src.action_mirror import ActionMirror
+from src.action_search import ActionSearchIndex
+from src.credentials import CachedTokenCredential, acquire_credential, release_credential
+from src.instruction_compiler import (
+    CompiledInstructions,
+    InstructionBudgetError,
+    compile_file,
+    compile_instructions,
+    instruction_config_from_env,
+)
+from src.model_router import ModelRouter, response_headers, throttle_details
+from src.models.config import CredentialConfig, InstructionConfig
+from src.models.routing import RoutingDecision
+from src.prefetch import RelatedItemPrefetcher
+from src.routing_output import STRUCTURED_OUTPUT_DIRECTIVE, IncrementalJSONParser, JSONEvent, parse_routing_decision
+from src.session_store import Session
+from src.work_items import ado_mcp_args
 
 logger = logging.getLogger(__name__)
 
+# Action ids referenced in a query, e.g. "action 676893", "UAT #12345", "work item 12345"
+ACTION_ID_PATTERN = re.compile(r"\b(?:actions?|uats?|work\s*items?)\s*#?\s*(\d{4,8})\b", re.IGNORECASE)
+
 
 class TechRobAgent:
     """TechRob Action360 AI Agent with Foundry GPT-4o and Azure DevOps MCP integration."""
@@ -24,6 +47,13 @@ class TechRobAgent:
         instructions: Optional[str] = None,
         instruction_type: str = "summary",
         enable_mcp: bool = True,
+        model_router: Optional[ModelRouter] = None,
+        mirror: Optional[ActionMirror] = None,
+        search_index: Optional[ActionSearchIndex] = None,
+        instruction_config: Optional[InstructionConfig] = None,
+        prefetcher: Optional[RelatedItemPrefetcher] = None,
+        credential_config: Optional[CredentialConfig] = None,
+        mirror_max_staleness_seconds: float = 900.0,
     ):
         """
         Initialize the agent with Foundry credentials and MCP tools.
@@ -37,6 +67,17 @@ class TechRobAgent:
             instructions: System instructions for the agent. If provided, overrides instruction_type.
             instruction_type: Type of instructions to load ("summary", "routing", etc.). Defaults to "summary".
             enable_mcp: Whether to enable Azure DevOps MCP tools.
+            model_router: Router spreading requests across several deployments. Defaults to
+                          one built from the MODEL_DEPLOYMENTS env var, if set.
+            mirror: Local work item mirror. Actions referenced in a query are read from it
+                    and handed to the model so it can skip the fetch tool call.
+            search_index: Local Action search index, exposed to the model as a search_actions tool.
+            instruction_config: Instruction compiler settings. Defaults to the INSTRUCTION_* env vars.
+            prefetcher: Speculative fetcher for referenced Actions' comments and related items,
+                        exposed to the model as a get_action_details tool.
+            credential_config: Token caching settings. Defaults to the CREDENTIAL_* env vars.
+            mirror_max_staleness_seconds: Mirror age beyond which mirrored Actions are not
+                                          handed to the model (it fetches them live instead).
         """
         self.project_endpoint = project_endpoint or os.getenv("FOUNDRY_PROJECT_ENDPOINT")
         self.model_deployment_name = model_deployment_name or os.getenv("MODEL_DEPLOYMENT", "gpt-4o")
@@ -45,17 +86,39 @@ class TechRobAgent:
         self.agent_name = agent_name
         self.enable_mcp = enable_mcp
         self.instruction_type = instruction_type
+        self.instruction_config = instruction_config or instruction_config_from_env()
+        self.compiled_instructions: Optional[CompiledInstructions] = None
         
         # Load instructions from file if not provided
         if instructions:
             self.instructions = instructions
+            if self.instruction_config.enabled:
+                self.compiled_instructions = compile_instructions(instructions, self.instruction_config)
+                self.instructions = self.compiled_instructions.prefix
         else:
             self.instructions = self._load_instructions(instruction_type=instruction_type)
         
+        self.model_router = model_router or ModelRouter.from_env()
+        self.mirror = mirror
+        self.mirror_max_staleness_seconds = mirror_max_staleness_seconds
+        self.search_index = search_index
+        self.prefetcher = prefetcher
+        
+        self.credential_config = credential_config
         self.credential = None
         self.client = None
         self.agent = None
         self.mcp_tools = []
+        self.local_tools = [search_index.as_tool()] if search_index else []
+        if prefetcher:
+            self.local_tools.append(prefetcher.as_tool())
+        self._routed_clients: Dict[str, AzureAIClient] = {}
+        self.last_usage_tokens: Optional[int] = None
+        self.last_run_stats: dict = {}
+        # Schema-constrained output (response_format); switched off if the client rejects it
+        self.structured_output_schema = os.getenv("STRUCTURED_OUTPUT_SCHEMA", "true").lower() in ("1", "true", "yes")
+        # Let the model request several independent tool calls per turn; the framework runs them concurrently
+        self.parallel_tool_calls = os.getenv("PARALLEL_TOOL_CALLS", "true").lower() in ("1", "true", "yes")
         
         logger.info(f"[INIT] TechRobAgent initialized (name={agent_name}, ADO org={self.ado_org_name}, instruction_type={instruction_type})")
     
@@ -71,15 +134,32 @@ class TechRobAgent:
         Returns:
             Instructions string for the agent
         """
+        instructions, compiled = self._load_instruction_set(instruction_type)
+        if compiled is not None and compiled is not self.compiled_instructions:
+            logger.info(
+                f"[INSTRUCTIONS] instructions_{instruction_type}: {compiled.raw_tokens} -> {compiled.tokens} tokens "
+                f"(static prefix {compiled.prefix_tokens})"
+            )
+        self.compiled_instructions = compiled
+        return instructions
+    
+    def _load_instruction_set(self, instruction_type: str) -> Tuple[str, Optional[CompiledInstructions]]:
+        """
+        Load an instruction set without touching the agent's current one.
+        
+        Returns:
+            (instructions or static prefix, compiled instructions or None when not compiling)
+        """
         # Try specific instruction file first
         instructions_path = Path(__file__).parent.parent / "config" / f"instructions_{instruction_type}.md"
         
         if instructions_path.exists():
             try:
-                with open(instructions_path, 'r', encoding='utf-8') as f:
-                    instructions = f.read()
-                logger.info(f"Loaded instructions from {instructions_path}")
-                return instructions
+                loaded = self._read_instructions(instructions_path)
+                logger.debug(f"Loaded instructions from {instructions_path}")
+                return loaded
+            except InstructionBudgetError:
+                raise
             except Exception as e:
                 logger.warning(f"Failed to load instructions from file: {e}, trying fallback")
         
@@ -87,10 +167,11 @@ class TechRobAgent:
         legacy_instructions_path = Path(__file__).parent.parent / "config" / "instructions.md"
         if legacy_instructions_path.exists():
             try:
-                with open(legacy_instructions_path, 'r', encoding='utf-8') as f:
-                    instructions = f.read()
+                loaded = self._read_instructions(legacy_instructions_path)
                 logger.info(f"Loaded instructions from {legacy_instructions_path} (legacy)")
-                return instructions
+                return loaded
+            except InstructionBudgetError:
+                raise
             except Exception as e:
                 logger.warning(f"Failed to load legacy instructions from file: {e}, using default")
         
@@ -107,7 +188,51 @@ You have access to Azure DevOps via the MCP server, which provides tools for:
 
 Always provide clear, accurate, and concise responses.
 When users ask about Azure DevOps data, use the appropriate tools to fetch real data from the '{self.ado_project_name}' project."""
-        return default_instructions
+        return default_instructions, None
+    
+    def _read_instructions(self, path: Path) -> Tuple[str, Optional[CompiledInstructions]]:
+        """
+        Read an instructions file, compiling it unless the compiler is disabled.
+        
+        Compiled results are cached per file until it changes, so running
+        another instruction type per request doesn't recompile.
+        
+        Args:
+            path: Instructions markdown file
+        
+        Returns:
+            (static instruction prefix or the raw file when not compiling, compiled instructions or None)
+        """
+        if not self.instruction_config.enabled:
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read(), None
+        compiled = compile_file(path, self.instruction_config)
+        return compiled.prefix, compiled
+    
+    def _instructions_for_run(self, instruction_type: Optional[str] = None) -> str:
+        """
+        Instructions for one run: the static prefix plus the rendered per-request suffix.
+        
+        The prefix is identical across requests so the provider's prompt cache can reuse it.
+        
+        Args:
+            instruction_type: Instruction set for this run. Defaults to the agent's current
+                              one; another type is loaded for the run only, so concurrent
+                              runs on a shared agent never see each other's instructions.
+        """
+        instruction_type = instruction_type or self.instruction_type
+        if instruction_type == self.instruction_type:
+            instructions, compiled = self.instructions, self.compiled_instructions
+        else:
+            instructions, compiled = self._load_instruction_set(instruction_type)
+        if not compiled or not compiled.suffix_template:
+            return instructions
+        return compiled.render({
+            "ado_org_name": self.ado_org_name,
+            "ado_project_name": self.ado_project_name,
+            "instruction_type": instruction_type,
+            "today": datetime.now(timezone.utc).date().isoformat(),
+        })
     
     def set_instruction_type(self, instruction_type: str) -> None:
         """
@@ -121,6 +246,22 @@ When users ask about Azure DevOps data, use the appropriate tools to fetch real
         self.instructions = self._load_instructions(instruction_type=instruction_type)
         logger.info(f"[OK] Instructions changed to: {instruction_type} (loaded {len(self.instructions)} chars)")
     
+    def reconfigure_instructions(self, config: InstructionConfig) -> None:
+        """
+        Apply new instruction compiler settings and recompile the current instruction set.
+        
+        Raises:
+            InstructionBudgetError: If the instructions don't fit the new budget; the
+                                    previous settings and instructions are kept
+        """
+        previous = self.instruction_config
+        self.instruction_config = config
+        try:
+            self.set_instruction_type(self.instruction_type)
+        except InstructionBudgetError:
+            self.instruction_config = previous
+            raise
+    
     def _create_mcp_tools(self) -> list:
         """
         Create MCP tool instances for Azure DevOps.
@@ -134,15 +275,9 @@ When users ask about Azure DevOps data, use the appropriate tools to fetch real
         try:
             # Build MCP command arguments
             # The Azure DevOps MCP server accepts: org_name [project_name]
-            mcp_args = [
-                "-y",
-                "@azure-devops/mcp@next",
-                self.ado_org_name,
-            ]
-            
-            # Add project name if available - this helps MCP server set the correct project context
+            # Adding the project name helps the MCP server set the correct project context
+            mcp_args = ado_mcp_args(self.ado_org_name, self.ado_project_name)
             if self.ado_project_name:
-                mcp_args.append(self.ado_project_name)
                 logger.info(f"[MCP] Using project: {self.ado_project_name}")
             
             tools = [
@@ -166,7 +301,8 @@ When users ask about Azure DevOps data, use the appropriate tools to fetch real
         Must be called before using the agent.
         """
         try:
-            self.credential = DefaultAzureCredential()
+            # One caching credential per process: tokens are reused and refreshed in the background
+            self.credential = acquire_credential(self.credential_config)
             self.client = AzureAIClient(
                 project_endpoint=self.project_endpoint,
                 model_deployment_name=self.model_deployment_name,
@@ -185,18 +321,149 @@ When users ask about Azure DevOps data, use the appropriate tools to fetch real
             logger.error(f"Failed to initialize Azure AI Client: {e}")
             raise
     
+    async def warm_up(self) -> None:
+        """
+        Initialize the client and acquire Foundry tokens ahead of the first query.
+        
+        Safe to run in the background at startup; failures are logged and the
+        first query retries them.
+        """
+        if not self.client:
+            try:
+                await self.initialize()
+            except Exception:
+                return
+        if isinstance(self.credential, CachedTokenCredential):
+            await self.credential.warm_up()
+    
+    def _agent_tools(self) -> list:
+        """MCP tools plus in-process tools (e.g. local search) registered on each agent."""
+        return self.mcp_tools + self.local_tools
+    
+    def _get_routed_client(self, deployment_name: str) -> AzureAIClient:
+        """
+        Get (or lazily create) the client for a router-managed deployment.
+        
+        Args:
+            deployment_name: Name of the router deployment entry
+            
+        Returns:
+            AzureAIClient bound to that deployment
+        """
+        client = self._routed_clients.get(deployment_name)
+        if client is None:
+            deployment = next(d for d in self.model_router.deployments if d.name == deployment_name)
+            client = AzureAIClient(
+                project_endpoint=deployment.project_endpoint or self.project_endpoint,
+                model_deployment_name=deployment.deployment,
+                credential=self.credential,
+            )
+            self._routed_clients[deployment_name] = client
+            logger.info(f"[ROUTER] Created client for {deployment_name} ({deployment.deployment})")
+        return client
+    
+    def drop_routed_clients(self, deployment_names) -> None:
+        """
+        Discard cached clients for deployments whose settings changed or were removed.
+        
+        The next request routed to a changed deployment builds a client with its new
+        deployment name and project endpoint.
+        
+        Args:
+            deployment_names: Names returned by ModelRouter.reconfigure
+        """
+        for name in deployment_names:
+            if self._routed_clients.pop(name, None) is not None:
+                logger.info(f"[ROUTER] Dropped client for {name} (deployment changed or removed)")
+    
     async def cleanup(self) -> None:
         """Clean up resources."""
         if self.credential:
-            await self.credential.close()
+            await release_credential(self.credential)
+            self.credential = None
         logger.info("Agent cleanup completed")
     
-    async def process_query(self, query: str) -> str:
+    @staticmethod
+    def _referenced_ids(query: str) -> list:
+        """Action ids referenced in a query, ascending."""
+        return sorted({int(match) for match in ACTION_ID_PATTERN.findall(query)})
+    
+    def _start_prefetch(self, query: str, mirrored: Optional[Dict[int, Dict[str, Any]]] = None) -> None:
+        """
+        Start fetching referenced Actions' details so they are ready when the model asks.
+        
+        Args:
+            query: User query string
+            mirrored: Work items already supplied from a fresh mirror copy, by id. Their
+                      comments and related items are still prefetched, but not the item itself.
+        """
+        if not self.prefetcher:
+            return
+        mirrored = mirrored or {}
+        for work_item_id in self._referenced_ids(query):
+            self.prefetcher.prefetch(work_item_id, item=mirrored.get(work_item_id))
+    
+    async def _prepare_query(self, query: str) -> str:
+        """Add mirrored context to a query and prefetch what the mirror didn't supply."""
+        prepared, mirrored = await self._with_mirror_context(query)
+        self._start_prefetch(query, mirrored={item['id']: item for item in mirrored})
+        return prepared
+    
+    async def _with_mirror_context(self, query: str) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Prepend mirrored data for Actions referenced in the query.
+        
+        Falls back to the plain query (and a live tool fetch by the model) when
+        the mirror is disabled, hasn't synced within mirror_max_staleness_seconds,
+        or doesn't hold the referenced Actions. SQLite reads run off the event loop.
+        
+        Args:
+            query: User query string
+            
+        Returns:
+            (query with a mirrored work item context block or the original query, mirrored work items)
+        """
+        if not self.mirror:
+            return query, []
+        ids = self._referenced_ids(query)
+        if not ids:
+            return query, []
+        age = await asyncio.to_thread(self.mirror.age_seconds)
+        if age is None or age > self.mirror_max_staleness_seconds:
+            logger.info(f"[MIRROR] Mirror is stale ({'never synced' if age is None else f'{age:.0f}s old'}), "
+                        "leaving the fetch to the model")
+            return query, []
+        items = await asyncio.to_thread(self.mirror.get_work_items, ids)
+        if not items:
+            return query, []
+        logger.info(f"[MIRROR] Using mirrored data for {[item['id'] for item in items]}")
+        context = json.dumps(items, default=str)
+        return (
+            "Work item data for the Actions referenced below, read from the local mirror of "
+            f"'{self.ado_project_name}' (fields as returned by wit_get_work_item). Use it instead of "
+            "fetching these work items again; still call tools for comments, related items or other data.\n"
+            f"```json\n{context}\n```\n\n"
+            f"User request: {query}"
+        ), items
+    
+    async def process_query(
+        self,
+        query: str,
+        session: Optional[Session] = None,
+        response_format: Optional[type] = None,
+        instruction_type: Optional[str] = None,
+    ) -> str:
         """
         Process a user query and return a response.
         
         Args:
             query: User query string
+            session: Conversation session to continue. Its thread is reused so
+                     follow-up queries keep earlier context and tool results.
+            response_format: Pydantic model constraining the output to its JSON schema,
+                             where the model deployment supports structured outputs
+            instruction_type: Instruction set for this run only (defaults to the agent's
+                              current one); concurrent runs may use different types
             
         Returns:
             Agent response string
@@ -204,55 +471,217 @@ When users ask about Azure DevOps data, use the appropriate tools to fetch real
         if not self.client:
             await self.initialize()
         
+        instruction_type = instruction_type or self.instruction_type
+        instructions = self._instructions_for_run(instruction_type)
         logger.info(f"Processing query: {query}")
-        logger.info(f"Using instruction type: {self.instruction_type}")
+        logger.info(f"Using instruction type: {instruction_type}")
         logger.info(f"MCP Tools available: {len(self.mcp_tools)}")
         for tool in self.mcp_tools:
             logger.info(f"  - {tool.name}")
         logger.info("=" * 80)
         logger.info("INSTRUCTIONS BEING USED:")
         logger.info("=" * 80)
-        logger.info(self.instructions)
+        logger.info(instructions)
         logger.info("=" * 80)
         
+        query = await self._prepare_query(query)
+        
+        if not self.model_router:
+            result = await self._run_agent(
+                self.client, query, session=session, response_format=response_format, instructions=instructions
+            )
+            self.last_usage_tokens = self._usage_tokens(result)
+            self.last_run_stats = self._run_stats(result)
+            return result.text if result.text else "No response generated"
+        
+        # Spread load across deployments, moving on to another one when throttled
+        tried = []
+        for attempt in range(self.model_router.config.max_attempts):
+            deployment = self.model_router.select(instruction_type, exclude=tried)
+            tried.append(deployment.name)
+            logger.info(f"[ROUTER] Attempt {attempt + 1}: using deployment {deployment.name}")
+            try:
+                result = await self._run_agent(
+                    self._get_routed_client(deployment.name), query,
+                    session=session, response_format=response_format, instructions=instructions,
+                )
+            except Exception as e:
+                throttle = throttle_details(e)
+                if throttle is None:
+                    raise
+                self.model_router.record_response(deployment.name, throttle["headers"])
+                self.model_router.record_throttle(deployment.name, throttle["retry_after"])
+                if attempt + 1 >= self.model_router.config.max_attempts:
+                    raise
+                continue
+            finally:
+                self.model_router.release(deployment.name)
+            
+            self.last_usage_tokens = self._usage_tokens(result)
+            self.last_run_stats = {**self._run_stats(result), "deployment": deployment.name}
+            headers = response_headers(result)
+            if headers:
+                self.model_router.record_response(deployment.name, headers)
+            elif self.last_usage_tokens:
+                self.model_router.record_usage(deployment.name, self.last_usage_tokens)
+            return result.text if result.text else "No response generated"
+        
+        return "No response generated"
+    
+    @staticmethod
+    def _usage_tokens(result: Any) -> Optional[int]:
+        """Total tokens reported for an agent run, if the framework provides usage details."""
+        usage = getattr(result, "usage_details", None)
+        return getattr(usage, "total_token_count", None) if usage else None
+    
+    @staticmethod
+    def _run_stats(result: Any) -> dict:
+        """Token usage, model turns and tool calls for an agent run (None where not reported)."""
+        usage = getattr(result, "usage_details", None)
+        messages = getattr(result, "messages", None) or []
+        tool_calls = sum(
+            1
+            for message in messages
+            for content in (getattr(message, "contents", None) or [])
+            if getattr(content, "type", None) == "function_call"
+        )
+        roles = (getattr(message, "role", None) for message in messages)
+        turns = sum(1 for role in roles if str(getattr(role, "value", role)) == "assistant")
+        return {
+            "total_tokens": getattr(usage, "total_token_count", None) if usage else None,
+            "input_tokens": getattr(usage, "input_token_count", None) if usage else None,
+            "output_tokens": getattr(usage, "output_token_count", None) if usage else None,
+            "model_turns": turns,
+            "tool_calls": tool_calls,
+        }
+    
+    @staticmethod
+    async def _run_in_session(agent: Any, query: str, session: Optional[Session], **options: Any) -> Any:
+        """
+        Run a query on an agent, continuing the session's thread when given.
+        
+        Args:
+            agent: Agent created for this query
+            query: User query string
+            session: Conversation session, or None for a stateless run
+            **options: Extra run options (e.g. response_format)
+            
+        Returns:
+            Agent run result
+        """
+        if session is None:
+            return await agent.run(query, **options)
+        if session.thread is None and hasattr(agent, 'get_new_thread'):
+            session.thread = agent.get_new_thread()
+            logger.info(f"[SESSION] Started new thread for session {session.session_id}")
+        if session.thread is not None:
+            options['thread'] = session.thread
+        result = await agent.run(query, **options)
+        session.record_run(result)
+        return result
+    
+    def _run_options(self, response_format: Optional[type] = None) -> dict:
+        """Optional run settings the current client is known (or assumed) to accept."""
+        options = {}
+        if response_format is not None and self.structured_output_schema:
+            options['response_format'] = response_format
+        if self.parallel_tool_calls and self._agent_tools():
+            options['allow_multiple_tool_calls'] = True
+        return options
+    
+    def _drop_unsupported_option(self, error: TypeError, options: dict) -> bool:
+        """
+        Remove the run option a TypeError complains about and stop sending it.
+        
+        Returns:
+            True if an option was dropped (the run can be retried)
+        """
+        flags = {'response_format': 'structured_output_schema', 'allow_multiple_tool_calls': 'parallel_tool_calls'}
+        for name in [n for n in options if n in flags]:
+            if name in str(error):
+                # Client doesn't support it; structured output then relies on the prompt directive
+                logger.warning(f"[RUN] {name} not supported by the client, disabling: {error}")
+                setattr(self, flags[name], False)
+                del options[name]
+                return True
+        return False
+    
+    async def _run_agent(
+        self,
+        client: AzureAIClient,
+        query: str,
+        session: Optional[Session] = None,
+        response_format: Optional[type] = None,
+        instructions: Optional[str] = None,
+    ) -> Any:
+        """
+        Create an agent on the given client and run a single query.
+        
+        Args:
+            client: Client bound to the model deployment to use
+            query: User query string
+            session: Conversation session to continue, if any
+            response_format: Optional Pydantic model for schema-constrained output
+            instructions: Instructions for this run. Defaults to the agent's current ones.
+            
+        Returns:
+            Agent run result
+        """
+        options = self._run_options(response_format)
+        instructions = instructions or self._instructions_for_run()
         try:
             # Create agent with MCP tools registered
-            async with self.client.create_agent(
+            async with client.create_agent(
                 name=self.agent_name,
-                instructions=self.instructions,
-                tools=self.mcp_tools if self.mcp_tools else None,  # Pass tools to agent
+                instructions=instructions,
+                tools=self._agent_tools() or None,  # Pass tools to agent
             ) as agent:
                 logger.info(f"[RUN] Agent created. Running query: '{query}' (len={len(query)})")
-                result = await agent.run(query)
+                while True:
+                    try:
+                        result = await self._run_in_session(agent, query, session, **options)
+                        break
+                    except TypeError as e:
+                        if not self._drop_unsupported_option(e, options):
+                            raise
                 logger.info(f"[OK] Agent response received ({len(result.text) if result.text else 0} chars)")
                 if result.text:
                     logger.debug(f"Response preview: {result.text[:500]}...")
-                return result.text if result.text else "No response generated"
+                return result
         except TypeError as e:
             # If create_agent doesn't accept tools, try without it
             if "tools" in str(e):
                 logger.warning(f"Agent framework doesn't accept tools parameter, attempting without: {e}")
-                async with self.client.create_agent(
+                async with client.create_agent(
                     name=self.agent_name,
-                    instructions=self.instructions,
+                    instructions=instructions,
                 ) as agent:
                     # Try to set tools directly on agent
                     if hasattr(agent, 'tools'):
-                        agent.tools = self.mcp_tools
-                    result = await agent.run(query)
-                    return result.text if result.text else "No response generated"
+                        agent.tools = self._agent_tools()
+                    return await self._run_in_session(agent, query, session)
             else:
                 raise
         except Exception as e:
             logger.error(f"Error processing query: {e}")
             raise
     
-    async def process_query_stream(self, query: str) -> AsyncGenerator[str, None]:
+    async def process_query_stream(
+        self,
+        query: str,
+        session: Optional[Session] = None,
+        instruction_type: Optional[str] = None,
+        response_format: Optional[type] = None,
+    ) -> AsyncGenerator[str, None]:
         """
         Process a user query and stream the response.
         
         Args:
             query: User query string
+            session: Conversation session to continue, if any
+            instruction_type: Instruction set for this run only (defaults to the agent's current one)
+            response_format: Pydantic model constraining the streamed output to its JSON schema,
+                             where the model deployment supports structured outputs
             
         Yields:
             Response text chunks
@@ -260,20 +689,111 @@ When users ask about Azure DevOps data, use the appropriate tools to fetch real
         if not self.client:
             await self.initialize()
         
+        instruction_type = instruction_type or self.instruction_type
+        instructions = self._instructions_for_run(instruction_type)
         logger.info(f"Processing query (streaming): {query}")
+        query = await self._prepare_query(query)
+        
+        # Streams can't be replayed on another deployment, so the router picks once
+        client = self.client
+        deployment = None
+        if self.model_router:
+            deployment = self.model_router.select(instruction_type)
+            client = self._get_routed_client(deployment.name)
+            logger.info(f"[ROUTER] Streaming on deployment {deployment.name}")
         
         try:
-            async with self.client.create_agent(
+            async with client.create_agent(
                 name=self.agent_name,
-                instructions=self.instructions,
-                tools=self.mcp_tools,  # Include MCP tools
+                instructions=instructions,
+                tools=self._agent_tools(),  # Include MCP and local tools
             ) as agent:
-                async for chunk in agent.run_stream(query):
-                    if chunk.text:
-                        yield chunk.text
+                options = self._run_options(response_format)
+                if session is not None:
+                    if session.thread is None and hasattr(agent, 'get_new_thread'):
+                        session.thread = agent.get_new_thread()
+                    if session.thread is not None:
+                        options['thread'] = session.thread
+                streamed = False
+                while True:
+                    try:
+                        async for chunk in agent.run_stream(query, **options):
+                            streamed = True
+                            if chunk.text:
+                                yield chunk.text
+                        break
+                    except TypeError as e:
+                        # Options are rejected before anything streams; retry without them
+                        if streamed or not self._drop_unsupported_option(e, options):
+                            raise
+                if session is not None:
+                    session.turns += 1
         except Exception as e:
+            if deployment:
+                throttle = throttle_details(e)
+                if throttle:
+                    self.model_router.record_throttle(deployment.name, throttle["retry_after"])
             logger.error(f"Error streaming query: {e}")
             raise
+        finally:
+            if deployment:
+                self.model_router.release(deployment.name)
+    
+    @staticmethod
+    def _structured_query(query: str) -> str:
+        """Append the structured output directive to a routing query."""
+        return f"{query}\n\n{STRUCTURED_OUTPUT_DIRECTIVE}"
+    
+    async def process_query_structured(
+        self, query: str, session: Optional[Session] = None, instruction_type: Optional[str] = None
+    ) -> RoutingDecision:
+        """
+        Process a routing query and return a validated routing decision.
+        
+        Args:
+            query: User query string (e.g. "Analyze action 12345 and provide routing recommendation")
+            session: Conversation session to continue, if any
+            instruction_type: Instruction set for this run only (defaults to the agent's current one)
+            
+        Returns:
+            Routing decision; the human-readable summary is in its `summary` field
+            
+        Raises:
+            RoutingOutputError: If the model's answer isn't a valid routing decision
+        """
+        response = await self.process_query(
+            self._structured_query(query), session=session, response_format=RoutingDecision,
+            instruction_type=instruction_type,
+        )
+        return parse_routing_decision(response)
+    
+    async def process_query_structured_stream(
+        self, query: str, session: Optional[Session] = None, instruction_type: Optional[str] = None
+    ) -> AsyncGenerator[JSONEvent, None]:
+        """
+        Stream a routing decision field by field.
+        
+        Args:
+            query: User query string
+            session: Conversation session to continue, if any
+            instruction_type: Instruction set for this run only (defaults to the agent's current one)
+            
+        Yields:
+            A JSONEvent per completed field (decision first), partial events
+            carrying deltas of the summary text, and finally a "result" event
+            whose value is the validated RoutingDecision
+            
+        Raises:
+            RoutingOutputError: If the streamed answer isn't a valid routing decision
+        """
+        parser = IncrementalJSONParser()
+        async for chunk in self.process_query_stream(
+            self._structured_query(query), session=session, instruction_type=instruction_type,
+            response_format=RoutingDecision,
+        ):
+            for event in parser.feed(chunk):
+                yield event
+        yield JSONEvent("result", parser.result())
     
     def get_available_tools(self) -> dict:
         """
@@ -282,8 +802,9 @@ When users ask about Azure DevOps data, use the appropriate tools to fetch real
         Returns:
             Dictionary of available tools
         """
-        return {
+        tools = {
             "mcp_tools": len(self.mcp_tools),
+            "local_tools": [getattr(tool, "__name__", str(tool)) for tool in self.local_tools],
             "mcp_enabled": self.enable_mcp,
             "ado_org": self.ado_org_name,
             "capabilities": [
@@ -295,3 +816,17 @@ When users ask about Azure DevOps data, use the appropriate tools to fetch real
                 "iterations",
             ],
         }
+        if self.prefetcher:
+            tools["prefetch"] = self.prefetcher.stats()
+        if isinstance(self.credential, CachedTokenCredential):
+            tools["credential"] = self.credential.stats()
+        if self.compiled_instructions:
+            tools["instructions"] = {
+                "type": self.instruction_type,
+                "tokens": self.compiled_instructions.tokens,
+                "static_prefix_tokens": self.compiled_instructions.prefix_tokens,
+                "raw_tokens": self.compiled_instructions.raw_tokens,
+            }
+        if self.model_router:
+            tools["model_deployments"] = self.model_router.snapshot()
+        return tools
@@ -1,18 +1,54 @@
 """REST API for multi-platform agent access."""
 
+import asyncio
+import hmac
+import json
 import logging
 import os
-from typing import Dict, Any
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Any, Optional, Set
 from aiohttp import web
+from pydantic import ValidationError
+from src.action_list import ActionLister, render_table
+from src.action_mirror import MirroredWorkItemSource, MirrorSyncWorker, mirror_config_from_env
 from src.agent import TechRobAgent
+from src.config_loader import RESTART_SECTIONS, ConfigApplyError, ConfigReloader
+from src.credentials import CachedTokenCredential
+from src.models.actions import ActionListQuery
+from src.models.config import AppConfig, MirrorConfig, PrecomputeConfig, ProfilingConfig, SchedulerConfig
+from src.precompute import PrecomputeStore, PrecomputeWorker, precompute_config_from_env
+from src.profiling import LoopLagMonitor, MemoryTracker, SamplingProfiler, profiling_config_from_env, token_matches
+from src.routing_output import KEY_FIELDS, RoutingOutputError, parse_routing_decision
+from src.scheduler import INTERACTIVE, PRIORITY_CLASSES, ROUTING, FairScheduler, SchedulerBusy, scheduler_config_from_env
+from src.session_store import Session, SessionStore
+from src.work_items import WorkItemClient
 
 logger = logging.getLogger(__name__)
 
+# Order in which apply_config applies changed sections
+APPLY_ORDER = (
+    "sessions", "scheduler", "mirror", "precompute", "prefetch", "credentials",
+    "model_router", "instructions", "profiling", "logging",
+)
+
 
 class AgentAPI:
     """REST API for accessing the agent."""
     
-    def __init__(self, agent: TechRobAgent, port: int = 8000, host: str = "0.0.0.0"):
+    def __init__(
+        self,
+        agent: TechRobAgent,
+        port: int = 8000,
+        host: str = "0.0.0.0",
+        sessions: Optional[SessionStore] = None,
+        work_items: Optional[WorkItemClient] = None,
+        mirror_config: Optional[MirrorConfig] = None,
+        precompute_config: Optional[PrecomputeConfig] = None,
+        scheduler_config: Optional[SchedulerConfig] = None,
+        config_reloader: Optional[ConfigReloader] = None,
+        profiling_config: Optional[ProfilingConfig] = None,
+    ):
         """
         Initialize the API.
         
@@ -20,11 +56,72 @@ class AgentAPI:
             agent: TechRobAgent instance
             port: Port to run the API on
             host: Host to bind to
+            sessions: Store for conversation sessions. Defaults to one configured from env vars.
+            work_items: Direct (model-free) work item client. Defaults to one for the agent's ADO project.
+            mirror_config: Sync settings used when the agent has a local mirror. Defaults to MIRROR_* env vars.
+            precompute_config: Background pre-computation settings (requires the mirror).
+                               Defaults to PRECOMPUTE_* env vars.
+            scheduler_config: Weighted fair scheduling of agent runs. Defaults to SCHEDULER_* env vars.
+            config_reloader: Watches the configuration file; changed limits, budgets and
+                             caches are applied to the running server.
+            profiling_config: Token-protected /api/debug endpoints (CPU profile, memory
+                              diffs, event-loop lag). Defaults to DEBUG_* env vars.
         """
         self.agent = agent
+        self.sessions = sessions if sessions is not None else SessionStore.from_env()
+        self.work_items = work_items or WorkItemClient(agent.ado_org_name, agent.ado_project_name)
+        
+        # Read lists from the local mirror (kept current in the background) when the agent has one
+        self.mirror_sync: Optional[MirrorSyncWorker] = None
+        source: Any = self.work_items
+        if agent.mirror:
+            mirror_config = mirror_config or mirror_config_from_env()
+            source = MirroredWorkItemSource(agent.mirror, self.work_items, mirror_config.max_staleness_seconds)
+            self.mirror_sync = MirrorSyncWorker(agent.mirror, self.work_items, mirror_config)
+        self.mirror_source = source if isinstance(source, MirroredWorkItemSource) else None
+        self.action_lister = ActionLister(source)
+        if agent.search_index and self.mirror_sync:
+            index_comments = os.getenv("SEARCH_INDEX_COMMENTS", "true").lower() in ("1", "true", "yes")
+            comment_client = self.work_items if index_comments else None
+            self.mirror_sync.add_listener(
+                lambda changed: agent.search_index.index_changes(changed, comment_client), backfill=True
+            )
+        
+        # Admit agent runs by priority class so interactive lookups aren't stuck behind long analyses
+        scheduler_config = scheduler_config or scheduler_config_from_env()
+        self.scheduler = FairScheduler(scheduler_config) if scheduler_config.enabled else None
+        
+        # Precompute summaries/routing for changed Actions while interactive traffic is idle
+        self._interactive_in_flight = 0
+        self.precompute: Optional[PrecomputeWorker] = None
+        precompute_config = precompute_config or precompute_config_from_env()
+        if agent.mirror and precompute_config.enabled:
+            self.precompute = PrecomputeWorker(
+                PrecomputeStore(agent.mirror),
+                agents={t: self._precompute_agent(t) for t in precompute_config.instruction_types},
+                config=precompute_config,
+                client=self.work_items,
+                is_busy=None if self.scheduler else lambda: self._interactive_in_flight > 0,
+                scheduler=self.scheduler,
+            )
+            if self.mirror_sync:
+                self.mirror_sync.add_listener(self.precompute.on_changes)
         self.port = port or int(os.getenv("API_PORT", 8000))
         self.host = host or os.getenv("API_HOST", "0.0.0.0")
-        self.app = web.Application()
+        self._warm_up: Optional[asyncio.Task] = None
+        
+        # Live-process diagnostics; the lag monitor runs while debug endpoints are enabled
+        self.profiling = profiling_config or profiling_config_from_env()
+        self.loop_monitor = LoopLagMonitor(self.profiling.lag_interval_ms / 1000, self.profiling.lag_threshold_ms)
+        self.memory = MemoryTracker(self.profiling.tracemalloc_frames, self.profiling.max_snapshots)
+        self._profiling_lock = asyncio.Lock()
+        
+        self.config_reloader = config_reloader
+        if config_reloader:
+            config_reloader.add_listener(self.apply_config)
+        self.app = web.Application(middlewares=[self._track_interactive])
+        self.app.on_startup.append(self._on_startup)
+        self.app.on_cleanup.append(self._on_cleanup)
         self._setup_routes()
     
     def _setup_routes(self):
@@ -33,23 +130,105 @@ class AgentAPI:
         self.app.router.add_post('/api/query/stream', self.query_stream_handler)
         self.app.router.add_get('/api/health', self.health_handler)
         self.app.router.add_get('/api/tools', self.tools_handler)
+        self.app.router.add_post('/api/actions/list', self.actions_list_handler)
+        self.app.router.add_get('/api/actions/search', self.actions_search_handler)
+        self.app.router.add_get('/api/mirror', self.mirror_handler)
+        self.app.router.add_get('/api/precompute', self.precompute_handler)
+        self.app.router.add_get('/api/scheduler', self.scheduler_handler)
+        self.app.router.add_get('/api/config', self.config_handler)
+        self.app.router.add_get('/api/debug/profile', self.debug_profile_handler)
+        self.app.router.add_get('/api/debug/loop', self.debug_loop_handler)
+        self.app.router.add_get('/api/debug/memory', self.debug_memory_handler)
+        self.app.router.add_post('/api/debug/memory/snapshot', self.debug_memory_snapshot_handler)
+        self.app.router.add_get('/api/debug/memory/diff', self.debug_memory_diff_handler)
+        self.app.router.add_delete('/api/debug/memory', self.debug_memory_stop_handler)
+        self.app.router.add_post('/api/webhooks/workitem', self.workitem_webhook_handler)
+        self.app.router.add_get('/api/sessions', self.sessions_handler)
+        self.app.router.add_get('/api/sessions/{session_id}', self.session_handler)
+        self.app.router.add_delete('/api/sessions/{session_id}', self.session_delete_handler)
+    
+    def _precompute_agent(self, instruction_type: str) -> TechRobAgent:
+        """Dedicated agent for background pre-computation, configured like the interactive one."""
+        return TechRobAgent(
+            project_endpoint=self.agent.project_endpoint,
+            model_deployment_name=self.agent.model_deployment_name,
+            ado_org_name=self.agent.ado_org_name,
+            ado_project_name=self.agent.ado_project_name,
+            agent_name=f"{self.agent.agent_name}Precompute",
+            instruction_type=instruction_type,
+            enable_mcp=self.agent.enable_mcp,
+            model_router=self.agent.model_router,
+            mirror=self.agent.mirror,
+            mirror_max_staleness_seconds=self.agent.mirror_max_staleness_seconds,
+            instruction_config=self.agent.instruction_config,
+            credential_config=self.agent.credential_config,
+        )
+    
+    @staticmethod
+    def _priority(data: Dict[str, Any], instruction_type: str, structured: bool = False) -> str:
+        """
+        Priority class for a request: routing analyses run as "routing", everything else
+        as "interactive". Clients may ask for a lower class (e.g. "background" for sweeps)
+        with a "priority" field, but never a higher one.
+        """
+        default = ROUTING if structured or instruction_type == 'routing' else INTERACTIVE
+        requested = data.get('priority')
+        if requested in PRIORITY_CLASSES and PRIORITY_CLASSES.index(requested) > PRIORITY_CLASSES.index(default):
+            return requested
+        return default
+    
+    @asynccontextmanager
+    async def _slot(self, request: web.Request, priority: str) -> AsyncIterator[float]:
+        """Hold a scheduler slot for the caller (X-Caller-Id header, else client address)."""
+        if self.scheduler is None:
+            yield 0.0
+            return
+        caller = request.headers.get('X-Caller-Id') or request.remote or 'anonymous'
+        async with self.scheduler.slot(priority, caller) as waited:
+            yield waited
+    
+    @staticmethod
+    def _busy_response(error: SchedulerBusy) -> web.Response:
+        logger.warning(f"[SCHEDULER] Rejected request: {error}")
+        return web.json_response({'error': str(error)}, status=503, headers={'Retry-After': '5'})
+    
+    @web.middleware
+    async def _track_interactive(self, request: web.Request, handler) -> web.StreamResponse:
+        """Count in-flight interactive queries so background work can yield to them."""
+        if not request.path.startswith('/api/query'):
+            return await handler(request)
+        self._interactive_in_flight += 1
+        try:
+            return await handler(request)
+        finally:
+            self._interactive_in_flight -= 1
     
     async def query_handler(self, request: web.Request) -> web.Response:
         """
         Handle query requests (non-streaming).
         
-        Expected JSON body: {"query": "user question", "instruction_type": "summary"}
+        Expected JSON body: {"query": "user question", "instruction_type": "summary", "session_id": "abc"}
         
         Args:
             request: HTTP request with JSON body
             - query (required): The user query string
             - instruction_type (optional): Type of instructions to use ("summary", "routing", etc.)
-                                          Defaults to "summary"
+                                          Defaults to "summary" ("routing" for structured format)
+            - session_id (optional): Continue (or start) a conversation session so follow-up
+                                     queries reuse earlier context. Pass "new" to get a fresh id.
+            - format (optional): "text" (default) or "structured" to get a validated routing
+                                 decision as JSON in a "decision" field
+            - priority (optional): "routing" or "background" to run below the default class
+        
+        Returns 503 when the scheduler can't admit the request in time; the X-Queue-Wait-Ms
+        response header reports time spent queued.
         """
         try:
             data = await request.json()
             query = data.get('query')
-            instruction_type = data.get('instruction_type', 'summary')
+            structured = data.get('format', 'text') == 'structured'
+            instruction_type = data.get('instruction_type', 'routing' if structured else 'summary')
+            session_id = data.get('session_id')
             
             if not query:
                 return web.json_response(
@@ -57,19 +236,46 @@ class AgentAPI:
                     status=400
                 )
             
-            # Switch instruction type if provided and different from current
-            if instruction_type != self.agent.instruction_type:
-                logger.info(f"Switching instruction type from '{self.agent.instruction_type}' to '{instruction_type}'")
-                self.agent.set_instruction_type(instruction_type)
+            session = self._get_session(session_id)
+            
+            # Plain "show/analyze action N" queries may already be precomputed for the current revision
+            precomputed = None
+            if session is None and self.precompute:
+                precomputed = await asyncio.to_thread(self.precompute.lookup, query, instruction_type)
             
-            response = await self.agent.process_query(query)
+            priority = self._priority(data, instruction_type, structured)
+            if structured:
+                return await self._structured_query(request, priority, query, instruction_type, session, precomputed)
             
-            return web.json_response({
+            waited = 0.0
+            if precomputed is not None:
+                response = precomputed
+            else:
+                async with self._slot(request, priority) as waited:
+                    if session is None:
+                        response = await self.agent.process_query(query, instruction_type=instruction_type)
+                    else:
+                        async with session.lock:
+                            session.instruction_type = instruction_type
+                            response = await self.agent.process_query(
+                                query, session=session, instruction_type=instruction_type
+                            )
+                if session is not None:
+                    self.sessions.enforce_limits()
+            
+            body = {
                 'query': query,
                 'instruction_type': instruction_type,
                 'response': response
-            })
+            }
+            if precomputed is not None:
+                body['precomputed'] = True
+            if session is not None:
+                body['session_id'] = session.session_id
+            return web.json_response(body, headers={'X-Queue-Wait-Ms': f"{waited * 1000:.0f}"})
         
+        except SchedulerBusy as e:
+            return self._busy_response(e)
         except Exception as e:
             logger.error(f"Error processing query: {e}")
             return web.json_response(
@@ -77,11 +283,84 @@ class AgentAPI:
                 status=500
             )
     
+    async def _structured_query(
+        self,
+        request: web.Request,
+        priority: str,
+        query: str,
+        instruction_type: str,
+        session: Optional[Session],
+        precomputed: Optional[str],
+    ) -> web.Response:
+        """Answer /api/query in structured format with a validated routing decision."""
+        decision = None
+        if precomputed is not None:
+            try:
+                decision = parse_routing_decision(precomputed)
+            except RoutingOutputError:
+                precomputed = None
+                logger.info("[STRUCTURED] Precomputed response has no valid decision, running live")
+        waited = 0.0
+        try:
+            if decision is None:
+                async with self._slot(request, priority) as waited:
+                    if session is None:
+                        decision = await self.agent.process_query_structured(query, instruction_type=instruction_type)
+                    else:
+                        async with session.lock:
+                            session.instruction_type = instruction_type
+                            decision = await self.agent.process_query_structured(
+                                query, session=session, instruction_type=instruction_type
+                            )
+                if session is not None:
+                    self.sessions.enforce_limits()
+        except RoutingOutputError as e:
+            logger.warning(f"[STRUCTURED] Invalid routing output: {e}")
+            return web.json_response({'error': str(e), 'raw': e.raw}, status=502)
+        
+        body = {
+            'query': query,
+            'instruction_type': instruction_type,
+            'format': 'structured',
+            'decision': decision.model_dump(),
+        }
+        if precomputed is not None:
+            body['precomputed'] = True
+        if session is not None:
+            body['session_id'] = session.session_id
+        return web.json_response(body, headers={'X-Queue-Wait-Ms': f"{waited * 1000:.0f}"})
+    
+    async def _write_structured_stream(
+        self, response: web.StreamResponse, query: str, session: Optional[Session], instruction_type: str
+    ) -> None:
+        """
+        Stream a routing decision as Server-Sent Events.
+        
+        Events: "field" ({"path", "value", "key"}) per completed field, "summary"
+        ({"delta"}) as the summary text grows, then "result" (the full decision)
+        or "error" ({"error", "raw"}).
+        """
+        try:
+            async for event in self.agent.process_query_structured_stream(
+                query, session=session, instruction_type=instruction_type
+            ):
+                if event.path == 'result':
+                    name, payload = 'result', event.value.model_dump()
+                elif event.partial:
+                    name, payload = 'summary', {'delta': event.value}
+                else:
+                    name, payload = 'field', {'path': event.path, 'value': event.value, 'key': event.path in KEY_FIELDS}
+                await response.write(f"event: {name}\ndata: {json.dumps(payload)}\n\n".encode('utf-8'))
+        except RoutingOutputError as e:
+            logger.warning(f"[STRUCTURED] Invalid streamed routing output: {e}")
+            payload = json.dumps({'error': str(e), 'raw': e.raw})
+            await response.write(f"event: error\ndata: {payload}\n\n".encode('utf-8'))
+    
     async def query_stream_handler(self, request: web.Request) -> web.StreamResponse:
         """
         Handle streaming query requests.
         
-        Expected JSON body: {"query": "user question", "instruction_type": "summary"}
+        Expected JSON body: {"query": "user question", "instruction_type": "summary", "session_id": "abc"}
         Streams back Server-Sent Events (SSE) format.
         
         Args:
@@ -89,11 +368,18 @@ class AgentAPI:
             - query (required): The user query string
             - instruction_type (optional): Type of instructions to use ("summary", "routing", etc.)
                                           Defaults to "summary"
+            - session_id (optional): Conversation session to continue; echoed in the
+                                     X-Session-Id response header
+            - format (optional): "structured" streams routing decision fields as
+                                 named events (see _write_structured_stream)
+            - priority (optional): "routing" or "background" to run below the default class
         """
         try:
             data = await request.json()
             query = data.get('query')
-            instruction_type = data.get('instruction_type', 'summary')
+            structured = data.get('format', 'text') == 'structured'
+            instruction_type = data.get('instruction_type', 'routing' if structured else 'summary')
+            session_id = data.get('session_id')
             
             if not query:
                 return web.json_response(
@@ -101,33 +387,490 @@ class AgentAPI:
                     status=400
                 )
             
-            response = web.StreamResponse()
-            response.content_type = 'text/event-stream'
-            response.headers['Cache-Control'] = 'no-cache'
-            response.headers['X-Accel-Buffering'] = 'no'
-            await response.prepare(request)
+            session = self._get_session(session_id)
             
-            # Switch instruction type if provided and different from current
-            if instruction_type != self.agent.instruction_type:
-                logger.info(f"Switching instruction type from '{self.agent.instruction_type}' to '{instruction_type}'")
-                self.agent.set_instruction_type(instruction_type)
+            priority = self._priority(data, instruction_type, structured)
+            async with self._slot(request, priority) as waited:
+                response = web.StreamResponse()
+                response.content_type = 'text/event-stream'
+                response.headers['Cache-Control'] = 'no-cache'
+                response.headers['X-Accel-Buffering'] = 'no'
+                if session is not None:
+                    response.headers['X-Session-Id'] = session.session_id
+                response.headers['X-Queue-Wait-Ms'] = f"{waited * 1000:.0f}"
+                await response.prepare(request)
+                
+                logger.info(f"Starting stream for query: {query} (instruction_type: {instruction_type})")
+                
+                if structured and session is None:
+                    await self._write_structured_stream(response, query, None, instruction_type)
+                elif structured:
+                    async with session.lock:
+                        session.instruction_type = instruction_type
+                        await self._write_structured_stream(response, query, session, instruction_type)
+                    self.sessions.enforce_limits()
+                elif session is None:
+                    async for chunk in self.agent.process_query_stream(query, instruction_type=instruction_type):
+                        event = f"data: {chunk}\n\n"
+                        await response.write(event.encode('utf-8'))
+                else:
+                    async with session.lock:
+                        session.instruction_type = instruction_type
+                        async for chunk in self.agent.process_query_stream(
+                            query, session=session, instruction_type=instruction_type
+                        ):
+                            event = f"data: {chunk}\n\n"
+                            await response.write(event.encode('utf-8'))
+                    self.sessions.enforce_limits()
+                
+                await response.write_eof()
+            return response
+        
+        except SchedulerBusy as e:
+            return self._busy_response(e)
+        except Exception as e:
+            logger.error(f"Error streaming query: {e}")
+            return web.json_response(
+                {'error': str(e)},
+                status=500
+            )
+    
+    async def _on_startup(self, app: web.Application) -> None:
+        """Start background workers."""
+        # Acquire Foundry tokens now rather than on the first query
+        self._warm_up = asyncio.create_task(self.agent.warm_up())
+        if self.agent.search_index and self.agent.search_index.count() == 0 and self.agent.mirror.count() > 0:
+            await asyncio.to_thread(self.agent.search_index.rebuild)
+        if self.mirror_sync:
+            self.mirror_sync.start()
+        if self.precompute:
+            self.precompute.start()
+        if self.config_reloader:
+            self.config_reloader.start()
+        if self.profiling.enabled:
+            self.loop_monitor.start()
+            if not self.profiling.token:
+                logger.warning("[DEBUG] Debug endpoints enabled without DEBUG_TOKEN; all debug requests will be refused")
+    
+    async def _on_cleanup(self, app: web.Application) -> None:
+        """Release background resources when the server shuts down."""
+        if self.config_reloader:
+            await self.config_reloader.stop()
+        await self.loop_monitor.stop()
+        self.memory.stop()
+        if self.mirror_sync:
+            await self.mirror_sync.stop()
+        if self.precompute:
+            await self.precompute.stop()
+        if self._warm_up and not self._warm_up.done():
+            self._warm_up.cancel()
+        await self.work_items.close()
+    
+    async def apply_config(self, old: AppConfig, new: AppConfig, changed: Set[str]) -> None:
+        """
+        Apply a reloaded configuration to the running server.
+        
+        Limits, weights, budgets, cache sizes and instruction settings are swapped
+        in place so queues, sessions and learned quotas survive. Settings that
+        decide which clients and workers exist (Foundry, MCP, API, and switching
+        the mirror, pre-computation, scheduler or router on or off) are logged as
+        needing a restart.
+        
+        Each section is applied independently, so one failing section doesn't
+        leave the ones after it on the old settings.
+        
+        Args:
+            old: Configuration previously in force
+            new: Validated replacement
+            changed: Names of the sections that differ
+        
+        Raises:
+            ConfigApplyError: Naming the sections that failed to apply; the reloader
+                              records them as still on the old settings
+        """
+        restart = sorted(changed & (RESTART_SECTIONS | {"agent"}))
+        failures = []
+        failed = set()
+        for section in APPLY_ORDER:
+            if section not in changed:
+                continue
+            try:
+                await self._apply_section(section, old, new, restart)
+            except Exception as e:
+                logger.error(f"[CONFIG] Failed to apply '{section}': {e}")
+                failures.append(f"{section}: {e}")
+                failed.add(section)
+        if restart:
+            logger.warning(f"[CONFIG] Changes to {', '.join(restart)} take effect after a restart")
+        if failures:
+            raise ConfigApplyError("; ".join(failures), failed)
+    
+    async def _apply_section(self, section: str, old: AppConfig, new: AppConfig, restart: list) -> None:
+        """Apply one changed configuration section, appending settings that need a restart."""
+        if section == "sessions":
+            self.sessions.reconfigure(new.sessions)
+        elif section == "scheduler":
+            if self.scheduler and new.scheduler.enabled:
+                self.scheduler.reconfigure(new.scheduler)
+            elif bool(self.scheduler) != new.scheduler.enabled:
+                restart.append("scheduler.enabled")
+        elif section == "mirror":
+            if self.mirror_sync:
+                self.mirror_sync.reconfigure(new.mirror)
+            if self.mirror_source:
+                self.mirror_source.max_staleness_seconds = new.mirror.max_staleness_seconds
+            for agent in [self.agent, *(self.precompute.agents.values() if self.precompute else [])]:
+                agent.mirror_max_staleness_seconds = new.mirror.max_staleness_seconds
+            if new.mirror.enabled != old.mirror.enabled:
+                restart.append("mirror.enabled")
+        elif section == "precompute":
+            if self.precompute and new.precompute.enabled:
+                # Agents exist only for the instruction types configured at startup
+                types = [t for t in new.precompute.instruction_types if t in self.precompute.agents]
+                self.precompute.reconfigure(new.precompute.model_copy(update={"instruction_types": types}))
+            elif bool(self.precompute) != new.precompute.enabled:
+                restart.append("precompute.enabled")
+        elif section == "prefetch":
+            if self.agent.prefetcher:
+                self.agent.prefetcher.reconfigure(new.prefetch)
+        elif section == "credentials":
+            if isinstance(self.agent.credential, CachedTokenCredential):
+                self.agent.credential.reconfigure(new.credentials)
+        elif section == "model_router":
+            if self.agent.model_router and new.model_router.deployments:
+                stale = self.agent.model_router.reconfigure(new.model_router)
+                # Precompute agents share the router but keep their own clients
+                for agent in [self.agent, *(self.precompute.agents.values() if self.precompute else [])]:
+                    agent.drop_routed_clients(stale)
+            else:
+                restart.append("model_router.deployments")
+        elif section == "instructions":
+            self.agent.reconfigure_instructions(new.instructions)
+            for agent in (self.precompute.agents.values() if self.precompute else []):
+                agent.reconfigure_instructions(new.instructions)
+        elif section == "profiling":
+            self.profiling = new.profiling
+            self.loop_monitor.reconfigure(new.profiling.lag_interval_ms / 1000, new.profiling.lag_threshold_ms)
+            self.memory.max_snapshots = new.profiling.max_snapshots
+            if new.profiling.enabled:
+                self.loop_monitor.start()
+            else:
+                await self.loop_monitor.stop()
+                self.memory.stop()
+        elif section == "logging":
+            root_logger = logging.getLogger()
+            root_logger.setLevel(new.logging.level.upper())
+            for handler in root_logger.handlers:
+                handler.setLevel(new.logging.level.upper())
+    
+    async def config_handler(self, request: web.Request) -> web.Response:
+        """
+        Configuration reload status, or trigger a reload.
+        
+        Query params:
+            reload (optional): "true" to re-read the configuration file now
+        """
+        if not self.config_reloader:
+            return web.json_response({"enabled": False})
+        status = 200
+        if request.query.get("reload", "").lower() in ("1", "true", "yes"):
+            await self.config_reloader.reload("api")
+            if self.config_reloader.last_error:
+                status = 422
+        return web.json_response({"enabled": True, **self.config_reloader.status()}, status=status)
+    
+    def _debug_denied(self, request: web.Request) -> Optional[web.Response]:
+        """Reject debug requests unless the endpoints are enabled and the token matches."""
+        if not self.profiling.enabled:
+            return web.json_response({'error': 'debug endpoints are disabled'}, status=404)
+        auth = request.headers.get('Authorization', '')
+        presented = auth[7:] if auth.startswith('Bearer ') else request.headers.get('X-Debug-Token')
+        if not token_matches(self.profiling, presented):
+            return web.json_response({'error': 'unauthorized'}, status=401)
+        return None
+    
+    async def debug_profile_handler(self, request: web.Request) -> web.Response:
+        """
+        Capture a sampling CPU profile of the live process.
+        
+        Query params:
+            seconds (optional): Capture length (default 10, capped by DEBUG_MAX_PROFILE_SECONDS)
+            interval_ms (optional): Sampling interval (default 5)
+            threads (optional): "loop" (default, the event loop thread) or "all"
+            format (optional): "json" (default: top functions plus folded stacks) or
+                               "collapsed" (folded stacks as text, for flame graph tools)
+        """
+        denied = self._debug_denied(request)
+        if denied:
+            return denied
+        try:
+            seconds = min(float(request.query.get('seconds', 10)), self.profiling.max_profile_seconds)
+            interval_ms = float(request.query.get('interval_ms', self.profiling.sample_interval_ms))
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400)
+        if seconds <= 0 or interval_ms <= 0:
+            return web.json_response({'error': 'seconds and interval_ms must be positive'}, status=400)
+        if self._profiling_lock.locked():
+            return web.json_response({'error': 'a profile is already being captured'}, status=409)
+        threads = None if request.query.get('threads') == 'all' else [threading.get_ident()]
+        async with self._profiling_lock:
+            logger.info(f"[DEBUG] Capturing CPU profile for {seconds:.1f}s every {interval_ms:g}ms")
+            report = await SamplingProfiler(interval_ms / 1000, threads).run(seconds)
+        if request.query.get('format') == 'collapsed':
+            return web.Response(text="\n".join(report['collapsed']) + "\n")
+        return web.json_response(report)
+    
+    async def debug_loop_handler(self, request: web.Request) -> web.Response:
+        """
+        Event-loop lag histogram and the stacks of calls that blocked the loop.
+        
+        Query params:
+            reset (optional): "true" to clear the histogram after reading it
+        """
+        denied = self._debug_denied(request)
+        if denied:
+            return denied
+        stats = self.loop_monitor.stats()
+        if request.query.get('reset', '').lower() in ('1', 'true', 'yes'):
+            self.loop_monitor.reset()
+        return web.json_response(stats)
+    
+    async def debug_memory_handler(self, request: web.Request) -> web.Response:
+        """tracemalloc status and the snapshots available for diffing."""
+        denied = self._debug_denied(request)
+        if denied:
+            return denied
+        return web.json_response(self.memory.status())
+    
+    async def debug_memory_snapshot_handler(self, request: web.Request) -> web.Response:
+        """
+        Take a tracemalloc snapshot (starting tracing on first use).
+        
+        Allocations are only traced from the first snapshot on, so take one,
+        let the suspect traffic run, then take another and diff them.
+        """
+        denied = self._debug_denied(request)
+        if denied:
+            return denied
+        async with self._profiling_lock:
+            snapshot = await asyncio.to_thread(self.memory.snapshot)
+        return web.json_response(snapshot, status=201)
+    
+    async def debug_memory_diff_handler(self, request: web.Request) -> web.Response:
+        """
+        Allocation sites that grew most between two snapshots.
+        
+        Query params:
+            base / target (optional): Snapshot ids (default: the last two)
+            key_type (optional): "lineno" (default), "filename" or "traceback"
+            limit (optional): Sites to return (default 25)
+        """
+        denied = self._debug_denied(request)
+        if denied:
+            return denied
+        try:
+            base = request.query.get('base')
+            target = request.query.get('target')
+            diff = await asyncio.to_thread(
+                self.memory.diff,
+                int(base) if base else None,
+                int(target) if target else None,
+                request.query.get('key_type', 'lineno'),
+                int(request.query.get('limit', 25)),
+            )
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400)
+        return web.json_response(diff)
+    
+    async def debug_memory_stop_handler(self, request: web.Request) -> web.Response:
+        """Stop tracing allocations and drop the snapshots."""
+        denied = self._debug_denied(request)
+        if denied:
+            return denied
+        self.memory.stop()
+        return web.json_response(self.memory.status())
+    
+    async def actions_list_handler(self, request: web.Request) -> web.StreamResponse:
+        """
+        List Actions directly, without the model re-serializing every row.
+        
+        Expected JSON body: ActionListQuery fields plus optional "format" and "summarize", e.g.
+        {"state": ["Active"], "sort_by": "changed_date", "page_size": 50, "format": "ndjson"}
+        
+        Args:
+            request: HTTP request with JSON body
+            - format (optional): "json" (default), "ndjson" (streamed rows) or "table" (markdown)
+            - summarize (optional): Also ask the agent for a short narrative summary of the page
+                                    (json and table formats only)
+            - cursor (optional): next_cursor from a previous page
+        """
+        try:
+            data = await request.json()
+            if not isinstance(data, dict):
+                return web.json_response({'error': 'Request body must be a JSON object'}, status=400)
+            output_format = data.pop('format', 'json')
+            summarize = bool(data.pop('summarize', False))
+            if output_format not in ('json', 'ndjson', 'table'):
+                return web.json_response({'error': 'format must be json, ndjson or table'}, status=400)
             
-            logger.info(f"Starting stream for query: {query} (instruction_type: {instruction_type})")
+            try:
+                query = ActionListQuery(**data)
+                page = await self.action_lister.list_page(query)
+            except (ValidationError, ValueError) as e:
+                return web.json_response({'error': str(e)}, status=400)
             
-            async for chunk in self.agent.process_query_stream(query):
-                event = f"data: {chunk}\n\n"
-                await response.write(event.encode('utf-8'))
+            if output_format == 'ndjson':
+                response = web.StreamResponse()
+                response.content_type = 'application/x-ndjson'
+                await response.prepare(request)
+                async for line in ActionLister.iter_ndjson(page):
+                    await response.write(line.encode('utf-8'))
+                await response.write_eof()
+                return response
             
-            await response.write_eof()
-            return response
+            table = render_table(page)
+            narrative = None
+            if summarize and page.items:
+                async with self._slot(request, INTERACTIVE):
+                    narrative = await self.agent.process_query(
+                        "Write a short narrative summary (3-5 bullet points) of the following Actions. "
+                        "Use only this data; do not call any tools.\n\n" + table,
+                        instruction_type='summary',
+                    )
+            
+            if output_format == 'table':
+                text = table if narrative is None else f"{table}\n\n{narrative}"
+                return web.Response(text=text, content_type='text/markdown')
+            
+            body = page.model_dump()
+            if narrative is not None:
+                body['summary'] = narrative
+            return web.json_response(body)
         
+        except SchedulerBusy as e:
+            return self._busy_response(e)
         except Exception as e:
-            logger.error(f"Error streaming query: {e}")
+            logger.error(f"Error listing actions: {e}")
+            return web.json_response(
+                {'error': str(e)},
+                status=500
+            )
+    
+    async def actions_search_handler(self, request: web.Request) -> web.Response:
+        """
+        Keyword and faceted search over mirrored Actions.
+        
+        Query parameters:
+            - q (optional): Free text matched against title, description and comments
+            - state, priority, assigned_to, area_path (optional, repeatable): Facet filters
+            - limit (optional): Maximum results (default 20, max 200)
+            - offset (optional): Results to skip
+        """
+        index = self.agent.search_index
+        if not index:
+            return web.json_response({'error': 'search requires the local mirror (MIRROR_ENABLED=true)'}, status=503)
+        try:
+            filters = {
+                facet: request.query.getall(facet)
+                for facet in ('state', 'priority', 'assigned_to', 'area_path')
+                if facet in request.query
+            }
+            limit = max(1, min(int(request.query.get('limit', 20)), 200))
+            offset = max(0, int(request.query.get('offset', 0)))
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400)
+        
+        try:
+            results = await asyncio.to_thread(index.search, request.query.get('q'), filters, limit, offset)
+            return web.json_response(results)
+        except Exception as e:
+            logger.error(f"Error searching actions: {e}")
             return web.json_response(
                 {'error': str(e)},
                 status=500
             )
     
+    def _get_session(self, session_id: Optional[str]) -> Optional[Session]:
+        """
+        Resolve the session_id from a request body.
+        
+        Args:
+            session_id: None for a stateless query, "new" for a fresh session,
+                        or the id of a session to continue (created if unknown/expired)
+        """
+        if not session_id:
+            return None
+        return self.sessions.get_or_create(None if session_id == 'new' else str(session_id))
+    
+    async def sessions_handler(self, request: web.Request) -> web.Response:
+        """Get session store statistics."""
+        return web.json_response(self.sessions.stats())
+    
+    async def session_handler(self, request: web.Request) -> web.Response:
+        """Get a summary of one conversation session."""
+        session = self.sessions.get(request.match_info['session_id'])
+        if session is None:
+            return web.json_response({'error': 'session not found'}, status=404)
+        return web.json_response(session.to_dict())
+    
+    async def session_delete_handler(self, request: web.Request) -> web.Response:
+        """End a conversation session and free its cached context."""
+        if not self.sessions.delete(request.match_info['session_id']):
+            return web.json_response({'error': 'session not found'}, status=404)
+        return web.json_response({'deleted': request.match_info['session_id']})
+    
+    async def mirror_handler(self, request: web.Request) -> web.Response:
+        """Get local work item mirror status."""
+        mirror = self.agent.mirror
+        if not mirror:
+            return web.json_response({'enabled': False})
+        age = mirror.age_seconds()
+        return web.json_response({
+            'enabled': True,
+            'work_items': mirror.count(),
+            'watermark': mirror.watermark,
+            'age_seconds': round(age, 1) if age is not None else None,
+        })
+    
+    async def precompute_handler(self, request: web.Request) -> web.Response:
+        """Get background pre-computation status."""
+        if not self.precompute:
+            return web.json_response({'enabled': False})
+        return web.json_response({'enabled': True, **self.precompute.stats()})
+    
+    async def scheduler_handler(self, request: web.Request) -> web.Response:
+        """Get scheduler slots, queue depth and wait times per priority class."""
+        if not self.scheduler:
+            return web.json_response({'enabled': False})
+        return web.json_response({'enabled': True, **self.scheduler.stats()})
+    
+    async def workitem_webhook_handler(self, request: web.Request) -> web.Response:
+        """
+        Receive work item change notifications and queue them for pre-computation.
+        
+        Accepts Azure DevOps service hook payloads ("workitem.created" / "workitem.updated")
+        or a minimal {"id": 123, "rev": 4} body for local simulation. When WEBHOOK_SECRET
+        is set, the X-Webhook-Secret header must match it.
+        """
+        secret = os.getenv("WEBHOOK_SECRET")
+        presented = request.headers.get('X-Webhook-Secret', '')
+        # Compare bytes: compare_digest raises TypeError for non-ASCII str
+        if secret and not hmac.compare_digest(presented.encode('utf-8'), secret.encode('utf-8')):
+            return web.json_response({'error': 'unauthorized'}, status=401)
+        if not self.precompute:
+            return web.json_response({'error': 'precompute is not enabled'}, status=503)
+        try:
+            data = await request.json()
+            resource = data.get('resource') or data
+            work_item_id = resource.get('workItemId') or resource.get('id')
+            rev = resource.get('rev')
+            if work_item_id is None:
+                return web.json_response({'error': 'work item id is required'}, status=400)
+            queued = self.precompute.enqueue(int(work_item_id), int(rev) if rev is not None else None)
+            return web.json_response({'id': int(work_item_id), 'queued': queued}, status=202)
+        except (ValueError, TypeError, AttributeError) as e:
+            return web.json_response({'error': str(e)}, status=400)
+    
     async def health_handler(self, request: web.Request) -> web.Response:
         """Health check endpoint."""
         return web.json_response({'status': 'healthy'})
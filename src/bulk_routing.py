@@ -0,0 +1,296 @@
+"""
+Offline bulk routing of exported Actions.
+
+Streams a JSONL/CSV export through the deterministic stages in src.routing_rules
+on a process pool, optionally asks the routing agent about low-confidence
+decisions with bounded concurrency, and appends results to a JSONL file as
+they complete. The output file doubles as the checkpoint: re-running with the
+same output skips Actions that already have a result.
+"""
+
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Set
+
+from src.routing_rules import CONFIDENCE_LOW, CONFIDENCE_MEDIUM, FIELD_ALIASES, route_batch
+
+logger = logging.getLogger(__name__)
+
+# Called with (exported record, rules decision); returns a replacement decision or None
+Fallback = Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+JSON_MARKER = "MACHINE READABLE JSON"
+
+
+def iter_export(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream records from an export file.
+
+    Args:
+        path: .jsonl/.ndjson (one object per line), .json (array) or .csv (header row)
+
+    Yields:
+        One dict per exported Action
+    """
+    suffix = Path(path).suffix.lower()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if suffix == ".csv":
+            yield from csv.DictReader(f)
+        elif suffix == ".json":
+            data = json.load(f)
+            yield from (data.get("value", []) if isinstance(data, dict) else data)
+        else:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.warning(f"[BULK] Skipping malformed line {line_number}: {e}")
+
+
+def record_id(raw: Dict[str, Any]) -> Optional[str]:
+    """Work item id of an exported record as a string, or None when absent."""
+    for source in (raw, raw.get("fields") or {}):
+        for alias in FIELD_ALIASES["id"]:
+            value = source.get(alias)
+            if value not in (None, ""):
+                return str(value).strip()
+    return None
+
+
+def load_checkpoint(output_path: str) -> Set[str]:
+    """
+    Ids already routed in a previous run's output.
+
+    A partially written final line (interrupted run) is ignored, so that Action
+    is routed again.
+    """
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            # Drop the interrupted line so appended results start on a fresh line
+            f.truncate(data.rfind(b"\n") + 1)
+            data = data[:data.rfind(b"\n") + 1]
+    for line in data.decode("utf-8").splitlines():
+        try:
+            result = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if result.get("id") is not None:
+            done.add(str(result["id"]))
+    return done
+
+
+def extract_routing_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Pull the machine-readable JSON block out of a routing agent response.
+
+    Returns:
+        Parsed decision, or None when the response has no parseable JSON object
+    """
+    start_search = text.find(JSON_MARKER)
+    start = text.find("{", start_search if start_search >= 0 else 0)
+    end = text.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        return json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+
+
+def agent_fallback(agent: Any) -> Fallback:
+    """
+    Build a fallback that asks a routing agent to decide from the exported data.
+
+    Args:
+        agent: TechRobAgent using the "routing" instruction type
+
+    Returns:
+        Fallback returning the agent's machine-readable decision
+    """
+    async def fallback(raw: Dict[str, Any], decision: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        query = (
+            "Route the following exported Action. All Action data is included below, "
+            "so do not fetch it again.\n\n"
+            f"{json.dumps(raw, default=str, indent=2)}\n\n"
+            f"Deterministic pre-check (rule {decision['reasoning']['matched_rule']}, "
+            f"confidence {decision['reasoning']['confidence']}): {decision['decision']}"
+        )
+        return extract_routing_json(await agent.process_query(query))
+
+    return fallback
+
+
+class BulkRouter:
+    """
+    Route an export file with process-pool parallelism and incremental output.
+
+    Results are written in completion order, not input order.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        batch_size: int = 200,
+        fallback: Optional[Fallback] = None,
+        fallback_concurrency: int = 4,
+        fallback_confidence: tuple = (CONFIDENCE_LOW, CONFIDENCE_MEDIUM),
+    ):
+        """
+        Configure the router.
+
+        Args:
+            workers: Process pool size (default: CPU count). 0 routes in-process.
+            batch_size: Records per process pool task
+            fallback: Optional async model fallback for low-confidence decisions
+            fallback_concurrency: Maximum concurrent fallback calls
+            fallback_confidence: Rule confidences that trigger the fallback
+        """
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.batch_size = max(1, batch_size)
+        self.fallback = fallback
+        self.fallback_concurrency = max(1, fallback_concurrency)
+        self.fallback_confidence = set(fallback_confidence)
+
+    async def run(
+        self,
+        input_path: str,
+        output_path: str,
+        resume: bool = True,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Route every record in `input_path`, appending results to `output_path`.
+
+        Args:
+            input_path: Export file (see iter_export)
+            output_path: JSONL results file; also the resume checkpoint
+            resume: Skip ids already present in `output_path` (False truncates it)
+            limit: Route at most this many new records
+
+        Returns:
+            Run statistics: counts, tag distribution and elapsed seconds
+        """
+        started = time.monotonic()
+        done = load_checkpoint(output_path) if resume else set()
+        stats: Counter = Counter()
+        tags: Counter = Counter()
+        loop = asyncio.get_running_loop()
+        fallback_slots = asyncio.Semaphore(self.fallback_concurrency)
+        fallback_tasks: Set[asyncio.Task] = set()
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+
+        def pending_records() -> Iterator[Dict[str, Any]]:
+            seen = 0
+            for raw in iter_export(input_path):
+                work_item_id = record_id(raw)
+                if work_item_id is not None and work_item_id in done:
+                    stats["skipped"] += 1
+                    continue
+                if limit is not None and seen >= limit:
+                    return
+                seen += 1
+                yield raw
+
+        with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+            def write(result: Dict[str, Any]) -> None:
+                out.write(json.dumps(result, default=str) + "\n")
+                stats["routed"] += 1
+                if result.get("error"):
+                    stats["errors"] += 1
+                tags[(result.get("decision") or {}).get("tag") or (result.get("decision") or {}).get("type")] += 1
+
+            async def run_fallback(raw: Dict[str, Any], decision: Dict[str, Any]) -> None:
+                try:
+                    replacement = await self.fallback(raw, decision)
+                except Exception as e:
+                    logger.warning(f"[BULK] Model fallback failed for {decision.get('id')}: {e}")
+                    replacement = None
+                    stats["fallback_errors"] += 1
+                finally:
+                    fallback_slots.release()
+                if replacement:
+                    stats["model_routed"] += 1
+                    write({
+                        **replacement,
+                        "id": decision.get("id"),
+                        "source": "model",
+                        "rules": {"decision": decision.get("decision"), "reasoning": decision.get("reasoning")},
+                    })
+                else:
+                    write(decision)
+
+            async def handle(batch: list, results: list) -> None:
+                for raw, decision in zip(batch, results):
+                    confidence = (decision.get("reasoning") or {}).get("confidence", CONFIDENCE_LOW)
+                    if self.fallback and decision.get("needs_model") and confidence in self.fallback_confidence:
+                        # Acquiring before spawning bounds the number of queued fallbacks too
+                        await fallback_slots.acquire()
+                        task = asyncio.create_task(run_fallback(raw, decision))
+                        fallback_tasks.add(task)
+                        task.add_done_callback(fallback_tasks.discard)
+                    else:
+                        write(decision)
+                out.flush()
+
+            records = pending_records()
+            if self.workers == 0:
+                while batch := list(islice(records, self.batch_size)):
+                    await handle(batch, route_batch(batch))
+            else:
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    await self._run_pool(pool, loop, records, handle)
+
+            if fallback_tasks:
+                await asyncio.gather(*fallback_tasks)
+            out.flush()
+
+        elapsed = time.monotonic() - started
+        summary = {
+            "routed": stats["routed"],
+            "skipped": stats["skipped"],
+            "model_routed": stats["model_routed"],
+            "errors": stats["errors"],
+            "fallback_errors": stats["fallback_errors"],
+            "tags": dict(tags.most_common()),
+            "elapsed_seconds": round(elapsed, 2),
+            "records_per_second": round(stats["routed"] / elapsed, 1) if elapsed else None,
+        }
+        logger.info(f"[BULK] Routed {summary['routed']} Action(s), skipped {summary['skipped']} in {summary['elapsed_seconds']}s")
+        return summary
+
+    async def _run_pool(
+        self,
+        pool: Executor,
+        loop: asyncio.AbstractEventLoop,
+        records: Iterator[Dict[str, Any]],
+        handle: Callable[[list, list], Awaitable[None]],
+    ) -> None:
+        """Keep up to two batches per worker in flight so the export is never fully in memory."""
+        in_flight: Dict[asyncio.Future, list] = {}
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < self.workers * 2:
+                batch = list(islice(records, self.batch_size))
+                if not batch:
+                    exhausted = True
+                    break
+                in_flight[loop.run_in_executor(pool, route_batch, batch)] = batch
+            if not in_flight:
+                break
+            finished, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for future in finished:
+                await handle(in_flight.pop(future), future.result())
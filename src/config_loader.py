@@ -0,0 +1,393 @@
+"""
+Unified configuration: config/agent_config.yaml validated into AppConfig, with hot reload.
+
+Every section starts from the settings the environment variables describe
+(the same *_config_from_env builders used when there is no file), and keys
+present in the YAML override them. Strings may reference environment
+variables as ${VAR} or ${VAR:-default}; a value that is only a reference to
+an unset variable (with no default) is treated as absent, so the environment
+or model default applies.
+
+ConfigReloader re-reads the file when it changes (polled mtime) or on SIGHUP,
+validates the whole file before applying anything, and hands listeners the
+old config, the new one and the names of the sections that changed. An
+invalid file is logged and ignored; the running config stays in force.
+
+Usage:
+    python -m src.config_loader [config/agent_config.yaml]   # validate and print
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+import re
+import signal
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Set, Union
+
+import yaml
+from pydantic import AliasChoices, ValidationError
+
+from src.action_mirror import mirror_config_from_env
+from src.credentials import credential_config_from_env
+from src.instruction_compiler import instruction_config_from_env
+from src.model_router import model_router_config_from_env
+from src.models.config import AgentConfig, AppConfig, APIConfig, FoundryConfig, LoggingConfig, MCPConfig
+from src.precompute import precompute_config_from_env
+from src.prefetch import prefetch_config_from_env
+from src.profiling import profiling_config_from_env
+from src.scheduler import scheduler_config_from_env
+from src.session_store import session_config_from_env
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_PATH = Path(__file__).parent.parent / "config" / "agent_config.yaml"
+ENV_REFERENCE = re.compile(r"\$\{(\w+)(?::-([^}]*))?\}")
+
+# Sections whose settings need a restart to change (clients, servers and sockets are built from them)
+RESTART_SECTIONS = {"foundry", "mcp", "api"}
+
+ConfigListener = Callable[[AppConfig, AppConfig, Set[str]], Union[None, Awaitable[None]]]
+
+
+class ConfigError(ValueError):
+    """The configuration file could not be read or failed validation."""
+
+
+class ConfigApplyError(ConfigError):
+    """Some sections of a valid configuration could not be applied to the running server."""
+
+    def __init__(self, message: str, failed: Set[str]):
+        super().__init__(message)
+        self.failed = set(failed)
+
+
+class _Unset:
+    """Marks a value that referenced an unset environment variable."""
+
+
+_UNSET = _Unset()
+
+
+def interpolate(value: Any, env: Optional[Mapping[str, str]] = None) -> Any:
+    """
+    Replace ${VAR} and ${VAR:-default} references in all strings of a parsed YAML value.
+
+    Keys whose whole value is a reference to an unset variable without a
+    default are dropped from mappings (and become "" in lists).
+    """
+    env = os.environ if env is None else env
+    if isinstance(value, dict):
+        resolved = {key: interpolate(item, env) for key, item in value.items()}
+        return {key: item for key, item in resolved.items() if item is not _UNSET}
+    if isinstance(value, list):
+        return ["" if item is _UNSET else item for item in (interpolate(v, env) for v in value)]
+    if not isinstance(value, str):
+        return value
+    whole = ENV_REFERENCE.fullmatch(value.strip())
+    if whole and whole.group(2) is None and whole.group(1) not in env:
+        return _UNSET
+    return ENV_REFERENCE.sub(lambda m: env.get(m.group(1), m.group(2) or ""), value)
+
+
+def _overlay(base: Any, overrides: Optional[Mapping[str, Any]], section: str) -> Any:
+    """Validate a section: the environment-derived settings with the YAML keys applied on top."""
+    if overrides is None:
+        return base
+    if not isinstance(overrides, Mapping):
+        raise ConfigError(f"Section '{section}' must be a mapping")
+    model = type(base)
+    overrides = dict(overrides)
+    # Accept alias spellings (e.g. mcp "type"/"command") without the base's field names shadowing them
+    for name, field in model.model_fields.items():
+        alias = field.validation_alias
+        for choice in alias.choices if isinstance(alias, AliasChoices) else []:
+            if choice != name and choice in overrides:
+                overrides[name] = overrides.pop(choice)
+    return model.model_validate({**base.model_dump(), **overrides})
+
+
+def _env_agent_sections() -> Dict[str, Any]:
+    """Foundry, MCP and API settings as the environment describes them."""
+    return {
+        "foundry": FoundryConfig(
+            project_name=os.getenv("FOUNDRY_PROJECT_NAME", ""),
+            resource_group=os.getenv("FOUNDRY_RESOURCE_GROUP", ""),
+            subscription_id=os.getenv("FOUNDRY_SUBSCRIPTION_ID", ""),
+            project_endpoint=os.getenv("FOUNDRY_PROJECT_ENDPOINT"),
+            model_name=os.getenv("MODEL_NAME", "gpt-4o"),
+            model_deployment=os.getenv("MODEL_DEPLOYMENT", "gpt-4o"),
+        ),
+        "mcp": MCPConfig(
+            organization_name=os.getenv("ADO_ORG_NAME", "UnifiedActionTracker"),
+            project_name=os.getenv("ADO_PROJECT_NAME", "Unified Action Tracker"),
+        ),
+        "api": APIConfig(
+            port=int(os.getenv("API_PORT", 8000)),
+            host=os.getenv("API_HOST", "0.0.0.0"),
+        ),
+    }
+
+
+# Subsystem sections and the environment builders they start from
+_ENV_SECTIONS: Dict[str, Callable[[], Any]] = {
+    "model_router": model_router_config_from_env,
+    "sessions": session_config_from_env,
+    "mirror": mirror_config_from_env,
+    "precompute": precompute_config_from_env,
+    "scheduler": scheduler_config_from_env,
+    "prefetch": prefetch_config_from_env,
+    "credentials": credential_config_from_env,
+    "instructions": instruction_config_from_env,
+    "profiling": profiling_config_from_env,
+    "logging": lambda: LoggingConfig(level=os.getenv("LOG_LEVEL", "INFO")),
+}
+
+
+def build_config(raw: Optional[Mapping[str, Any]] = None, env: Optional[Mapping[str, str]] = None) -> AppConfig:
+    """
+    Validate a parsed configuration document.
+
+    Args:
+        raw: Parsed YAML (top-level sections: agent, foundry, mcp, api, model_router,
+             sessions, mirror, precompute, scheduler, prefetch, credentials,
+             instructions, profiling, logging). None or {} gives the environment-only config.
+        env: Variables for ${VAR} interpolation. Defaults to os.environ.
+
+    Raises:
+        ConfigError: On unknown sections or validation errors
+    """
+    data = interpolate(dict(raw or {}), env)
+    known = {"agent", *RESTART_SECTIONS, *_ENV_SECTIONS}
+    unknown = sorted(set(data) - known)
+    if unknown:
+        raise ConfigError(f"Unknown configuration section(s): {', '.join(unknown)}")
+    agent = data.get("agent") or {}
+    if not isinstance(agent, Mapping):
+        raise ConfigError("Section 'agent' must be a mapping")
+    agent = dict(agent)
+    # foundry, mcp and api may also be nested under agent, the shape AgentConfig declares
+    for name in RESTART_SECTIONS:
+        if name in agent:
+            if name in data:
+                raise ConfigError(f"Section '{name}' is set both at the top level and under 'agent'")
+            data[name] = agent.pop(name)
+    try:
+        agent_sections = {
+            name: _overlay(base, data.get(name), name) for name, base in _env_agent_sections().items()
+        }
+        sections = {name: _overlay(builder(), data.get(name), name) for name, builder in _ENV_SECTIONS.items()}
+        return AppConfig(agent=AgentConfig.model_validate({**agent, **agent_sections}), **sections)
+    except ValidationError as e:
+        raise ConfigError(f"Invalid configuration: {e}") from e
+
+
+def config_path_from_env() -> Path:
+    """Configuration file path: AGENT_CONFIG_PATH, else config/agent_config.yaml."""
+    return Path(os.getenv("AGENT_CONFIG_PATH") or DEFAULT_CONFIG_PATH)
+
+
+def load_config(path: Optional[Union[str, Path]] = None) -> AppConfig:
+    """
+    Read, interpolate and validate the configuration file.
+
+    Args:
+        path: YAML file. Defaults to config_path_from_env(). A missing file gives
+              the environment-only configuration.
+
+    Raises:
+        ConfigError: If the file can't be parsed or fails validation
+    """
+    path = Path(path) if path else config_path_from_env()
+    if not path.exists():
+        logger.info(f"[CONFIG] {path} not found, using environment variables only")
+        return build_config({})
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError) as e:
+        raise ConfigError(f"Could not read {path}: {e}") from e
+    if not isinstance(raw, dict):
+        raise ConfigError(f"{path} must contain a mapping of sections")
+    return build_config(raw)
+
+
+def changed_sections(old: AppConfig, new: AppConfig) -> Set[str]:
+    """Names of the sections that differ ("agent" covers name/description/system_prompt)."""
+    changed = {
+        name for name in AppConfig.model_fields
+        if name != "agent" and getattr(old, name) != getattr(new, name)
+    }
+    for name in RESTART_SECTIONS:
+        if getattr(old.agent, name) != getattr(new.agent, name):
+            changed.add(name)
+    if old.agent.model_dump(exclude=RESTART_SECTIONS) != new.agent.model_dump(exclude=RESTART_SECTIONS):
+        changed.add("agent")
+    return changed
+
+
+def merge_sections(new: AppConfig, old: AppConfig, keep_old: Set[str]) -> AppConfig:
+    """
+    The new config with the named sections (as changed_sections names them) taken from the old one.
+
+    Describes what is actually live after some sections failed to apply.
+    """
+    update = {name: getattr(old, name) for name in keep_old if name in AppConfig.model_fields and name != "agent"}
+    base, other = (old.agent, new.agent) if "agent" in keep_old else (new.agent, old.agent)
+    restart = RESTART_SECTIONS & keep_old if "agent" not in keep_old else RESTART_SECTIONS - keep_old
+    agent = base.model_copy(update={name: getattr(other, name) for name in restart})
+    return new.model_copy(update={**update, "agent": agent})
+
+
+class ConfigReloader:
+    """Watches the configuration file and notifies listeners of validated changes."""
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        config: Optional[AppConfig] = None,
+        poll_interval_seconds: float = 5.0,
+    ):
+        """
+        Initialize the reloader.
+
+        Args:
+            path: YAML file to watch. Defaults to config_path_from_env().
+            config: Currently applied config. Loaded from the file when omitted.
+            poll_interval_seconds: How often to check the file's modification time (0 = SIGHUP only)
+        """
+        self.path = Path(path) if path else config_path_from_env()
+        self.config = config or load_config(self.path)
+        self.poll_interval_seconds = poll_interval_seconds
+        self._listeners: List[ConfigListener] = []
+        self._mtime = self._current_mtime()
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._sighup = False
+        self.reloads = 0
+        self.loaded_at = time.time()
+        self.last_error: Optional[str] = None
+        self.last_changed: List[str] = []
+
+    def _current_mtime(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def add_listener(self, listener: ConfigListener) -> None:
+        """Register a callback (sync or async) receiving (old, new, changed_sections)."""
+        self._listeners.append(listener)
+
+    async def reload(self, reason: str = "manual") -> Set[str]:
+        """
+        Re-read the file and apply it if valid.
+
+        If a listener fails, the failure is reported in `last_error` and the
+        sections it couldn't apply keep their previous settings in `config`
+        (all changed sections, unless it raised ConfigApplyError naming them).
+        `config` thus describes what is actually live: the next reload retries
+        the failed sections, and reverting the file rolls back the applied ones.
+
+        Returns:
+            Names of the sections that changed and were applied (empty if none
+            changed, the file is invalid or nothing could be applied)
+        """
+        async with self._lock:
+            self._mtime = self._current_mtime()
+            try:
+                new = await asyncio.to_thread(load_config, self.path)
+            except Exception as e:  # Anything unexpected must not kill the watch task either
+                self.last_error = str(e)
+                logger.error(f"[CONFIG] Reload ({reason}) rejected, keeping current config: {e}")
+                return set()
+            old = self.config
+            changed = changed_sections(old, new)
+            self.last_error = None
+            if not changed:
+                logger.info(f"[CONFIG] Reload ({reason}): no changes")
+                return changed
+            logger.info(f"[CONFIG] Reload ({reason}): changed {', '.join(sorted(changed))}")
+            failures = []
+            failed: Set[str] = set()
+            for listener in self._listeners:
+                try:
+                    result = listener(old, new, changed)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    name = getattr(listener, '__name__', listener)
+                    logger.error(f"[CONFIG] Applying reloaded config failed in {name}: {e}")
+                    failures.append(f"{name}: {e}")
+                    failed |= (e.failed & changed) if isinstance(e, ConfigApplyError) else changed
+            applied = changed - failed
+            if failures:
+                self.last_error = "Applying config failed (will retry on next reload): " + "; ".join(failures)
+            if not applied:
+                return set()
+            self.config = merge_sections(new, old, failed) if failed else new
+            self.reloads += 1
+            self.loaded_at = time.time()
+            self.last_changed = sorted(applied)
+            return applied
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval_seconds)
+            if self._current_mtime() != self._mtime:
+                await self.reload("file changed")
+
+    def start(self) -> None:
+        """Start polling the file and, where the platform has it, handle SIGHUP."""
+        loop = asyncio.get_running_loop()
+        if hasattr(signal, "SIGHUP") and not self._sighup:
+            try:
+                loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(self.reload("SIGHUP")))
+                self._sighup = True
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass  # Not the main thread, or no signal support in this loop
+        if self.poll_interval_seconds > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._watch())
+        logger.info(f"[CONFIG] Watching {self.path} (poll every {self.poll_interval_seconds}s, SIGHUP={self._sighup})")
+
+    async def stop(self) -> None:
+        """Stop watching."""
+        if self._sighup:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+            self._sighup = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        """Reload status for diagnostics."""
+        return {
+            "path": str(self.path),
+            "exists": self.path.exists(),
+            "reloads": self.reloads,
+            "loaded_at": self.loaded_at,
+            "last_changed": self.last_changed,
+            "last_error": self.last_error,
+        }
+
+
+def main() -> None:
+    """Validate a configuration file and print the resolved settings."""
+    try:
+        config = load_config(sys.argv[1] if len(sys.argv) > 1 else None)
+    except ConfigError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(config.model_dump(), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""
+Shared Azure credential with an access token cache and background refresh.
+
+DefaultAzureCredential walks its chain (environment, managed identity, Azure
+CLI, ...) on the first token request, which can take seconds, and each agent
+used to build its own. CachedTokenCredential wraps one credential for the
+whole process:
+
+- tokens are cached per scope and handed out until shortly before expiry;
+- concurrent requests for the same scope share a single acquisition;
+- a background task refreshes each token before it expires, so requests
+  never wait on the identity endpoint after the first one;
+- optionally, tokens are kept in a file shared by the worker processes on a
+  host (and across restarts). A lock file ensures one process acquires a
+  token while the others wait and then read it.
+
+The shared file holds bearer tokens: keep it on a local disk readable only by
+the service account. It is created with owner-only permissions.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from azure.core.credentials import AccessToken
+
+from src.models.config import CredentialConfig
+
+try:  # azure-core >= 1.31
+    from azure.core.credentials import AccessTokenInfo
+except ImportError:  # pragma: no cover
+    AccessTokenInfo = None
+
+logger = logging.getLogger(__name__)
+
+# Tokens with less than this left are never handed out
+MIN_VALIDITY_SECONDS = 60
+
+_TokenKey = Tuple[Tuple[str, ...], str, bool]
+
+
+@dataclass
+class CachedToken:
+    """An access token and when to refresh it."""
+
+    token: str
+    expires_on: int
+    refresh_on: Optional[int] = None
+
+    def valid(self, now: Optional[float] = None) -> bool:
+        return self.expires_on - (now or time.time()) > MIN_VALIDITY_SECONDS
+
+    def refresh_at(self, margin: float) -> float:
+        """Epoch seconds at which a background refresh should run."""
+        due = self.expires_on - margin
+        return min(due, self.refresh_on) if self.refresh_on else due
+
+
+def _file_key(key: _TokenKey) -> str:
+    scopes, tenant_id, enable_cae = key
+    return f"{' '.join(scopes)}|{tenant_id}|{int(enable_cae)}"
+
+
+class TokenFileCache:
+    """Access tokens in a JSON file shared by processes on one host."""
+
+    def __init__(self, path: str, lock_timeout: float = 30.0):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Cache file; a "<path>.lock" file is used for cross-process locking
+            lock_timeout: Age after which a lock left by a crashed process is broken
+        """
+        self.path = Path(path)
+        self.lock_path = Path(f"{path}.lock")
+        self.lock_timeout = lock_timeout
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def read(self, key: str) -> Optional[CachedToken]:
+        """Cached token for a key, if present and still valid."""
+        entry = self._load().get(key)
+        if not isinstance(entry, dict):
+            return None
+        try:
+            token = CachedToken(entry["token"], int(entry["expires_on"]), entry.get("refresh_on"))
+        except (KeyError, TypeError, ValueError):
+            return None
+        return token if token.valid() else None
+
+    def write(self, key: str, token: CachedToken) -> None:
+        """Store a token, dropping expired entries. Written atomically with owner-only permissions."""
+        now = time.time()
+        data = {k: v for k, v in self._load().items() if isinstance(v, dict) and v.get("expires_on", 0) > now}
+        data[key] = {"token": token.token, "expires_on": token.expires_on, "refresh_on": token.refresh_on}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def _try_lock(self) -> bool:
+        try:
+            fd = os.open(self.lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            try:
+                if time.time() - self.lock_path.stat().st_mtime > self.lock_timeout:
+                    logger.warning(f"[CREDENTIAL] Breaking stale token cache lock {self.lock_path}")
+                    self.lock_path.unlink()
+            except OSError:
+                pass
+            return False
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        return True
+
+    @asynccontextmanager
+    async def lock(self) -> AsyncIterator[None]:
+        """Hold the cross-process lock (polling; the event loop stays free while waiting)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        while not await asyncio.to_thread(self._try_lock):
+            await asyncio.sleep(0.05)
+        try:
+            yield
+        finally:
+            try:
+                self.lock_path.unlink()
+            except OSError:
+                pass
+
+
+class CachedTokenCredential:
+    """
+    Async token credential that caches and proactively refreshes access tokens.
+
+    Drop-in for azure.identity.aio credentials: implements get_token (and
+    get_token_info on azure-core versions that have it) and close.
+    """
+
+    def __init__(
+        self,
+        credential_factory: Optional[Callable[[], Any]] = None,
+        config: Optional[CredentialConfig] = None,
+    ):
+        """
+        Initialize the credential.
+
+        Args:
+            credential_factory: Builds the wrapped credential on first use.
+                                Defaults to azure.identity.aio.DefaultAzureCredential.
+            config: Refresh margin, warm-up scopes and the optional shared cache file
+        """
+        self.config = config or CredentialConfig()
+        self._factory = credential_factory or _default_credential
+        self._inner: Any = None
+        self.file_cache = TokenFileCache(self.config.shared_cache_path) if self.config.shared_cache_path else None
+        self._tokens: Dict[_TokenKey, CachedToken] = {}
+        self._locks: Dict[_TokenKey, asyncio.Lock] = {}
+        self._refresh_tasks: Dict[_TokenKey, asyncio.Task] = {}
+        self.hits = 0
+        self.acquisitions = 0
+        self.shared_hits = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    def reconfigure(self, config: CredentialConfig) -> None:
+        """Apply a new refresh margin, warm-up scopes or shared cache file; cached tokens are kept."""
+        if config.shared_cache_path != self.config.shared_cache_path:
+            self.file_cache = TokenFileCache(config.shared_cache_path) if config.shared_cache_path else None
+        self.config = config
+        # Refresh loops pick up the new margin after their current sleep; restart them to apply it now
+        for key, task in list(self._refresh_tasks.items()):
+            task.cancel()
+            self._refresh_tasks[key] = asyncio.create_task(self._refresh_loop(key))
+
+    @property
+    def inner(self) -> Any:
+        if self._inner is None:
+            self._inner = self._factory()
+        return self._inner
+
+    # -- credential protocol --------------------------------------------------
+
+    async def get_token(
+        self,
+        *scopes: str,
+        claims: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        enable_cae: bool = False,
+        **kwargs: Any,
+    ) -> AccessToken:
+        """Access token for the scopes, from the cache when one is valid."""
+        if claims:
+            # A claims challenge needs a fresh token that satisfies it; never serve it from the cache
+            return await self.inner.get_token(*scopes, claims=claims, tenant_id=tenant_id, enable_cae=enable_cae, **kwargs)
+        token = await self._token((tuple(scopes), tenant_id or "", enable_cae))
+        return AccessToken(token.token, token.expires_on)
+
+    if AccessTokenInfo is not None:
+
+        async def get_token_info(self, *scopes: str, options: Optional[Dict[str, Any]] = None) -> "AccessTokenInfo":
+            """Access token with refresh hint, from the cache when one is valid."""
+            options = dict(options or {})
+            if options.get("claims"):
+                return await self.inner.get_token_info(*scopes, options=options)
+            key = (tuple(scopes), options.get("tenant_id") or "", bool(options.get("enable_cae", False)))
+            token = await self._token(key)
+            return AccessTokenInfo(token.token, token.expires_on, refresh_on=token.refresh_on)
+
+    async def close(self) -> None:
+        """Stop background refreshes and close the wrapped credential."""
+        for task in self._refresh_tasks.values():
+            task.cancel()
+        self._refresh_tasks.clear()
+        if self._inner is not None and hasattr(self._inner, "close"):
+            await self._inner.close()
+        self._inner = None
+
+    async def __aenter__(self) -> "CachedTokenCredential":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    # -- cache ----------------------------------------------------------------
+
+    async def _token(self, key: _TokenKey) -> CachedToken:
+        cached = self._tokens.get(key)
+        if cached is not None and cached.valid():
+            self.hits += 1
+            return cached
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Another task may have acquired it while we waited
+            cached = self._tokens.get(key)
+            if cached is not None and cached.valid():
+                self.hits += 1
+                return cached
+            token = await self._acquire(key)
+            self._store(key, token)
+            return token
+
+    async def _acquire(self, key: _TokenKey, refresh: bool = False) -> CachedToken:
+        """Token from the shared file if another process has a good one, else from the wrapped credential."""
+        if self.file_cache is None:
+            return await self._fetch(key)
+        file_key = _file_key(key)
+
+        def _usable(token: Optional[CachedToken]) -> bool:
+            # A refresh only accepts a shared token that isn't itself due for refresh
+            return token is not None and (not refresh or token.refresh_at(self.config.refresh_margin_seconds) > time.time())
+
+        shared = await asyncio.to_thread(self.file_cache.read, file_key)
+        if _usable(shared):
+            self.shared_hits += 1
+            return shared
+        async with self.file_cache.lock():
+            shared = await asyncio.to_thread(self.file_cache.read, file_key)
+            if _usable(shared):
+                self.shared_hits += 1
+                return shared
+            token = await self._fetch(key)
+            await asyncio.to_thread(self.file_cache.write, file_key, token)
+            return token
+
+    async def _fetch(self, key: _TokenKey) -> CachedToken:
+        scopes, tenant_id, enable_cae = key
+        started = time.monotonic()
+        inner = self.inner
+        if AccessTokenInfo is not None and hasattr(inner, "get_token_info"):
+            options: Dict[str, Any] = {"enable_cae": enable_cae}
+            if tenant_id:
+                options["tenant_id"] = tenant_id
+            info = await inner.get_token_info(*scopes, options=options)
+            token = CachedToken(info.token, int(info.expires_on), getattr(info, "refresh_on", None))
+        else:
+            kwargs: Dict[str, Any] = {"tenant_id": tenant_id} if tenant_id else {}
+            if enable_cae:
+                kwargs["enable_cae"] = True
+            access = await inner.get_token(*scopes, **kwargs)
+            token = CachedToken(access.token, int(access.expires_on))
+        self.acquisitions += 1
+        logger.info(f"[CREDENTIAL] Acquired token for {' '.join(scopes)} in {time.monotonic() - started:.2f}s "
+                    f"(expires in {token.expires_on - time.time():.0f}s)")
+        return token
+
+    def _store(self, key: _TokenKey, token: CachedToken) -> None:
+        self._tokens[key] = token
+        task = self._refresh_tasks.get(key)
+        if task is None or task.done():
+            self._refresh_tasks[key] = asyncio.create_task(self._refresh_loop(key))
+
+    async def _refresh_loop(self, key: _TokenKey) -> None:
+        """Keep the token for a key fresh for the life of the credential."""
+        retry_delay = 5.0
+        while True:
+            token = self._tokens[key]
+            delay = token.refresh_at(self.config.refresh_margin_seconds) - time.time()
+            await asyncio.sleep(max(delay, 0.0))
+            try:
+                async with self._locks.setdefault(key, asyncio.Lock()):
+                    fresh = await self._acquire(key, refresh=True)
+                self._tokens[key] = fresh
+                self.refreshes += 1
+                retry_delay = 5.0
+                if fresh.refresh_at(self.config.refresh_margin_seconds) <= time.time():
+                    # The identity endpoint handed back a token already inside the margin
+                    await asyncio.sleep(min(self.config.refresh_margin_seconds / 2, 60.0))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                remaining = token.expires_on - time.time()
+                logger.warning(f"[CREDENTIAL] Token refresh failed ({remaining:.0f}s left on current token): {e}")
+                if remaining <= MIN_VALIDITY_SECONDS:
+                    # Let the next request acquire one on demand
+                    self._tokens.pop(key, None)
+                    self._refresh_tasks.pop(key, None)
+                    return
+                await asyncio.sleep(min(retry_delay, remaining / 2))
+                retry_delay = min(retry_delay * 2, 300.0)
+
+    async def warm_up(self, scopes: Optional[List[str]] = None) -> None:
+        """
+        Acquire tokens ahead of the first request.
+
+        Failures are logged, not raised: the first request will try again.
+        """
+        for scope in scopes if scopes is not None else self.config.warm_scopes:
+            try:
+                await self.get_token(scope)
+            except Exception as e:
+                logger.warning(f"[CREDENTIAL] Warm-up for {scope} failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters."""
+        return {
+            "cached_tokens": sum(1 for token in self._tokens.values() if token.valid()),
+            "hits": self.hits,
+            "acquisitions": self.acquisitions,
+            "shared_hits": self.shared_hits,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.failures,
+            "shared_cache": str(self.file_cache.path) if self.file_cache else None,
+        }
+
+
+def _default_credential() -> Any:
+    from azure.identity.aio import DefaultAzureCredential
+
+    return DefaultAzureCredential()
+
+
+_shared: Optional[CachedTokenCredential] = None
+_shared_users = 0
+
+
+def acquire_credential(config: Optional[CredentialConfig] = None) -> Any:
+    """
+    Credential for an agent.
+
+    With caching enabled (the default) every caller gets the same process-wide
+    CachedTokenCredential; otherwise a new DefaultAzureCredential, as before.
+    Pair each call with release_credential().
+    """
+    global _shared, _shared_users
+    config = config or credential_config_from_env()
+    if not config.enabled:
+        return _default_credential()
+    if _shared is None:
+        _shared = CachedTokenCredential(config=config)
+        logger.info(f"[CREDENTIAL] Shared token cache enabled (refresh margin {config.refresh_margin_seconds:.0f}s, "
+                    f"shared file: {config.shared_cache_path or 'none'})")
+    _shared_users += 1
+    return _shared
+
+
+async def release_credential(credential: Any) -> None:
+    """Release a credential from acquire_credential(), closing it once no agent uses it."""
+    global _shared, _shared_users
+    if credential is None:
+        return
+    if credential is not _shared:
+        await credential.close()
+        return
+    _shared_users -= 1
+    if _shared_users <= 0:
+        _shared = None
+        _shared_users = 0
+        await credential.close()
+
+
+def credential_config_from_env() -> CredentialConfig:
+    """Build a CredentialConfig from CREDENTIAL_* environment variables."""
+    scopes = os.getenv("CREDENTIAL_WARM_SCOPES")
+    return CredentialConfig(
+        enabled=os.getenv("CREDENTIAL_CACHE", "true").lower() in ("1", "true", "yes"),
+        refresh_margin_seconds=float(os.getenv("CREDENTIAL_REFRESH_MARGIN_SECONDS", 300)),
+        shared_cache_path=os.getenv("CREDENTIAL_SHARED_CACHE_PATH") or None,
+        **({"warm_scopes": [s.strip() for s in scopes.split(",") if s.strip()]} if scopes else {}),
+    )
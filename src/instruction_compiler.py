@@ -0,0 +1,319 @@
+"""
+Instruction compiler: turns config/instructions_*.md into the prompt sent to the model.
+
+The markdown files are written for people: box-drawing separators, repeated
+example blocks and blank-line padding all cost tokens on every request. The
+compiler strips that decoration, drops repeated paragraphs, counts tokens per
+section and enforces a token budget by dropping optional sections (the worked
+examples by default).
+
+Sections containing {{placeholders}} are per-request. They are moved after all
+static sections, so the compiled static prefix is byte-identical across requests
+and the provider's prompt cache can reuse it; only the short dynamic suffix
+differs.
+
+Usage:
+    python -m src.instruction_compiler config/instructions_routing.md [--budget N]
+"""
+
+import argparse
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.models.config import InstructionConfig
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+# A line made only of rule/box-drawing characters (and spaces)
+_SEPARATOR_LINE = re.compile(r"^\s*[━─═╌┄\-=_*~·•]{3,}\s*$")
+_MARKDOWN_HEADING = re.compile(r"^#{1,6}\s+(.*)$")
+_WHITESPACE = re.compile(r"\s+")
+
+_encoding: Any = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens with tiktoken's o200k_base encoding when installed, else estimate.
+
+    The estimate (one token per four characters) is close enough for budgets and
+    section comparisons.
+    """
+    global _encoding
+    if not text:
+        return 0
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return max(1, (len(text) + 3) // 4)
+
+
+class InstructionBudgetError(ValueError):
+    """Compiled instructions exceed the configured token budget."""
+
+
+@dataclass
+class Section:
+    """One titled block of instructions."""
+
+    title: str
+    text: str
+    tokens: int = 0
+    raw_tokens: int = 0
+    dynamic: bool = False
+    optional: bool = False
+    dropped: bool = False
+    duplicates_removed: int = 0
+
+
+@dataclass
+class CompiledInstructions:
+    """Compiled prompt: static prefix, dynamic suffix template and per-section report."""
+
+    prefix: str
+    suffix_template: str
+    sections: List[Section] = field(default_factory=list)
+    raw_tokens: int = 0
+    budget: Optional[int] = None
+
+    @property
+    def prefix_tokens(self) -> int:
+        return count_tokens(self.prefix)
+
+    @property
+    def tokens(self) -> int:
+        return self.prefix_tokens + count_tokens(self.suffix_template)
+
+    @property
+    def placeholders(self) -> List[str]:
+        return sorted(set(PLACEHOLDER_PATTERN.findall(self.suffix_template)))
+
+    def render(self, values: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Full instructions for one request.
+
+        Args:
+            values: Placeholder values; unknown placeholders render as empty strings
+
+        Returns:
+            Static prefix followed by the rendered dynamic suffix
+        """
+        if not self.suffix_template:
+            return self.prefix
+        values = values or {}
+        suffix = PLACEHOLDER_PATTERN.sub(lambda m: str(values.get(m.group(1), "")), self.suffix_template)
+        return f"{self.prefix}\n\n{suffix}"
+
+    def report(self) -> Dict[str, Any]:
+        """Token accounting per section, for logs and the build report."""
+        return {
+            "raw_tokens": self.raw_tokens,
+            "compiled_tokens": self.tokens,
+            "static_prefix_tokens": self.prefix_tokens,
+            "budget": self.budget,
+            "placeholders": self.placeholders,
+            "sections": [
+                {
+                    "title": s.title or "(preamble)",
+                    "raw_tokens": s.raw_tokens,
+                    "tokens": 0 if s.dropped else s.tokens,
+                    "dynamic": s.dynamic,
+                    "dropped": s.dropped,
+                    "duplicates_removed": s.duplicates_removed,
+                }
+                for s in self.sections
+            ],
+        }
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """
+    Split instructions into (title, body) pairs.
+
+    A heading is a markdown "#" line or a text line directly above a separator
+    line (the "TITLE / ━━━" banners in the routing prompt). Text before the
+    first heading becomes an untitled preamble.
+    """
+    sections: List[Tuple[str, List[str]]] = [("", [])]
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        heading = _MARKDOWN_HEADING.match(line)
+        banner = (
+            line.strip() and not _SEPARATOR_LINE.match(line)
+            and i + 1 < len(lines) and _SEPARATOR_LINE.match(lines[i + 1])
+        )
+        if heading or banner:
+            sections.append((heading.group(1).strip() if heading else line.strip(), [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(title, "\n".join(body)) for title, body in sections if title or "\n".join(body).strip()]
+
+
+def strip_decoration(text: str) -> str:
+    """
+    Remove separator lines and trailing whitespace, and collapse blank-line runs.
+
+    Two trailing spaces (a Markdown hard line break, used by the output
+    templates) are kept.
+    """
+    kept: List[str] = []
+    for line in text.splitlines():
+        if _SEPARATOR_LINE.match(line):
+            continue
+        stripped = line.rstrip()
+        line = stripped + "  " if stripped and line[len(stripped):].startswith("  ") else stripped
+        if not line and (not kept or not kept[-1]):
+            continue
+        kept.append(line)
+    while kept and not kept[-1]:
+        kept.pop()
+    return "\n".join(kept)
+
+
+def _dedupe(text: str, seen: set, min_chars: int) -> Tuple[str, int]:
+    """Drop paragraphs already emitted earlier in the prompt."""
+    kept: List[str] = []
+    removed = 0
+    for paragraph in text.split("\n\n"):
+        key = _WHITESPACE.sub(" ", paragraph).strip().lower()
+        if len(key) >= min_chars and key in seen:
+            removed += 1
+            continue
+        if len(key) >= min_chars:
+            seen.add(key)
+        kept.append(paragraph)
+    return "\n\n".join(kept), removed
+
+
+def compile_instructions(text: str, config: Optional[InstructionConfig] = None) -> CompiledInstructions:
+    """
+    Compile raw instruction markdown.
+
+    Args:
+        text: Raw instructions
+        config: Compiler settings (defaults to InstructionConfig())
+
+    Returns:
+        Compiled instructions
+
+    Raises:
+        InstructionBudgetError: If the prompt is still over budget after dropping optional sections
+    """
+    config = config or InstructionConfig()
+    optional_patterns = [re.compile(p, re.IGNORECASE) for p in config.optional_sections]
+    seen: set = set()
+    sections: List[Section] = []
+    for title, body in split_sections(text):
+        cleaned = strip_decoration(body) if config.strip_decoration else body
+        removed = 0
+        if config.dedupe:
+            cleaned, removed = _dedupe(cleaned, seen, config.dedupe_min_chars)
+        if not cleaned.strip():
+            continue
+        sections.append(Section(
+            title=title,
+            text=cleaned,
+            tokens=count_tokens(cleaned),
+            raw_tokens=count_tokens(body),
+            dynamic=bool(PLACEHOLDER_PATTERN.search(cleaned)),
+            optional=any(p.search(title) for p in optional_patterns),
+            duplicates_removed=removed,
+        ))
+
+    def _assemble() -> Tuple[str, str]:
+        live = [s for s in sections if not s.dropped]
+        return (
+            "\n\n".join(s.text for s in live if not s.dynamic),
+            "\n\n".join(s.text for s in live if s.dynamic),
+        )
+
+    prefix, suffix = _assemble()
+    compiled = CompiledInstructions(prefix, suffix, sections, raw_tokens=count_tokens(text), budget=config.token_budget)
+    if config.token_budget:
+        # Drop optional sections from the end (later examples first) until within budget
+        for section in reversed(sections):
+            if compiled.tokens <= config.token_budget:
+                break
+            if section.optional:
+                section.dropped = True
+                compiled.prefix, compiled.suffix_template = _assemble()
+        if compiled.tokens > config.token_budget:
+            raise InstructionBudgetError(
+                f"Instructions need {compiled.tokens} tokens after dropping optional sections; "
+                f"budget is {config.token_budget}"
+            )
+    return compiled
+
+
+@lru_cache(maxsize=32)
+def _compile_cached(path: str, mtime_ns: int, config_json: str) -> CompiledInstructions:
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    return compile_instructions(text, InstructionConfig.model_validate_json(config_json))
+
+
+def compile_file(path: Path, config: Optional[InstructionConfig] = None) -> CompiledInstructions:
+    """
+    Compile an instructions file, reusing the result until the file changes.
+
+    Args:
+        path: Instructions markdown file
+        config: Compiler settings
+
+    Returns:
+        Compiled instructions
+    """
+    config = config or InstructionConfig()
+    return _compile_cached(str(path), os.stat(path).st_mtime_ns, config.model_dump_json())
+
+
+def instruction_config_from_env() -> InstructionConfig:
+    """Build compiler settings from environment variables."""
+    budget = os.getenv("INSTRUCTION_TOKEN_BUDGET")
+    optional = os.getenv("INSTRUCTION_OPTIONAL_SECTIONS")
+    return InstructionConfig(
+        enabled=os.getenv("INSTRUCTION_COMPILE", "true").lower() in ("1", "true", "yes"),
+        token_budget=int(budget) if budget else None,
+        **({"optional_sections": [p.strip() for p in optional.split(",") if p.strip()]} if optional else {}),
+    )
+
+
+def main() -> None:
+    """Print the build report for one or more instruction files."""
+    parser = argparse.ArgumentParser(description="Compile instruction files and report token counts.")
+    parser.add_argument("paths", nargs="+", help="Instruction markdown files")
+    parser.add_argument("--budget", type=int, default=None, help="Token budget to enforce")
+    parser.add_argument("--output", help="Write the compiled prompt (single input only)")
+    args = parser.parse_args()
+
+    config = instruction_config_from_env()
+    if args.budget:
+        config.token_budget = args.budget
+    for path in args.paths:
+        compiled = compile_file(Path(path), config)
+        report = compiled.report()
+        print(f"\n{path}: {report['raw_tokens']} -> {report['compiled_tokens']} tokens "
+              f"(static prefix {report['static_prefix_tokens']}, budget {report['budget'] or 'none'})")
+        for s in report["sections"]:
+            notes = [n for n, on in (("dynamic", s["dynamic"]), ("DROPPED", s["dropped"])) if on]
+            if s["duplicates_removed"]:
+                notes.append(f"{s['duplicates_removed']} duplicate(s) removed")
+            print(f"  {s['raw_tokens']:>6} -> {s['tokens']:>6}  {s['title'][:60]}  {' '.join(notes)}")
+        if args.output and len(args.paths) == 1:
+            Path(args.output).write_text(compiled.render(), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""Quota-aware router that spreads model requests across Foundry deployments."""
+
+import json
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Set
+
+from src.models.config import ModelDeploymentConfig, ModelRouterConfig
+
+logger = logging.getLogger(__name__)
+
+# Azure OpenAI quotas are enforced over a rolling one-minute window
+QUOTA_WINDOW_SECONDS = 60.0
+
+
+@dataclass
+class DeploymentState:
+    """Live quota estimate for a single deployment."""
+
+    config: ModelDeploymentConfig
+    tpm_limit: int = 0
+    rpm_limit: int = 0
+    remaining_tokens: Optional[float] = None
+    remaining_requests: Optional[float] = None
+    observed_at: float = 0.0
+    cooldown_until: float = 0.0
+    in_flight: int = 0
+    throttle_count: int = 0
+    request_count: int = 0
+
+    def _replenished(self, remaining: Optional[float], limit: int, now: float) -> Optional[float]:
+        """Project a remaining-quota observation forward, assuming linear refill over the window."""
+        if remaining is None:
+            return None
+        if limit <= 0:
+            return remaining
+        elapsed = max(0.0, now - self.observed_at)
+        return min(float(limit), remaining + limit * elapsed / QUOTA_WINDOW_SECONDS)
+
+    def headroom(self, now: float) -> float:
+        """
+        Fraction of quota currently available, between 0.0 and 1.0.
+
+        Deployments with no learned limits are assumed to be fully available.
+        """
+        fractions = []
+        tokens = self._replenished(self.remaining_tokens, self.tpm_limit, now)
+        if tokens is not None and self.tpm_limit > 0:
+            fractions.append(tokens / self.tpm_limit)
+        requests = self._replenished(self.remaining_requests, self.rpm_limit, now)
+        if requests is not None and self.rpm_limit > 0:
+            fractions.append(requests / self.rpm_limit)
+        if not fractions:
+            return 1.0
+        return max(0.0, min(1.0, min(fractions)))
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        """Snapshot of the deployment state for diagnostics."""
+        return {
+            "name": self.config.name,
+            "deployment": self.config.deployment,
+            "region": self.config.region,
+            "instruction_types": self.config.instruction_types,
+            "tpm_limit": self.tpm_limit,
+            "rpm_limit": self.rpm_limit,
+            "headroom": round(self.headroom(now), 3),
+            "cooling_down": self.cooldown_until > now,
+            "in_flight": self.in_flight,
+            "requests": self.request_count,
+            "throttles": self.throttle_count,
+        }
+
+
+class ModelRouter:
+    """
+    Chooses a model deployment per request, weighted by remaining TPM/RPM quota.
+
+    Limits start from configuration and are refined from `x-ratelimit-*` response
+    headers and 429 responses. Deployments can be restricted to specific
+    instruction types so cheaper models serve summaries and larger ones routing.
+    """
+
+    def __init__(self, config: ModelRouterConfig, rng: Optional[random.Random] = None):
+        """
+        Initialize the router.
+
+        Args:
+            config: Router configuration with at least one deployment
+            rng: Random source used for weighted selection (for deterministic tests)
+        """
+        if not config.deployments:
+            raise ValueError("ModelRouter requires at least one deployment")
+        self.config = config
+        self._rng = rng or random.Random()
+        self._states: Dict[str, DeploymentState] = {}
+        for deployment in config.deployments:
+            if deployment.name in self._states:
+                raise ValueError(f"Duplicate deployment name: {deployment.name}")
+            self._states[deployment.name] = DeploymentState(
+                config=deployment,
+                tpm_limit=deployment.tpm_limit,
+                rpm_limit=deployment.rpm_limit,
+            )
+        logger.info(f"[ROUTER] Initialized with {len(self._states)} deployment(s): {', '.join(self._states)}")
+
+    @classmethod
+    def from_env(cls) -> Optional["ModelRouter"]:
+        """
+        Build a router from the MODEL_DEPLOYMENTS environment variable.
+
+        MODEL_DEPLOYMENTS holds a JSON list of deployment objects, e.g.
+        [{"name": "eastus-mini", "deployment": "gpt-4o-mini", "instruction_types": ["summary"]}].
+
+        Returns:
+            A configured router, or None when MODEL_DEPLOYMENTS is not set
+        """
+        config = model_router_config_from_env()
+        return cls(config) if config.deployments else None
+
+    def reconfigure(self, config: ModelRouterConfig) -> Set[str]:
+        """
+        Apply a new configuration in place.
+
+        Deployments whose settings are unchanged keep their learned quota and
+        cooldown state; new or changed ones start fresh; removed ones are dropped.
+
+        Returns:
+            Names of previously configured deployments that changed or were removed,
+            so callers can discard clients bound to their old settings
+        """
+        if not config.deployments:
+            raise ValueError("ModelRouter requires at least one deployment")
+        states: Dict[str, DeploymentState] = {}
+        for deployment in config.deployments:
+            if deployment.name in states:
+                raise ValueError(f"Duplicate deployment name: {deployment.name}")
+            current = self._states.get(deployment.name)
+            if current is not None and current.config == deployment:
+                states[deployment.name] = current
+            else:
+                states[deployment.name] = DeploymentState(
+                    config=deployment,
+                    tpm_limit=deployment.tpm_limit,
+                    rpm_limit=deployment.rpm_limit,
+                )
+        stale = {name for name, current in self._states.items() if states.get(name) is not current}
+        self.config = config
+        self._states = states
+        logger.info(f"[ROUTER] Reconfigured with {len(states)} deployment(s): {', '.join(states)}")
+        return stale
+
+    @property
+    def deployments(self) -> List[ModelDeploymentConfig]:
+        """Configured deployments in declaration order."""
+        return [state.config for state in self._states.values()]
+
+    def candidates(self, instruction_type: Optional[str] = None) -> List[DeploymentState]:
+        """
+        Deployments eligible for an instruction type.
+
+        Falls back to every deployment when none is dedicated to the instruction type.
+        """
+        states = list(self._states.values())
+        if instruction_type:
+            dedicated = [s for s in states if instruction_type in s.config.instruction_types]
+            if dedicated:
+                return dedicated
+        general = [s for s in states if not s.config.instruction_types]
+        return general or states
+
+    def select(self, instruction_type: Optional[str] = None, exclude: Optional[List[str]] = None) -> ModelDeploymentConfig:
+        """
+        Pick a deployment for the next request and mark it in flight.
+
+        Callers must pair every select() with release().
+
+        Args:
+            instruction_type: Instruction type of the request ("summary", "routing", etc.)
+            exclude: Deployment names to skip (e.g. ones that just throttled this request)
+
+        Returns:
+            The chosen deployment configuration
+        """
+        now = time.monotonic()
+        states = [s for s in self.candidates(instruction_type) if s.config.name not in (exclude or [])]
+        if not states:
+            states = self.candidates(instruction_type)
+
+        available = [s for s in states if s.cooldown_until <= now]
+        if available:
+            scores = [
+                s.config.weight * max(s.headroom(now), 0.01) / (1 + s.in_flight)
+                for s in available
+            ]
+            chosen = self._rng.choices(available, weights=scores, k=1)[0]
+        else:
+            # Everything is throttled: use whichever recovers first
+            chosen = min(states, key=lambda s: s.cooldown_until)
+            logger.warning(f"[ROUTER] All deployments cooling down, using {chosen.config.name}")
+
+        chosen.in_flight += 1
+        chosen.request_count += 1
+        logger.debug(f"[ROUTER] Selected {chosen.config.name} for instruction_type={instruction_type}")
+        return chosen.config
+
+    def release(self, name: str) -> None:
+        """Mark a request on a deployment as finished."""
+        state = self._states.get(name)
+        if state and state.in_flight > 0:
+            state.in_flight -= 1
+
+    def record_response(self, name: str, headers: Optional[Mapping[str, Any]]) -> None:
+        """
+        Learn quota from Azure OpenAI rate limit response headers.
+
+        Args:
+            name: Deployment name the response came from
+            headers: Response headers (case-insensitive lookup is applied)
+        """
+        state = self._states.get(name)
+        if state is None or not headers:
+            return
+        lowered = {str(k).lower(): v for k, v in headers.items()}
+
+        def _number(key: str) -> Optional[float]:
+            try:
+                return float(lowered[key])
+            except (KeyError, TypeError, ValueError):
+                return None
+
+        limit_tokens = _number("x-ratelimit-limit-tokens")
+        limit_requests = _number("x-ratelimit-limit-requests")
+        remaining_tokens = _number("x-ratelimit-remaining-tokens")
+        remaining_requests = _number("x-ratelimit-remaining-requests")
+
+        if limit_tokens:
+            state.tpm_limit = int(limit_tokens)
+        if limit_requests:
+            state.rpm_limit = int(limit_requests)
+        if remaining_tokens is None and remaining_requests is None:
+            return
+        state.observed_at = time.monotonic()
+        if remaining_tokens is not None:
+            state.remaining_tokens = remaining_tokens
+            # Without an explicit limit, the largest remaining value seen is a lower bound
+            state.tpm_limit = max(state.tpm_limit, int(remaining_tokens))
+        if remaining_requests is not None:
+            state.remaining_requests = remaining_requests
+            state.rpm_limit = max(state.rpm_limit, int(remaining_requests))
+
+    def record_usage(self, name: str, tokens: int) -> None:
+        """Deduct tokens used by a completed request when no headers were available."""
+        state = self._states.get(name)
+        if state is None or tokens <= 0 or state.tpm_limit <= 0:
+            return
+        now = time.monotonic()
+        current = state._replenished(state.remaining_tokens, state.tpm_limit, now)
+        if current is None:
+            current = float(state.tpm_limit)
+        state.remaining_tokens = max(0.0, current - tokens)
+        state.observed_at = now
+
+    def record_throttle(self, name: str, retry_after: Optional[float] = None) -> None:
+        """
+        Record a 429 from a deployment and take it out of rotation until it recovers.
+
+        Args:
+            name: Deployment name that throttled
+            retry_after: Seconds from the Retry-After header, if present
+        """
+        state = self._states.get(name)
+        if state is None:
+            return
+        cooldown = retry_after if retry_after and retry_after > 0 else self.config.default_cooldown_seconds
+        now = time.monotonic()
+        state.cooldown_until = now + cooldown
+        state.throttle_count += 1
+        state.remaining_tokens = 0.0
+        state.remaining_requests = 0.0
+        state.observed_at = now
+        logger.warning(f"[ROUTER] Deployment {name} throttled, cooling down for {cooldown:.1f}s")
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Current state of every deployment, for the tools/diagnostics endpoint."""
+        now = time.monotonic()
+        return [state.to_dict(now) for state in self._states.values()]
+
+
+def throttle_details(error: BaseException) -> Optional[Dict[str, Any]]:
+    """
+    Inspect an exception from the model client for a 429 response.
+
+    Handles openai and azure-core error shapes, following `__cause__` chains
+    since the agent framework wraps provider errors.
+
+    Returns:
+        {"retry_after": seconds or None, "headers": dict} for throttling errors, else None
+    """
+    seen = set()
+    current: Optional[BaseException] = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        response = getattr(current, "response", None)
+        status = getattr(current, "status_code", None) or getattr(response, "status_code", None)
+        if status == 429:
+            headers = dict(getattr(response, "headers", None) or {})
+            lowered = {str(k).lower(): v for k, v in headers.items()}
+            retry_after = None
+            try:
+                if "retry-after-ms" in lowered:
+                    retry_after = float(lowered["retry-after-ms"]) / 1000.0
+                elif "retry-after" in lowered:
+                    retry_after = float(lowered["retry-after"])
+            except (TypeError, ValueError):
+                retry_after = None
+            return {"retry_after": retry_after, "headers": headers}
+        current = current.__cause__ or current.__context__
+    return None
+
+
+def response_headers(result: Any) -> Optional[Mapping[str, Any]]:
+    """Best-effort extraction of HTTP headers from an agent run result."""
+    raw = getattr(result, "raw_representation", None)
+    for _ in range(3):
+        if raw is None:
+            return None
+        headers = getattr(raw, "headers", None) or getattr(getattr(raw, "response", None), "headers", None)
+        if headers:
+            return headers
+        raw = getattr(raw, "raw_representation", None)
+    return None
+
+
+def model_router_config_from_env() -> ModelRouterConfig:
+    """
+    Build a ModelRouterConfig from the MODEL_DEPLOYMENTS environment variable.
+
+    Returns:
+        Router settings; no deployments when MODEL_DEPLOYMENTS is not set
+    """
+    raw = os.getenv("MODEL_DEPLOYMENTS")
+    deployments = [ModelDeploymentConfig(**entry) for entry in json.loads(raw)] if raw else []
+    return ModelRouterConfig(deployments=deployments)
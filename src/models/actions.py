@@ -0,0 +1,30 @@
+"""Request and response models for Action (work item) queries."""
+
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+
+class ActionListQuery(BaseModel):
+    """Filters, sorting and paging for a list of Actions."""
+
+    state: Optional[List[str]] = Field(default=None, description="States to include (e.g. ['Active', 'New'])")
+    priority: Optional[List[str]] = Field(default=None, description="Action priorities to include")
+    assigned_to: Optional[str] = Field(default=None, description="Assignee display name or email")
+    area_path: Optional[str] = Field(default=None, description="Area path (includes child areas)")
+    keywords: Optional[str] = Field(default=None, description="Text that must appear in the title")
+    created_after: Optional[str] = Field(default=None, description="ISO date; only Actions created on/after")
+    changed_after: Optional[str] = Field(default=None, description="ISO date; only Actions changed on/after")
+    sort_by: str = Field(default="changed_date", description="Column to sort by")
+    descending: bool = Field(default=True, description="Sort direction (newest first by default)")
+    page_size: int = Field(default=10, ge=1, le=500, description="Rows per page")
+    cursor: Optional[str] = Field(default=None, description="Opaque cursor from a previous page")
+
+
+class ActionPage(BaseModel):
+    """One page of Actions."""
+
+    items: List[Dict[str, Any]] = Field(default_factory=list, description="Rows keyed by column name")
+    total: int = Field(default=0, description="Total Actions matching the filters")
+    next_cursor: Optional[str] = Field(default=None, description="Cursor for the next page, if any")
+    sort_by: str = Field(default="changed_date", description="Column the rows are sorted by")
+    descending: bool = Field(default=True, description="Sort direction")
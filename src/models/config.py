@@ -1,7 +1,7 @@
 """Configuration models using Pydantic."""
 
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import AliasChoices, BaseModel, Field, SecretStr
+from typing import Dict, List, Optional
 
 
 class FoundryConfig(BaseModel):
@@ -10,6 +10,7 @@ class FoundryConfig(BaseModel):
     project_name: str = Field(..., description="Foundry project name")
     resource_group: str = Field(..., description="Azure resource group")
     subscription_id: str = Field(..., description="Azure subscription ID")
+    project_endpoint: Optional[str] = Field(default=None, description="Foundry project endpoint")
     model_name: str = Field(default="gpt-4o", description="Model name")
     model_deployment: str = Field(default="gpt-4o", description="Model deployment name")
     
@@ -21,8 +22,13 @@ class MCPConfig(BaseModel):
     """MCP Server configuration."""
     
     server_url: str = Field(default="http://localhost:3000", description="MCP server URL")
-    server_type: str = Field(default="stdio", description="MCP server type (stdio or http)")
-    server_command: Optional[str] = Field(default=None, description="Command to start MCP server")
+    server_type: str = Field(default="stdio", validation_alias=AliasChoices("server_type", "type"), description="MCP server type (stdio or http)")
+    server_command: Optional[str] = Field(default=None, validation_alias=AliasChoices("server_command", "command"), description="Command to start MCP server")
+    enabled: bool = Field(default=True, description="Register Azure DevOps MCP tools with the agent")
+    provider: str = Field(default="azure-devops", description="MCP server provider")
+    organization_name: str = Field(default="UnifiedActionTracker", description="Azure DevOps organization")
+    project_name: Optional[str] = Field(default="Unified Action Tracker", description="Azure DevOps project")
+    args: List[str] = Field(default_factory=list, description="Arguments for server_command")
     
     class Config:
         env_prefix = "MCP_"
@@ -51,3 +57,139 @@ class AgentConfig(BaseModel):
     
     class Config:
         env_nested_delimiter = "__"
+
+
+class ModelDeploymentConfig(BaseModel):
+    """A single model deployment the router can send requests to."""
+    
+    name: str = Field(..., description="Unique name for this deployment entry (e.g. 'eastus-gpt-4o')")
+    deployment: str = Field(..., description="Model deployment name in the Foundry project")
+    project_endpoint: Optional[str] = Field(default=None, description="Foundry project endpoint. Defaults to the agent's endpoint")
+    region: Optional[str] = Field(default=None, description="Azure region, informational")
+    tpm_limit: int = Field(default=0, description="Tokens-per-minute quota (0 = learn from response headers)")
+    rpm_limit: int = Field(default=0, description="Requests-per-minute quota (0 = learn from response headers)")
+    weight: float = Field(default=1.0, description="Relative weight when spreading load")
+    instruction_types: List[str] = Field(default_factory=list, description="Instruction types served (empty = all)")
+
+
+class ModelRouterConfig(BaseModel):
+    """Model router configuration."""
+    
+    deployments: List[ModelDeploymentConfig] = Field(default_factory=list, description="Deployments to spread load across")
+    max_attempts: int = Field(default=3, description="Deployments to try before giving up on a throttled request")
+    default_cooldown_seconds: float = Field(default=10.0, description="Cooldown after a 429 without a Retry-After header")
+
+
+class SessionConfig(BaseModel):
+    """Conversation session store configuration."""
+    
+    max_sessions: int = Field(default=500, description="Maximum live sessions before LRU eviction")
+    ttl_seconds: float = Field(default=1800.0, description="Idle time before a session expires")
+    max_bytes: int = Field(default=64 * 1024 * 1024, description="Approximate memory cap for cached session data")
+    max_tool_results: int = Field(default=50, description="Tool results kept per session")
+
+
+class MirrorConfig(BaseModel):
+    """Local work item mirror configuration."""
+    
+    enabled: bool = Field(default=False, description="Run the background sync worker and read from the mirror")
+    db_path: str = Field(default="data/action_mirror.db", description="SQLite database file")
+    poll_interval_seconds: float = Field(default=300.0, description="Seconds between change polls")
+    initial_lookback_days: int = Field(default=30, description="History to pull on the first sync")
+    backfill: bool = Field(default=True, description="Also mirror Actions older than the lookback, so lists can be served locally")
+    max_staleness_seconds: float = Field(default=900.0, description="Mirror age after which reads fall back to live fetches")
+    keep_revisions: int = Field(default=5, description="Revisions kept per work item")
+
+
+class InstructionConfig(BaseModel):
+    """Instruction compiler configuration."""
+    
+    enabled: bool = Field(default=True, description="Compile instruction files before sending them to the model")
+    strip_decoration: bool = Field(default=True, description="Remove separator lines and blank-line padding")
+    dedupe: bool = Field(default=True, description="Drop paragraphs repeated earlier in the prompt")
+    dedupe_min_chars: int = Field(default=40, description="Shorter paragraphs are never treated as duplicates")
+    token_budget: Optional[int] = Field(default=None, description="Maximum compiled tokens (None = no limit)")
+    optional_sections: List[str] = Field(default_factory=lambda: [r"^EXAMPLE\b"], description="Section title patterns that may be dropped to meet the budget")
+
+
+class PrecomputeConfig(BaseModel):
+    """Background summary/routing pre-computation configuration."""
+    
+    enabled: bool = Field(default=False, description="Precompute responses for changed Actions (requires the mirror)")
+    instruction_types: List[str] = Field(default_factory=lambda: ["summary", "routing"], description="Instruction sets to precompute")
+    token_budget_per_hour: int = Field(default=200000, description="Model tokens the worker may spend per rolling hour")
+    max_queue: int = Field(default=1000, description="Maximum pending Actions")
+
+
+class SchedulerConfig(BaseModel):
+    """Weighted fair scheduler configuration for agent runs."""
+    
+    enabled: bool = Field(default=True, description="Admit agent runs through the scheduler")
+    max_concurrency: int = Field(default=8, description="Agent runs allowed in flight at once")
+    reserved_interactive: int = Field(default=2, description="Slots only interactive requests may use")
+    max_per_caller: int = Field(default=0, description="In-flight runs per caller within a class (0 = no cap)")
+    max_queue: int = Field(default=1000, description="Maximum waiting requests per class")
+    weights: Dict[str, float] = Field(
+        default_factory=lambda: {"interactive": 8.0, "routing": 3.0, "background": 1.0},
+        description="Relative share of slots per priority class",
+    )
+    max_wait_seconds: Dict[str, float] = Field(
+        default_factory=lambda: {"interactive": 30.0, "routing": 120.0},
+        description="Queue wait after which a request is rejected (classes not listed wait indefinitely)",
+    )
+
+
+class PrefetchConfig(BaseModel):
+    """Speculative fetch of an Action's comments and related work items."""
+    
+    enabled: bool = Field(default=True, description="Start fetching referenced Actions' details before the model asks")
+    include_comments: bool = Field(default=True, description="Prefetch discussion comments")
+    include_related: bool = Field(default=True, description="Prefetch related work items")
+    max_related: int = Field(default=20, description="Related work items fetched per Action")
+    ttl_seconds: float = Field(default=120.0, description="How long fetched results are reused")
+    max_entries: int = Field(default=500, description="Cached fetches kept before the oldest are dropped")
+
+
+class CredentialConfig(BaseModel):
+    """Shared Azure credential and access token cache."""
+    
+    enabled: bool = Field(default=True, description="Share one caching credential across agents")
+    refresh_margin_seconds: float = Field(default=300.0, description="Refresh tokens this long before they expire")
+    shared_cache_path: Optional[str] = Field(default=None, description="Token file shared by worker processes and restarts (None = in-process only)")
+    warm_scopes: List[str] = Field(default_factory=lambda: ["https://ai.azure.com/.default"], description="Scopes to acquire at startup")
+
+
+class ProfilingConfig(BaseModel):
+    """On-demand profiling endpoints and event-loop lag monitoring."""
+    
+    enabled: bool = Field(default=False, description="Serve the /api/debug endpoints and monitor event-loop lag")
+    token: Optional[SecretStr] = Field(default=None, description="Bearer token the debug endpoints require")
+    max_profile_seconds: float = Field(default=60.0, description="Longest CPU profile a request may ask for")
+    sample_interval_ms: float = Field(default=5.0, description="Default CPU sampling interval")
+    tracemalloc_frames: int = Field(default=25, description="Stack frames kept per traced allocation")
+    max_snapshots: int = Field(default=5, description="Memory snapshots kept for diffing")
+    lag_interval_ms: float = Field(default=100.0, description="How often the event loop is probed for lag")
+    lag_threshold_ms: float = Field(default=100.0, description="Stall after which the blocking stack is captured")
+
+
+class LoggingConfig(BaseModel):
+    """Logging configuration."""
+    
+    level: str = Field(default="INFO", description="Root log level")
+    format: str = Field(default="%(asctime)s - %(name)s - %(levelname)s - %(message)s", description="Log record format")
+
+
+class AppConfig(BaseModel):
+    """Everything config/agent_config.yaml configures, validated as one unit."""
+    
+    agent: AgentConfig
+    model_router: ModelRouterConfig = Field(default_factory=ModelRouterConfig, description="Model deployments (empty = single MODEL_DEPLOYMENT)")
+    sessions: SessionConfig = Field(default_factory=SessionConfig, description="Conversation session limits")
+    mirror: MirrorConfig = Field(default_factory=MirrorConfig, description="Local work item mirror")
+    precompute: PrecomputeConfig = Field(default_factory=PrecomputeConfig, description="Background pre-computation")
+    scheduler: SchedulerConfig = Field(default_factory=SchedulerConfig, description="Agent run scheduling")
+    prefetch: PrefetchConfig = Field(default_factory=PrefetchConfig, description="Speculative related item fetch")
+    credentials: CredentialConfig = Field(default_factory=CredentialConfig, description="Token cache")
+    instructions: InstructionConfig = Field(default_factory=InstructionConfig, description="Instruction compiler")
+    profiling: ProfilingConfig = Field(default_factory=ProfilingConfig, description="Debug endpoints")
+    logging: LoggingConfig = Field(default_factory=LoggingConfig, description="Logging")
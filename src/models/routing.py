@@ -0,0 +1,100 @@
+"""Structured routing decision models (Phase 7 machine-readable output of the routing prompt)."""
+
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Literal, Optional
+
+
+class DirectRouting(BaseModel):
+    """Owner fields for a DIRECT routing decision."""
+
+    assigned_to: Optional[str] = Field(default=None, description="Assignee (person or triage alias)")
+    area_path: Optional[str] = Field(default=None, description="Solution area path")
+    priority: Optional[str] = Field(default=None, description="P1, P2 or P3")
+    p_triage_type: Optional[str] = Field(default=None, description="pTriageType, e.g. '_Route DRI'")
+
+
+class Decision(BaseModel):
+    """The routing outcome: a direct assignment or a routing tag."""
+
+    type: Literal["DIRECT", "TAG", "MISSING_DATA"] = Field(..., description="Kind of routing decision")
+    tag: Optional[str] = Field(default=None, description="Routing tag, e.g. 'Tech RoB | MW Triage'")
+    direct_routing: Optional[DirectRouting] = Field(default=None, description="Owner fields for DIRECT decisions")
+
+    @field_validator("type", mode="before")
+    @classmethod
+    def _upper_type(cls, value):
+        return value.strip().upper().replace(" ", "_") if isinstance(value, str) else value
+
+
+class Reasoning(BaseModel):
+    """Why the decision was made."""
+
+    matched_rule: Optional[str] = Field(default=None, description="Rule number and name from phases 4-6")
+    confidence: Literal["HIGH", "MEDIUM", "LOW", "FLAGGED"] = Field(default="LOW", description="Decision confidence")
+    factors: List[str] = Field(default_factory=list, description="Key decision factors")
+
+    @field_validator("confidence", mode="before")
+    @classmethod
+    def _upper_confidence(cls, value):
+        return value.strip().upper() if isinstance(value, str) else value
+
+
+class Requestor(BaseModel):
+    """Requestor identity and team classification."""
+
+    email: Optional[str] = Field(default=None, description="Requestor email")
+    job_title: Optional[str] = Field(default=None, description="Job title or UNKNOWN")
+    team: Optional[str] = Field(default=None, description="CSU, STU or UNKNOWN")
+
+
+class SupportHistory(BaseModel):
+    """Support tickets referenced by the Action."""
+
+    has_sr: bool = Field(default=False, description="A Support Request is referenced")
+    has_icm: bool = Field(default=False, description="An IcM incident is referenced")
+    has_gethelp: bool = Field(default=False, description="A GetHelp ticket is referenced")
+    ticket_numbers: List[str] = Field(default_factory=list, description="Normalized ticket identifiers")
+
+
+class TicketContext(BaseModel):
+    """Service and milestone context the decision was based on."""
+
+    service: Optional[str] = Field(default=None, description="Primary service or UNKNOWN")
+    solution_area: Optional[str] = Field(default=None, description="Solution area or UNKNOWN")
+    milestone_present: Optional[bool] = Field(default=None, description="Whether a milestone is attached")
+    commitment_level: Optional[str] = Field(default=None, description="Committed, Uncommitted or N/A")
+    support_history: SupportHistory = Field(default_factory=SupportHistory, description="Referenced tickets")
+
+
+class Ask(BaseModel):
+    """One distinct ask identified in the Action."""
+
+    summary: str = Field(..., description="One-line ask description")
+    scope: Optional[str] = Field(default=None, description="Feature, Bug Fix, Capacity or Other")
+    status: Optional[str] = Field(default=None, description="Clear or Ambiguous")
+
+
+class RoutingMeta(BaseModel):
+    """Processing metadata."""
+
+    timestamp: Optional[str] = Field(default=None, description="ISO 8601 datetime")
+    prompt_version: Optional[str] = Field(default=None, description="Routing prompt version")
+    processing_status: Optional[str] = Field(default=None, description="success, flagged or error")
+
+
+class RoutingDecision(BaseModel):
+    """
+    Machine-readable routing decision.
+
+    Field order matters: decision comes first so streaming consumers see the
+    tag and owner before the rest, and summary (the human-readable text) last.
+    """
+
+    decision: Decision = Field(..., description="Routing outcome")
+    reasoning: Reasoning = Field(default_factory=Reasoning, description="Matched rule and confidence")
+    requestor: Requestor = Field(default_factory=Requestor, description="Requestor classification")
+    ticket_context: TicketContext = Field(default_factory=TicketContext, description="Service and milestone context")
+    asks: List[Ask] = Field(default_factory=list, description="Distinct asks in the Action")
+    flags: List[str] = Field(default_factory=list, description="Warnings or ambiguities")
+    meta: RoutingMeta = Field(default_factory=RoutingMeta, description="Processing metadata")
+    summary: Optional[str] = Field(default=None, description="Human-readable summary (markdown)")
@@ -0,0 +1,351 @@
+"""Background pre-computation of summaries and routing decisions for changed Actions."""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from src.action_mirror import ActionMirror
+from src.models.config import PrecomputeConfig
+from src.scheduler import BACKGROUND, FairScheduler
+
+logger = logging.getLogger(__name__)
+
+# Queries used to precompute each instruction type (same wording as query.ps1 / routing.ps1)
+PRECOMPUTE_QUERIES = {
+    "summary": "Show me action {id} with all details",
+    "routing": "Analyze action {id} and provide routing recommendation",
+}
+
+# Interactive queries that ask for nothing beyond the standard summary/routing of one Action
+_SIMPLE_QUERY_PATTERN = re.compile(
+    r"^\s*(?:please\s+)?(?:show(?:\s+me)?|get|summari[sz]e|analy[sz]e|route)\s+"
+    r"(?:action|uat)\s*#?\s*(\d{4,8})"
+    r"(?:\s+(?:with\s+all\s+details|for\s+routing|and\s+provide\s+(?:a\s+)?routing\s+recommendation))?"
+    r"\s*[.?!]?\s*$",
+    re.IGNORECASE,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS precomputed (
+    id INTEGER NOT NULL,
+    instruction_type TEXT NOT NULL,
+    rev INTEGER NOT NULL,
+    response TEXT NOT NULL,
+    tokens INTEGER,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (id, instruction_type)
+);
+"""
+
+
+def simple_action_id(query: str) -> Optional[int]:
+    """
+    Return the Action id of a plain "show/analyze action N" query.
+
+    Queries with extra instructions (custom fields, formats, context) return
+    None so they always go to the model.
+    """
+    match = _SIMPLE_QUERY_PATTERN.match(query or "")
+    return int(match.group(1)) if match else None
+
+
+class PrecomputeStore:
+    """Precomputed responses keyed by Action id, instruction type and revision, stored in the mirror database."""
+
+    def __init__(self, mirror: ActionMirror):
+        """
+        Attach the store to a mirror database.
+
+        Args:
+            mirror: Mirror providing the current revision of each Action
+        """
+        self.mirror = mirror
+        with mirror.lock:
+            mirror.connection.executescript(_SCHEMA)
+            mirror.connection.commit()
+
+    def get(self, work_item_id: int, instruction_type: str) -> Optional[str]:
+        """
+        Precomputed response for the Action's current mirrored revision.
+
+        Returns:
+            The response, or None when missing or computed for an older revision
+        """
+        current = self.mirror.revisions([work_item_id]).get(work_item_id)
+        if current is None:
+            return None
+        with self.mirror.lock:
+            row = self.mirror.connection.execute(
+                "SELECT response FROM precomputed WHERE id = ? AND instruction_type = ? AND rev = ?",
+                (work_item_id, instruction_type, current),
+            ).fetchone()
+        return row[0] if row else None
+
+    def has(self, work_item_id: int, instruction_type: str, rev: int) -> bool:
+        """Whether a response exists for exactly this revision."""
+        with self.mirror.lock:
+            row = self.mirror.connection.execute(
+                "SELECT 1 FROM precomputed WHERE id = ? AND instruction_type = ? AND rev = ?",
+                (work_item_id, instruction_type, rev),
+            ).fetchone()
+        return row is not None
+
+    def put(self, work_item_id: int, instruction_type: str, rev: int, response: str, tokens: Optional[int]) -> None:
+        """Store a response, replacing any for an older revision."""
+        with self.mirror.lock:
+            self.mirror.connection.execute(
+                "INSERT OR REPLACE INTO precomputed (id, instruction_type, rev, response, tokens, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (work_item_id, instruction_type, rev, response, tokens, time.time()),
+            )
+            self.mirror.connection.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counts of stored responses per instruction type."""
+        with self.mirror.lock:
+            rows = self.mirror.connection.execute(
+                "SELECT instruction_type, COUNT(*), COALESCE(SUM(tokens), 0) FROM precomputed GROUP BY instruction_type"
+            ).fetchall()
+        return {row[0]: {"responses": row[1], "tokens": row[2]} for row in rows}
+
+
+class TokenBudget:
+    """Rolling one-hour token budget."""
+
+    WINDOW_SECONDS = 3600.0
+
+    def __init__(self, tokens_per_hour: int):
+        self.tokens_per_hour = tokens_per_hour
+        self._spent: Deque[Tuple[float, int]] = deque()
+
+    def _trim(self, now: float) -> None:
+        while self._spent and now - self._spent[0][0] > self.WINDOW_SECONDS:
+            self._spent.popleft()
+
+    @property
+    def spent(self) -> int:
+        """Tokens spent in the current window."""
+        self._trim(time.monotonic())
+        return sum(tokens for _, tokens in self._spent)
+
+    def record(self, tokens: int) -> None:
+        """Record tokens spent now."""
+        self._spent.append((time.monotonic(), max(0, int(tokens))))
+
+    def wait_seconds(self) -> float:
+        """Seconds until spending is allowed again (0 when under budget)."""
+        now = time.monotonic()
+        self._trim(now)
+        total = sum(tokens for _, tokens in self._spent)
+        if total < self.tokens_per_hour:
+            return 0.0
+        # Wait until enough of the oldest spend rolls out of the window
+        for timestamp, tokens in self._spent:
+            total -= tokens
+            if total < self.tokens_per_hour:
+                return max(0.0, timestamp + self.WINDOW_SECONDS - now)
+        return 0.0
+
+
+class PrecomputeWorker:
+    """
+    Low-priority worker that precomputes responses for changed Actions.
+
+    Runs one job at a time, only while no interactive request is waiting (or,
+    with a scheduler, as its background class), within a rolling hourly token
+    budget. Fed by mirror sync changes and the
+    work item webhook.
+    """
+
+    def __init__(
+        self,
+        store: PrecomputeStore,
+        agents: Dict[str, Any],
+        config: Optional[PrecomputeConfig] = None,
+        client: Optional[Any] = None,
+        is_busy: Optional[Callable[[], bool]] = None,
+        scheduler: Optional[FairScheduler] = None,
+    ):
+        """
+        Initialize the worker.
+
+        Args:
+            store: Where responses are stored
+            agents: Dedicated TechRobAgent per instruction type (kept separate from
+                    the interactive agent so its instruction set is never switched)
+            config: Instruction types, token budget and queue size
+            client: Live work item client used to refresh Actions the mirror hasn't seen yet
+            is_busy: Returns True while interactive work is in flight; the worker waits meanwhile
+            scheduler: Shared scheduler; model calls then run in its background class
+        """
+        self.store = store
+        self.agents = agents
+        self.config = config or PrecomputeConfig()
+        self.client = client
+        self.is_busy = is_busy or (lambda: False)
+        self.scheduler = scheduler
+        self.budget = TokenBudget(self.config.token_budget_per_hour)
+        self._queue: "asyncio.Queue[Tuple[int, Optional[int]]]" = asyncio.Queue()
+        self._pending: set = set()
+        self._task: Optional[asyncio.Task] = None
+        self.completed = 0
+
+    def reconfigure(self, config: PrecomputeConfig) -> None:
+        """Apply new instruction types, queue size and token budget; spent tokens still count."""
+        self.config = config
+        self.budget.tokens_per_hour = config.token_budget_per_hour
+
+    def lookup(self, query: str, instruction_type: str) -> Optional[str]:
+        """
+        Answer an interactive query from the store if it is a plain request for one Action.
+
+        Args:
+            query: User query string
+            instruction_type: Instruction type of the request
+
+        Returns:
+            Precomputed response for the Action's current revision, or None
+        """
+        if instruction_type not in self.config.instruction_types:
+            return None
+        work_item_id = simple_action_id(query)
+        if work_item_id is None:
+            return None
+        response = self.store.get(work_item_id, instruction_type)
+        if response is not None:
+            logger.info(f"[PRECOMPUTE] Served {instruction_type} for action {work_item_id} from store")
+        return response
+
+    def enqueue(self, work_item_id: int, rev: Optional[int] = None) -> bool:
+        """
+        Queue an Action for pre-computation.
+
+        Args:
+            work_item_id: Action id
+            rev: Revision reported by the change source, if known
+
+        Returns:
+            False when already pending or the queue is full
+        """
+        work_item_id = int(work_item_id)
+        if work_item_id in self._pending or len(self._pending) >= self.config.max_queue:
+            return False
+        self._pending.add(work_item_id)
+        self._queue.put_nowait((work_item_id, rev))
+        return True
+
+    async def on_changes(self, changed: List[Dict[str, Any]]) -> None:
+        """Mirror sync listener: queue every changed Action."""
+        queued = sum(self.enqueue(item["id"], item.get("rev")) for item in changed)
+        if queued:
+            logger.info(f"[PRECOMPUTE] Queued {queued} changed Action(s)")
+
+    async def _current_rev(self, work_item_id: int, rev_hint: Optional[int]) -> Optional[int]:
+        """Mirrored revision, refreshing from ADO when the change source is ahead of the mirror."""
+        current = self.store.mirror.revisions([work_item_id]).get(work_item_id)
+        if self.client is not None and (current is None or (rev_hint is not None and rev_hint > current)):
+            items = await self.client.get_work_items([work_item_id])
+            await asyncio.to_thread(self.store.mirror.upsert, items)
+            current = self.store.mirror.revisions([work_item_id]).get(work_item_id)
+        return current
+
+    async def _wait_for_capacity(self) -> None:
+        """Yield to interactive traffic and the token budget before each model call."""
+        while True:
+            delay = self.budget.wait_seconds()
+            if delay > 0:
+                logger.info(f"[PRECOMPUTE] Token budget exhausted, pausing {delay:.0f}s")
+                await asyncio.sleep(min(delay, 60.0))
+                continue
+            if self.is_busy():
+                await asyncio.sleep(1.0)
+                continue
+            return
+
+    async def process(self, work_item_id: int, rev_hint: Optional[int] = None) -> int:
+        """
+        Precompute every configured instruction type for one Action.
+
+        Returns:
+            Number of responses computed
+        """
+        rev = await self._current_rev(work_item_id, rev_hint)
+        if rev is None:
+            logger.warning(f"[PRECOMPUTE] Action {work_item_id} not found, skipping")
+            return 0
+        computed = 0
+        for instruction_type in self.config.instruction_types:
+            agent = self.agents.get(instruction_type)
+            if agent is None or self.store.has(work_item_id, instruction_type, rev):
+                continue
+            await self._wait_for_capacity()
+            query = PRECOMPUTE_QUERIES.get(instruction_type, PRECOMPUTE_QUERIES["summary"]).format(id=work_item_id)
+            slot = self.scheduler.slot(BACKGROUND, "precompute") if self.scheduler else nullcontext()
+            async with slot:
+                response = await agent.process_query(query)
+            tokens = agent.last_usage_tokens
+            if not tokens:
+                # Rough estimate when the framework doesn't report usage: ~4 characters per token
+                tokens = (len(agent.instructions) + len(query) + len(response)) // 4
+            self.budget.record(tokens)
+            self.store.put(work_item_id, instruction_type, rev, response, tokens)
+            computed += 1
+            logger.info(f"[PRECOMPUTE] Stored {instruction_type} for action {work_item_id} rev {rev} ({tokens} tokens)")
+        return computed
+
+    async def _run(self) -> None:
+        while True:
+            work_item_id, rev_hint = await self._queue.get()
+            try:
+                self.completed += await self.process(work_item_id, rev_hint)
+            except Exception as e:
+                logger.error(f"[PRECOMPUTE] Failed for action {work_item_id}: {e}")
+            finally:
+                self._pending.discard(work_item_id)
+                self._queue.task_done()
+
+    def start(self) -> None:
+        """Start processing the queue in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"[PRECOMPUTE] Worker started (types={self.config.instruction_types}, "
+                        f"budget={self.config.token_budget_per_hour} tokens/hour)")
+
+    async def stop(self) -> None:
+        """Stop the worker, abandoning queued jobs."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for agent in self.agents.values():
+            await agent.cleanup()
+
+    def stats(self) -> Dict[str, Any]:
+        """Worker and store counters."""
+        return {
+            "pending": len(self._pending),
+            "completed": self.completed,
+            "tokens_spent_last_hour": self.budget.spent,
+            "token_budget_per_hour": self.config.token_budget_per_hour,
+            "stored": self.store.stats(),
+        }
+
+
+def precompute_config_from_env() -> PrecomputeConfig:
+    """Build a PrecomputeConfig from PRECOMPUTE_* environment variables."""
+    defaults = PrecomputeConfig()
+    types = os.getenv("PRECOMPUTE_INSTRUCTION_TYPES")
+    return PrecomputeConfig(
+        enabled=os.getenv("PRECOMPUTE_ENABLED", str(defaults.enabled)).lower() in ("1", "true", "yes"),
+        instruction_types=[t.strip() for t in types.split(",") if t.strip()] if types else defaults.instruction_types,
+        token_budget_per_hour=int(os.getenv("PRECOMPUTE_TOKEN_BUDGET_PER_HOUR", defaults.token_budget_per_hour)),
+        max_queue=int(os.getenv("PRECOMPUTE_MAX_QUEUE", defaults.max_queue)),
+    )
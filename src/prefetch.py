@@ -0,0 +1,227 @@
+"""
+Speculative fetching of an Action's comments and related work items.
+
+A summary needs the work item, its comments and its related Actions. Left to
+itself the model fetches these one tool turn at a time. When a query
+references an Action, the prefetcher starts all of those fetches at once in
+the background, and the agent's get_action_details tool hands the results
+over as soon as the model asks, awaiting any fetch still in flight rather
+than starting a second one.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.models.config import PrefetchConfig
+
+logger = logging.getLogger(__name__)
+
+# Work item link URLs end in .../_apis/wit/workItems/<id>
+_WORK_ITEM_URL = re.compile(r"/workItems/(\d+)\s*$", re.IGNORECASE)
+
+
+def related_ids(work_item: Optional[Dict[str, Any]]) -> List[int]:
+    """
+    Ids of work items linked from a work item's relations (related, parent, child, ...).
+
+    Artifact links such as commits, hyperlinks and attachments are ignored.
+    """
+    ids: List[int] = []
+    for relation in (work_item or {}).get("relations") or []:
+        match = _WORK_ITEM_URL.search(str(relation.get("url") or ""))
+        if match and int(match.group(1)) not in ids and int(match.group(1)) != work_item.get("id"):
+            ids.append(int(match.group(1)))
+    return ids
+
+
+class RelatedItemPrefetcher:
+    """
+    Shares in-flight and recent work item fetches between speculative prefetch and tool calls.
+
+    Results are cached as asyncio tasks keyed by (kind, id), so a request for
+    data that is still being fetched waits for that fetch instead of issuing
+    its own. Failed fetches are dropped so the next request retries them.
+    """
+
+    def __init__(self, client: Any, config: Optional[PrefetchConfig] = None):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            client: WorkItemClient (or compatible) used for the fetches
+            config: Related item limit, cache TTL and size
+        """
+        self.client = client
+        self.config = config or PrefetchConfig()
+        self._tasks: "OrderedDict[Tuple[str, int], Tuple[float, asyncio.Task]]" = OrderedDict()
+        self.prefetched = 0
+        self.hits = 0
+        self.misses = 0
+
+    def reconfigure(self, config: PrefetchConfig) -> None:
+        """Apply new limits; cached fetches are kept (a shorter TTL retires them sooner)."""
+        self.config = config
+        while len(self._tasks) > config.max_entries:
+            self._tasks.popitem(last=False)
+
+    def _task(self, kind: str, work_item_id: int, fetch: Callable[[], Awaitable[Any]], speculative: bool) -> asyncio.Task:
+        """Cached task for (kind, id), starting the fetch if there is no usable one."""
+        key = (kind, work_item_id)
+        now = time.monotonic()
+        entry = self._tasks.get(key)
+        if entry is not None:
+            started, task = entry
+            failed = task.done() and (task.cancelled() or task.exception() is not None)
+            if not failed and now - started < self.config.ttl_seconds:
+                self._tasks.move_to_end(key)
+                if not speculative:
+                    self.hits += 1
+                return task
+            del self._tasks[key]
+
+        task = asyncio.create_task(fetch())
+        task.add_done_callback(_consume_exception)
+        self._tasks[key] = (now, task)
+        if speculative:
+            self.prefetched += 1
+        else:
+            self.misses += 1
+        while len(self._tasks) > self.config.max_entries:
+            self._tasks.popitem(last=False)
+        return task
+
+    def _item_task(self, work_item_id: int, speculative: bool = False) -> asyncio.Task:
+        return self._task(
+            "item", work_item_id,
+            lambda: self.client.get_work_item(work_item_id, expand_relations=True), speculative,
+        )
+
+    def _comments_task(self, work_item_id: int, speculative: bool = False) -> asyncio.Task:
+        return self._task("comments", work_item_id, lambda: self.client.get_comments(work_item_id), speculative)
+
+    def _related_task(
+        self, work_item_id: int, speculative: bool = False, item: Optional[Dict[str, Any]] = None
+    ) -> asyncio.Task:
+        async def _fetch() -> List[Dict[str, Any]]:
+            # A supplied copy without relations (e.g. from the mirror) can't name the related items
+            source = item if item is not None and "relations" in item else await self._item_task(
+                work_item_id, speculative=True
+            )
+            ids = related_ids(source)[:self.config.max_related]
+            return await self.client.get_work_items(ids) if ids else []
+
+        return self._task("related", work_item_id, _fetch, speculative)
+
+    def prefetch(self, work_item_id: int, item: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Start fetching a work item, its comments and its related items in the background.
+
+        Returns immediately; fetches already cached or in flight are not repeated.
+
+        Args:
+            work_item_id: Action id
+            item: Copy of the work item the model already has (e.g. from the mirror).
+                  The work item itself isn't fetched; its relations are used for the
+                  related items when present, otherwise the item is fetched for them.
+        """
+        work_item_id = int(work_item_id)
+        if item is None:
+            self._item_task(work_item_id, speculative=True)
+        if self.config.include_comments:
+            self._comments_task(work_item_id, speculative=True)
+        if self.config.include_related:
+            self._related_task(work_item_id, speculative=True, item=item)
+        logger.info(f"[PREFETCH] Started background fetch for action {work_item_id}")
+
+    async def get_work_item(self, work_item_id: int) -> Optional[Dict[str, Any]]:
+        """Work item with relations, from the prefetch cache when available."""
+        return await asyncio.shield(self._item_task(int(work_item_id)))
+
+    async def get_comments(self, work_item_id: int) -> List[Dict[str, Any]]:
+        """Discussion comments, from the prefetch cache when available."""
+        return await asyncio.shield(self._comments_task(int(work_item_id)))
+
+    async def get_related(self, work_item_id: int) -> List[Dict[str, Any]]:
+        """Related work items, from the prefetch cache when available."""
+        return await asyncio.shield(self._related_task(int(work_item_id)))
+
+    async def get_details(
+        self, work_item_id: int, include_comments: bool = True, include_related: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Work item, comments and related items, fetched concurrently.
+
+        Returns:
+            {"work_item", "comments", "related"}; a part that fails to load is
+            reported under "errors" instead of failing the whole call
+        """
+        parts: Dict[str, Awaitable[Any]] = {"work_item": self.get_work_item(work_item_id)}
+        if include_comments:
+            parts["comments"] = self.get_comments(work_item_id)
+        if include_related:
+            parts["related"] = self.get_related(work_item_id)
+        results = await asyncio.gather(*parts.values(), return_exceptions=True)
+        details: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        for name, result in zip(parts, results):
+            if isinstance(result, BaseException):
+                errors[name] = str(result)
+                result = None
+            details[name] = result
+        if errors:
+            details["errors"] = errors
+        return details
+
+    def as_tool(self) -> Callable[..., Any]:
+        """
+        Expose prefetched details as a function tool the agent can call.
+
+        Returns:
+            An async function whose signature and docstring describe the tool to the model
+        """
+        prefetcher = self
+
+        async def get_action_details(
+            work_item_id: int,
+            include_comments: bool = True,
+            include_related: bool = True,
+        ) -> str:
+            """
+            Get an Action with its relations, discussion comments and related work items in one call.
+            Faster than separate Azure DevOps tool calls: results are usually already fetched.
+            Returns JSON with work_item, comments and related (each related item with id and fields).
+            """
+            details = await prefetcher.get_details(work_item_id, include_comments, include_related)
+            return json.dumps(details, default=str)
+
+        return get_action_details
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters."""
+        return {
+            "entries": len(self._tasks),
+            "prefetched": self.prefetched,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    """Mark a speculative fetch's failure as retrieved so unawaited failures aren't logged as errors."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug(f"[PREFETCH] Fetch failed: {task.exception()}")
+
+
+def prefetch_config_from_env() -> PrefetchConfig:
+    """Build a PrefetchConfig from PREFETCH_* environment variables."""
+    return PrefetchConfig(
+        enabled=os.getenv("PREFETCH_ENABLED", "true").lower() in ("1", "true", "yes"),
+        max_related=int(os.getenv("PREFETCH_MAX_RELATED", 20)),
+        ttl_seconds=float(os.getenv("PREFETCH_TTL_SECONDS", 120)),
+    )
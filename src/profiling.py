@@ -0,0 +1,456 @@
+"""
+On-demand diagnostics for a live API process: CPU samples, memory diffs and event-loop lag.
+
+SamplingProfiler reads thread stacks from a helper thread at a fixed interval
+for a bounded time, so it can be attached to a running server and adds no
+overhead outside a capture. MemoryTracker starts tracemalloc on demand and
+diffs snapshots to show which allocation sites grew between them (leaks from
+long-lived agents, session buffers, caches). LoopLagMonitor measures how late
+the event loop wakes up from a short sleep. A watchdog thread records the
+loop thread's stack whenever the loop stalls, which pins down synchronous
+calls (file logging, subprocess waits, SQLite) made from async code.
+"""
+
+import asyncio
+import bisect
+import hmac
+import logging
+import os
+import sys
+import sysconfig
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import SecretStr
+
+from src.models.config import ProfilingConfig
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the lag histogram buckets; the last bucket is open-ended
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+MAX_STACK_DEPTH = 64
+
+_PATH_PREFIXES = sorted(
+    {p for p in (sysconfig.get_paths().get("purelib"), sysconfig.get_paths().get("stdlib"), os.getcwd()) if p},
+    key=len, reverse=True,
+)
+
+Frame = Tuple[str, int, str]  # (filename, line, function)
+
+
+def _short_path(filename: str) -> str:
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            return filename[len(prefix):].lstrip(os.sep)
+    return filename
+
+
+def _stack(frame: Any, limit: int = MAX_STACK_DEPTH) -> Tuple[Frame, ...]:
+    """Frames from outermost to innermost (at most `limit`, innermost kept)."""
+    frames: List[Frame] = []
+    while frame is not None and len(frames) < limit:
+        frames.append((_short_path(frame.f_code.co_filename), frame.f_lineno, frame.f_code.co_name))
+        frame = frame.f_back
+    return tuple(reversed(frames))
+
+
+def _label(frame: Frame) -> str:
+    filename, line, function = frame
+    return f"{function} ({filename}:{line})"
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class SamplingProfiler:
+    """
+    Statistical CPU profiler sampling thread stacks from a background thread.
+
+    Each sample records the current stack of every profiled thread; functions
+    that show up in many samples are where the time goes. Functions are keyed
+    by their current line, so the "self" ranking points at hot lines.
+    """
+
+    def __init__(self, interval_seconds: float = 0.005, thread_ids: Optional[Iterable[int]] = None):
+        """
+        Initialize the profiler.
+
+        Args:
+            interval_seconds: Time between samples
+            thread_ids: Threads to sample. Defaults to every thread but the sampler's own.
+        """
+        self.interval_seconds = max(interval_seconds, 0.001)
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample_loop(self) -> None:
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        started = time.perf_counter()
+        while not self._stop.wait(self.interval_seconds):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                self.stacks[(names.get(thread_id, str(thread_id)), _stack(frame))] += 1
+            self.samples += 1
+        self.duration_seconds = time.perf_counter() - started
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._sample_loop, name="cpu-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    async def run(self, seconds: float) -> Dict[str, Any]:
+        """Sample for `seconds` without blocking the event loop, then report."""
+        self.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await asyncio.to_thread(self.stop)
+        return self.report()
+
+    def report(self, limit: int = 30) -> Dict[str, Any]:
+        """
+        Summarize the samples.
+
+        Returns:
+            "self": innermost frames by sample count; "total": functions by samples
+            they appear in (inclusive); "collapsed": folded stacks
+            ("thread;outer;...;inner count") for flame graph tools
+        """
+        own: Counter = Counter()
+        inclusive: Counter = Counter()
+        for (_, stack), count in self.stacks.items():
+            if not stack:
+                continue
+            own[_label(stack[-1])] += count
+            for filename, function in {(filename, function) for filename, _, function in stack}:
+                inclusive[f"{function} ({filename})"] += count
+        samples = sum(self.stacks.values()) or 1
+
+        def ranked(counter: Counter) -> List[Dict[str, Any]]:
+            return [
+                {"function": name, "samples": count, "percent": round(100.0 * count / samples, 1)}
+                for name, count in counter.most_common(limit)
+            ]
+
+        return {
+            "duration_seconds": round(self.duration_seconds, 3),
+            "interval_ms": self.interval_seconds * 1000,
+            "samples": self.samples,
+            "stack_samples": sum(self.stacks.values()),
+            "self": ranked(own),
+            "total": ranked(inclusive),
+            "collapsed": [
+                ";".join([thread, *(_label(f) for f in stack)]) + f" {count}"
+                for (thread, stack), count in self.stacks.most_common()
+            ],
+        }
+
+
+class MemoryTracker:
+    """Takes tracemalloc snapshots on demand and diffs them by allocation site."""
+
+    # Allocations made by the tracing machinery itself
+    _FILTERS = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    )
+
+    def __init__(self, frames: int = 25, max_snapshots: int = 5):
+        """
+        Initialize the tracker.
+
+        Args:
+            frames: Stack frames stored per allocation when this tracker starts tracing
+            max_snapshots: Snapshots kept; the oldest is dropped beyond this
+        """
+        self.frames = frames
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[int, Tuple[float, tracemalloc.Snapshot]]" = OrderedDict()
+        self._next_id = 1
+        self._started_here = False
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        """Start tracing allocations (only allocations made from now on are seen)."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_here = True
+            logger.info(f"[DEBUG] tracemalloc started ({self.frames} frames)")
+
+    def stop(self) -> None:
+        """Stop tracing (if this tracker started it) and drop the snapshots."""
+        self._snapshots.clear()
+        if self._started_here and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info("[DEBUG] tracemalloc stopped")
+        self._started_here = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Take a snapshot, starting tracing first if needed.
+
+        Returns:
+            Snapshot id, time and traced memory totals
+        """
+        self.start()
+        snapshot = tracemalloc.take_snapshot().filter_traces(self._FILTERS)
+        snapshot_id = self._next_id
+        self._next_id += 1
+        self._snapshots[snapshot_id] = (time.time(), snapshot)
+        while len(self._snapshots) > self.max_snapshots:
+            self._snapshots.popitem(last=False)
+        current, peak = tracemalloc.get_traced_memory()
+        return {"id": snapshot_id, "taken_at": self._snapshots[snapshot_id][0], "traced_bytes": current, "peak_bytes": peak}
+
+    def _get(self, snapshot_id: int) -> Tuple[float, tracemalloc.Snapshot]:
+        try:
+            return self._snapshots[snapshot_id]
+        except KeyError:
+            raise ValueError(f"Unknown snapshot {snapshot_id} (have: {list(self._snapshots) or 'none'})")
+
+    def diff(
+        self,
+        base_id: Optional[int] = None,
+        target_id: Optional[int] = None,
+        key_type: str = "lineno",
+        limit: int = 25,
+    ) -> Dict[str, Any]:
+        """
+        Allocation sites that grew (or shrank) most between two snapshots.
+
+        Args:
+            base_id: Earlier snapshot. Defaults to the one before the target.
+            target_id: Later snapshot. Defaults to the latest.
+            key_type: "lineno", "filename" or "traceback" (full allocation stacks)
+            limit: Sites to return, largest size change first
+
+        Raises:
+            ValueError: If fewer than two snapshots exist, an id is unknown or key_type is invalid
+        """
+        if key_type not in ("lineno", "filename", "traceback"):
+            raise ValueError("key_type must be lineno, filename or traceback")
+        ids = list(self._snapshots)
+        target_id = target_id if target_id is not None else (ids[-1] if ids else None)
+        if base_id is None:
+            earlier = [i for i in ids if target_id is not None and i < target_id]
+            base_id = earlier[-1] if earlier else None
+        if base_id is None or target_id is None:
+            raise ValueError("Need two snapshots to diff; take another snapshot first")
+        base_at, base = self._get(base_id)
+        target_at, target = self._get(target_id)
+        stats = target.compare_to(base, key_type)
+        return {
+            "base": base_id,
+            "target": target_id,
+            "elapsed_seconds": round(target_at - base_at, 3),
+            "size_diff_bytes": sum(s.size_diff for s in stats),
+            "count_diff": sum(s.count_diff for s in stats),
+            "top": [
+                {
+                    "location": [f"{_short_path(f.filename)}:{f.lineno}" for f in s.traceback]
+                    if key_type == "traceback" else f"{_short_path(s.traceback[0].filename)}:{s.traceback[0].lineno}",
+                    "size_diff_bytes": s.size_diff,
+                    "size_bytes": s.size,
+                    "count_diff": s.count_diff,
+                    "count": s.count,
+                }
+                for s in stats[:limit]
+            ],
+        }
+
+    def status(self) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "frames": tracemalloc.get_traceback_limit() if tracemalloc.is_tracing() else self.frames,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "snapshots": [{"id": i, "taken_at": at} for i, (at, _) in self._snapshots.items()],
+        }
+
+
+class LoopLagMonitor:
+    """
+    Histogram of event-loop wake-up lag, with the stacks of calls that stalled the loop.
+
+    A task sleeps for a fixed interval and records how late it wakes up. A
+    watchdog thread checks the task's heartbeat; when the loop has not run for
+    longer than the threshold, it captures the loop thread's current stack,
+    which is the synchronous call holding it.
+    """
+
+    def __init__(self, interval_seconds: float = 0.1, threshold_ms: float = 100.0, max_stacks: int = 20):
+        """
+        Initialize the monitor.
+
+        Args:
+            interval_seconds: Probe interval
+            threshold_ms: Stall length after which the blocking stack is captured
+            max_stacks: Distinct blocking stacks kept (least frequent dropped first)
+        """
+        self.interval_seconds = interval_seconds
+        self.threshold_ms = threshold_ms
+        self.max_stacks = max_stacks
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread: Optional[int] = None
+        self._heartbeat = time.monotonic()
+        self._captured_heartbeat: Optional[float] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear the histogram and the captured stacks."""
+        with self._lock:
+            self.buckets = [0] * (len(LAG_BUCKETS_MS) + 1)
+            self.count = 0
+            self.total_ms = 0.0
+            self.max_ms = 0.0
+            self.recent: Deque[float] = deque(maxlen=1000)
+            self.blocking: Dict[Tuple[Frame, ...], Dict[str, Any]] = {}
+            self.since = time.time()
+
+    def reconfigure(self, interval_seconds: float, threshold_ms: float) -> None:
+        self.interval_seconds = interval_seconds
+        self.threshold_ms = threshold_ms
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def record(self, lag_ms: float) -> None:
+        """Add one lag measurement to the histogram."""
+        with self._lock:
+            self.buckets[bisect.bisect_left(LAG_BUCKETS_MS, lag_ms)] += 1
+            self.count += 1
+            self.total_ms += lag_ms
+            self.max_ms = max(self.max_ms, lag_ms)
+            self.recent.append(lag_ms)
+
+    async def _probe(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval_seconds
+            await asyncio.sleep(self.interval_seconds)
+            now = time.monotonic()
+            self._heartbeat = now
+            self.record(max(0.0, (now - expected) * 1000))
+
+    def _watch(self) -> None:
+        while not self._stop.wait(max(self.threshold_ms / 2000, 0.005)):
+            heartbeat = self._heartbeat
+            stalled_ms = (time.monotonic() - heartbeat - self.interval_seconds) * 1000
+            if stalled_ms < self.threshold_ms or heartbeat == self._captured_heartbeat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            self._captured_heartbeat = heartbeat
+            self._record_blocking(_stack(frame, limit=20), stalled_ms)
+
+    def _record_blocking(self, stack: Tuple[Frame, ...], stalled_ms: float) -> None:
+        with self._lock:
+            entry = self.blocking.get(stack)
+            if entry is None:
+                if len(self.blocking) >= self.max_stacks:
+                    del self.blocking[min(self.blocking, key=lambda k: self.blocking[k]["count"])]
+                entry = self.blocking[stack] = {"count": 0, "max_stall_ms": 0.0}
+            entry["count"] += 1
+            entry["max_stall_ms"] = max(entry["max_stall_ms"], stalled_ms)
+            entry["last_seen"] = time.time()
+        logger.warning(f"[DEBUG] Event loop blocked {stalled_ms:.0f}ms in {_label(stack[-1]) if stack else '?'}")
+
+    def start(self) -> None:
+        """Start probing the running loop and watching for stalls."""
+        if self.running:
+            return
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._probe())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Histogram, percentiles and blocking stacks (most frequent first)."""
+        with self._lock:
+            recent = list(self.recent)
+            blocking = sorted(self.blocking.items(), key=lambda item: item[1]["count"], reverse=True)
+            return {
+                "running": self.running,
+                "since": self.since,
+                "interval_ms": self.interval_seconds * 1000,
+                "threshold_ms": self.threshold_ms,
+                "samples": self.count,
+                "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+                "max_ms": round(self.max_ms, 3),
+                "p50_ms": round(_percentile(recent, 0.50), 3),
+                "p95_ms": round(_percentile(recent, 0.95), 3),
+                "p99_ms": round(_percentile(recent, 0.99), 3),
+                "histogram": [
+                    {"le_ms": bound, "count": count}
+                    for bound, count in zip([*LAG_BUCKETS_MS, "+Inf"], self.buckets)
+                ],
+                "blocking": [
+                    {**entry, "max_stall_ms": round(entry["max_stall_ms"], 1), "stack": [_label(f) for f in stack]}
+                    for stack, entry in blocking
+                ],
+            }
+
+
+def token_matches(config: ProfilingConfig, presented: Optional[str]) -> bool:
+    """Whether a presented debug token matches the configured one (no token configured = never)."""
+    expected = config.token.get_secret_value() if config.token else ""
+    if not expected or presented is None:
+        return False
+    # compare_digest only accepts ASCII str; compare UTF-8 bytes so any header value is safe
+    return hmac.compare_digest(presented.encode("utf-8"), expected.encode("utf-8"))
+
+
+def profiling_config_from_env() -> ProfilingConfig:
+    """Build a ProfilingConfig from DEBUG_* environment variables."""
+    token = os.getenv("DEBUG_TOKEN")
+    return ProfilingConfig(
+        enabled=os.getenv("DEBUG_ENDPOINTS", "false").lower() in ("1", "true", "yes"),
+        token=SecretStr(token) if token else None,
+        max_profile_seconds=float(os.getenv("DEBUG_MAX_PROFILE_SECONDS", 60)),
+        lag_threshold_ms=float(os.getenv("DEBUG_LAG_THRESHOLD_MS", 100)),
+    )
@@ -0,0 +1,352 @@
+"""
+Routing accuracy-versus-cost benchmark.
+
+Runs a labelled set of Actions through a routing backend and reports accuracy
+against the expected decisions alongside token counts, model turns, tool calls
+and latency percentiles, then diffs the report against a stored baseline.
+
+Backends:
+    RulesBackend   deterministic rules from src.routing_rules (no model)
+    AgentBackend   a TechRobAgent (live, or any stand-in exposing process_query);
+                   can record its responses for later replay
+    ReplayBackend  recorded responses, so a run needs no network or credentials
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import statistics
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+from src.bulk_routing import extract_routing_json
+from src.instruction_compiler import compile_instructions, instruction_config_from_env
+from src.models.config import InstructionConfig
+from src.routing_rules import TAG_PREFIX, route_record
+
+logger = logging.getLogger(__name__)
+
+# Metric -> (direction that counts as worse, relative tolerance, absolute tolerance) for compare()
+REGRESSION_THRESHOLDS = {
+    "accuracy": ("down", 0.0, 0.0),
+    "tokens_mean": ("up", 0.10, 50),
+    "model_turns_mean": ("up", 0.10, 0.1),
+    "tool_calls_mean": ("up", 0.10, 0.1),
+    "latency_p95_ms": ("up", 0.20, 250),
+}
+
+
+def instruction_fingerprint(instructions: str, deployment: Optional[str] = None) -> str:
+    """Short stable hash identifying an instruction variant (and deployment)."""
+    digest = hashlib.sha256(f"{deployment or ''}\n{instructions}".encode("utf-8")).hexdigest()
+    return digest[:12]
+
+
+def prompt_text(instructions: str, config: Optional[InstructionConfig] = None) -> str:
+    """
+    Instruction text as TechRobAgent sends it, for fingerprinting raw instruction files.
+
+    With the instruction compiler enabled (INSTRUCTION_* env vars by default) this
+    is the compiled static prefix plus the dynamic suffix template, matching what
+    AgentBackend fingerprints for an agent built from the same file.
+    """
+    config = config or instruction_config_from_env()
+    if not config.enabled:
+        return instructions
+    compiled = compile_instructions(instructions, config)
+    return compiled.prefix + compiled.suffix_template
+
+
+def load_cases(path: str) -> List[Dict[str, Any]]:
+    """
+    Load labelled cases from JSONL.
+
+    Each line: {"id", "expected": {"tag" | "type" | "assigned_to"...}, "action": {...}, "query": optional}.
+    "expected_tag": "<tag>" is accepted as shorthand for {"expected": {"tag": "<tag>"}}.
+    """
+    cases = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            case = json.loads(line)
+            if "expected" not in case and "expected_tag" in case:
+                case["expected"] = {"tag": case.pop("expected_tag")}
+            cases.append(case)
+    return cases
+
+
+def _normalize(value: Any) -> str:
+    text = str(value or "").strip().lower()
+    return text[len(TAG_PREFIX.lower()):] if text.startswith(TAG_PREFIX.lower()) else text
+
+
+def decision_label(decision: Optional[Dict[str, Any]]) -> str:
+    """One-word summary of a decision: its tag, or "DIRECT: <assignee>"."""
+    inner = (decision or {}).get("decision") or {}
+    if inner.get("type") == "DIRECT":
+        return f"DIRECT: {(inner.get('direct_routing') or {}).get('assigned_to')}"
+    return inner.get("tag") or inner.get("type") or "NONE"
+
+
+def is_correct(expected: Dict[str, Any], decision: Optional[Dict[str, Any]]) -> bool:
+    """
+    Whether a decision satisfies every expected key.
+
+    Tags compare case-insensitively with or without the "Tech RoB | " prefix;
+    "assigned_to", "area_path" and "priority" are read from direct_routing.
+    """
+    inner = (decision or {}).get("decision") or {}
+    direct = inner.get("direct_routing") or {}
+    for key, want in expected.items():
+        have = direct.get(key) if key in ("assigned_to", "area_path", "priority") else inner.get(key)
+        if _normalize(have) != _normalize(want):
+            return False
+    return True
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile, or None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def action_query(case: Dict[str, Any]) -> str:
+    """Query sent to an agent backend: the case's own query, or the standard routing request with the exported data inlined."""
+    if case.get("query"):
+        return case["query"]
+    query = f"Analyze action {case['id']} and provide routing recommendation"
+    if case.get("action"):
+        query += (
+            ". All Action data is included below, so do not fetch it again.\n\n"
+            f"{json.dumps(case['action'], default=str, indent=2)}"
+        )
+    return query
+
+
+class RulesBackend:
+    """Deterministic routing rules; zero tokens and no model turns."""
+
+    name = "rules"
+    fingerprint = "rules"
+
+    async def route(self, case: Dict[str, Any]) -> Dict[str, Any]:
+        decision = route_record({"id": case["id"], **(case.get("action") or {})})
+        return {"decision": decision, "total_tokens": 0, "model_turns": 0, "tool_calls": 0}
+
+
+class AgentBackend:
+    """
+    Route through an agent, optionally recording responses for ReplayBackend.
+
+    The agent needs `process_query(query)`, `instructions` and, for cost
+    metrics, `last_run_stats` (as set by TechRobAgent).
+    """
+
+    name = "agent"
+
+    def __init__(self, agent: Any, record_path: Optional[str] = None):
+        """
+        Args:
+            agent: Routing agent (TechRobAgent or stand-in)
+            record_path: JSONL file to append recorded responses to
+        """
+        self.agent = agent
+        self.record_path = record_path
+        compiled = getattr(agent, "compiled_instructions", None)
+        instructions = compiled.prefix + compiled.suffix_template if compiled else getattr(agent, "instructions", "")
+        self.fingerprint = instruction_fingerprint(instructions, getattr(agent, "model_deployment_name", None))
+        # One agent instance: keep its per-run stats attributable to one query at a time
+        self._lock = asyncio.Lock()
+
+    async def route(self, case: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._lock:
+            started = time.perf_counter()
+            response = await self.agent.process_query(action_query(case))
+            latency_ms = round((time.perf_counter() - started) * 1000, 1)
+            stats = dict(getattr(self.agent, "last_run_stats", None) or {})
+        if self.record_path:
+            with open(self.record_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({
+                    "id": case["id"],
+                    "fingerprint": self.fingerprint,
+                    "response": response,
+                    "stats": stats,
+                    "latency_ms": latency_ms,
+                }, default=str) + "\n")
+        return {"decision": extract_routing_json(response), **stats, "latency_ms": latency_ms}
+
+
+class ReplayBackend:
+    """Serve recorded agent responses (see AgentBackend.record_path)."""
+
+    name = "replay"
+
+    def __init__(self, path: str, fingerprint: Optional[str] = None, latency: bool = False):
+        """
+        Args:
+            path: Recording JSONL
+            fingerprint: Only replay responses recorded for this instruction variant;
+                         None replays the latest recording per case
+            latency: Sleep for the recorded latency so latency percentiles are comparable
+        """
+        self.recordings: Dict[str, Dict[str, Any]] = {}
+        self.latency = latency
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if fingerprint is None or record.get("fingerprint") == fingerprint:
+                    self.recordings[str(record["id"])] = record
+        fingerprints = {r.get("fingerprint") for r in self.recordings.values()}
+        self.fingerprint = fingerprints.pop() if len(fingerprints) == 1 else "mixed"
+
+    async def route(self, case: Dict[str, Any]) -> Dict[str, Any]:
+        record = self.recordings.get(str(case["id"]))
+        if record is None:
+            raise KeyError(f"No recorded response for case {case['id']}")
+        stats = dict(record.get("stats") or {})
+        if self.latency and record.get("latency_ms"):
+            await asyncio.sleep(record["latency_ms"] / 1000)
+        return {"decision": extract_routing_json(record["response"]), **stats}
+
+
+async def run_benchmark(
+    cases: List[Dict[str, Any]],
+    backend: Any,
+    concurrency: int = 4,
+    variant: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Route every case and summarize accuracy and cost.
+
+    Args:
+        cases: Labelled cases (see load_cases)
+        backend: Object with async `route(case)` returning {"decision", token/turn/tool stats}
+                 and optionally "latency_ms" (time spent routing, excluding any queueing
+                 inside the backend); otherwise the call's wall-clock time is used
+        concurrency: Cases routed concurrently
+        variant: Label for the instruction variant under test
+
+    Returns:
+        {"meta", "summary", "confusion", "cases": [...]}
+    """
+    slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def _one(case: Dict[str, Any]) -> Dict[str, Any]:
+        async with slots:
+            started = time.perf_counter()
+            try:
+                outcome = await backend.route(case)
+                error = None
+            except Exception as e:
+                logger.warning(f"[BENCH] Case {case['id']} failed: {e}")
+                outcome, error = {}, f"{type(e).__name__}: {e}"
+            latency_ms = (time.perf_counter() - started) * 1000
+        decision = outcome.get("decision")
+        return {
+            "id": case["id"],
+            "expected": case.get("expected") or {},
+            "actual": decision_label(decision),
+            "matched_rule": ((decision or {}).get("reasoning") or {}).get("matched_rule"),
+            "correct": error is None and is_correct(case.get("expected") or {}, decision),
+            "error": error or (None if decision else "No parseable routing decision"),
+            "total_tokens": outcome.get("total_tokens"),
+            "model_turns": outcome.get("model_turns"),
+            "tool_calls": outcome.get("tool_calls"),
+            "latency_ms": round(outcome.get("latency_ms") or latency_ms, 1),
+        }
+
+    results = await asyncio.gather(*(_one(case) for case in cases))
+    return {
+        "meta": {
+            "backend": getattr(backend, "name", type(backend).__name__),
+            "variant": variant,
+            "fingerprint": getattr(backend, "fingerprint", None),
+            "cases": len(cases),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "summary": summarize(results),
+        "confusion": confusion(results),
+        "cases": results,
+    }
+
+
+def _mean(values: List[Optional[float]]) -> Optional[float]:
+    present = [v for v in values if v is not None]
+    return round(statistics.fmean(present), 2) if present else None
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate accuracy, cost and latency metrics over case results."""
+    latencies = [r["latency_ms"] for r in results]
+    tokens = [r["total_tokens"] for r in results if r["total_tokens"] is not None]
+    return {
+        "accuracy": round(sum(r["correct"] for r in results) / len(results), 4) if results else None,
+        "correct": sum(r["correct"] for r in results),
+        "errors": sum(1 for r in results if r["error"]),
+        "tokens_total": sum(tokens) if tokens else None,
+        "tokens_mean": _mean(tokens),
+        "model_turns_mean": _mean([r["model_turns"] for r in results]),
+        "tool_calls_mean": _mean([r["tool_calls"] for r in results]),
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p90_ms": percentile(latencies, 90),
+        "latency_p95_ms": percentile(latencies, 95),
+        "latency_p99_ms": percentile(latencies, 99),
+        "latency_max_ms": max(latencies) if latencies else None,
+    }
+
+
+def confusion(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """Expected label -> {actual label: count}."""
+    matrix: Dict[str, Counter] = defaultdict(Counter)
+    for r in results:
+        expected = r["expected"].get("tag") or (
+            f"DIRECT: {r['expected'].get('assigned_to')}" if r["expected"].get("type") == "DIRECT"
+            else r["expected"].get("type")
+        )
+        matrix[str(expected)][r["actual"]] += 1
+    return {expected: dict(actual) for expected, actual in matrix.items()}
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Diff a report against a baseline report.
+
+    Returns:
+        {"metrics": {name: {"baseline", "current", "delta"}}, "regressions": [metric names
+        beyond REGRESSION_THRESHOLDS], "newly_wrong": [ids], "newly_right": [ids], "regressed": bool}
+    """
+    metrics = {}
+    regressions = []
+    for name, (worse, relative, absolute) in REGRESSION_THRESHOLDS.items():
+        old, new = baseline["summary"].get(name), report["summary"].get(name)
+        if old is None or new is None:
+            metrics[name] = {"baseline": old, "current": new, "delta": None}
+            continue
+        delta = new - old
+        metrics[name] = {"baseline": old, "current": new, "delta": round(delta, 4)}
+        allowed = max(abs(old) * relative, absolute)
+        if (worse == "up" and delta > allowed) or (worse == "down" and -delta > allowed):
+            regressions.append(name)
+
+    old_correct = {str(c["id"]): c["correct"] for c in baseline.get("cases", [])}
+    new_correct = {str(c["id"]): c["correct"] for c in report.get("cases", [])}
+    shared = old_correct.keys() & new_correct.keys()
+    newly_wrong = sorted(i for i in shared if old_correct[i] and not new_correct[i])
+    newly_right = sorted(i for i in shared if new_correct[i] and not old_correct[i])
+    return {
+        "baseline": baseline.get("meta"),
+        "metrics": metrics,
+        "regressions": regressions,
+        "newly_wrong": newly_wrong,
+        "newly_right": newly_right,
+        "regressed": bool(regressions or newly_wrong),
+    }
@@ -0,0 +1,250 @@
+"""
+Structured routing output: prompt directive, incremental JSON parsing and validation.
+
+In structured mode the routing agent answers with a single JSON object
+(RoutingDecision) whose "decision" comes first and whose human-readable
+"summary" comes last. IncrementalJSONParser consumes the stream as it
+arrives, so the tag, owner and priority are available before the summary has
+finished generating.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from src.models.routing import RoutingDecision
+
+# Appended to the user query (not the instructions) so the cached instruction prefix is unchanged
+STRUCTURED_OUTPUT_DIRECTIVE = (
+    "Respond with the MACHINE READABLE JSON object only, with no text before or after it and no code fence. "
+    "Emit \"decision\" as the first field. Put the HUMAN READABLE SUMMARY in a final \"summary\" string field."
+)
+
+# Fields worth acting on as soon as they are known
+KEY_FIELDS = (
+    "decision.type",
+    "decision.tag",
+    "decision.direct_routing.assigned_to",
+    "decision.direct_routing.area_path",
+    "decision.direct_routing.priority",
+    "reasoning.confidence",
+)
+
+_WHITESPACE = " \t\r\n"
+
+
+class RoutingOutputError(ValueError):
+    """The model's output could not be parsed into a RoutingDecision."""
+
+    def __init__(self, message: str, raw: str):
+        super().__init__(message)
+        self.raw = raw
+
+
+@dataclass
+class JSONEvent:
+    """A value surfaced by the incremental parser."""
+
+    path: str
+    value: Any
+    partial: bool = False  # True for an incremental delta of a streamed string
+
+
+class IncrementalJSONParser:
+    """
+    Streaming parser for one JSON object embedded in text.
+
+    Text before the first "{" (prose, a code fence) and after the object closes
+    is ignored. feed() returns an event for every scalar completed by that
+    chunk, keyed by dotted path ("decision.tag", "asks.0.summary"). Strings
+    whose path is in `stream_strings` are also surfaced as they grow, as
+    partial deltas.
+    """
+
+    def __init__(self, stream_strings: Iterable[str] = ("summary",)):
+        self.stream_strings = set(stream_strings)
+        self.done = False
+        self._started = False
+        self._raw: List[str] = []
+        # Stack of [kind, key_or_index, expecting_key]
+        self._stack: List[list] = []
+        self._string: Optional[List[str]] = None
+        self._string_is_key = False
+        self._escape = False
+        self._scalar: Optional[List[str]] = None
+        self._streamed = 0
+
+    def _path(self) -> str:
+        return ".".join(str(frame[1]) for frame in self._stack if frame[1] is not None)
+
+    def _value_done(self, events: List[JSONEvent], value: Any) -> None:
+        if self._stack:
+            events.append(JSONEvent(self._path(), value))
+
+    def _flush_scalar(self, events: List[JSONEvent]) -> None:
+        if self._scalar is None:
+            return
+        token = "".join(self._scalar)
+        self._scalar = None
+        try:
+            value = json.loads(token)
+        except json.JSONDecodeError:
+            value = token
+        self._value_done(events, value)
+
+    def _decoded(self, raw: str) -> str:
+        """Decode a (possibly incomplete) JSON string body up to its last complete character."""
+        cut = len(raw)
+        backslash = raw.rfind("\\")
+        if backslash >= 0:
+            tail = raw[backslash:]
+            # Trailing "\" or an unfinished "\uXXXX" escape
+            if len(tail) == 1 or (tail[1] == "u" and len(tail) < 6):
+                cut = backslash
+        try:
+            return json.loads(f'"{raw[:cut]}"')
+        except json.JSONDecodeError:
+            return ""
+
+    def feed(self, chunk: str) -> List[JSONEvent]:
+        """
+        Consume the next chunk of streamed text.
+
+        Returns:
+            Events for values completed (or streamed strings extended) by this chunk
+        """
+        events: List[JSONEvent] = []
+        for char in chunk:
+            if self.done:
+                break
+            if not self._started:
+                if char != "{":
+                    continue
+                self._started = True
+            self._raw.append(char)
+
+            if self._string is not None:
+                if self._escape:
+                    # The character after a backslash never ends the string ("\uXXXX" digits can't either)
+                    self._escape = False
+                    self._string.append(char)
+                elif char == "\\":
+                    self._escape = True
+                    self._string.append(char)
+                elif char == '"':
+                    raw = "".join(self._string)
+                    self._string = None
+                    text = self._decoded(raw)
+                    if self._string_is_key:
+                        self._stack[-1][1] = text
+                    elif self._path() in self.stream_strings:
+                        if len(text) > self._streamed:
+                            events.append(JSONEvent(self._path(), text[self._streamed:], partial=True))
+                        self._streamed = 0
+                    else:
+                        self._value_done(events, text)
+                else:
+                    self._string.append(char)
+                continue
+
+            if self._scalar is not None:
+                if char in ",}]" or char in _WHITESPACE:
+                    self._flush_scalar(events)
+                else:
+                    self._scalar.append(char)
+                    continue
+
+            if char in _WHITESPACE:
+                continue
+            if char == "{":
+                self._stack.append(["object", None, True])
+            elif char == "[":
+                self._stack.append(["array", 0, False])
+            elif char in "}]":
+                self._stack.pop()
+                if not self._stack:
+                    self.done = True
+            elif char == ":":
+                self._stack[-1][2] = False
+            elif char == ",":
+                frame = self._stack[-1]
+                if frame[0] == "object":
+                    frame[2] = True
+                else:
+                    frame[1] += 1
+            elif char == '"':
+                self._string = []
+                self._string_is_key = self._stack[-1][0] == "object" and self._stack[-1][2]
+                self._streamed = 0
+            else:
+                self._scalar = [char]
+
+        # Surface the growing tail of a streamed string
+        if self._string is not None and not self._string_is_key and self._path() in self.stream_strings:
+            text = self._decoded("".join(self._string))
+            if len(text) > self._streamed:
+                events.append(JSONEvent(self._path(), text[self._streamed:], partial=True))
+                self._streamed = len(text)
+        return events
+
+    @property
+    def text(self) -> str:
+        """Raw JSON text consumed so far."""
+        return "".join(self._raw)
+
+    def result(self) -> RoutingDecision:
+        """
+        Validate the completed object.
+
+        Raises:
+            RoutingOutputError: If the object is incomplete or fails validation
+        """
+        if not self.done:
+            raise RoutingOutputError("Routing output ended before the JSON object was complete", self.text)
+        return parse_routing_decision(self.text)
+
+
+def _first_json_object(text: str) -> Optional[str]:
+    parser = IncrementalJSONParser(stream_strings=())
+    parser.feed(text)
+    return parser.text if parser.done else None
+
+
+def parse_routing_decision(text: str) -> RoutingDecision:
+    """
+    Parse and validate a routing decision from model output.
+
+    Accepts a bare JSON object, or free text (e.g. the classic summary followed by
+    "--- MACHINE READABLE JSON ---") containing one; in the latter case a summary
+    before the JSON is kept as `summary` unless the object has its own.
+
+    Raises:
+        RoutingOutputError: If no valid RoutingDecision can be read
+    """
+    text = text or ""
+    marker = text.find("MACHINE READABLE JSON")
+    search_from = text.find("{", marker) if marker >= 0 else text.find("{")
+    if search_from < 0:
+        raise RoutingOutputError("No JSON object in routing output", text)
+    candidate = _first_json_object(text[search_from:])
+    if candidate is None:
+        raise RoutingOutputError("Routing output contains an incomplete JSON object", text)
+    try:
+        data = json.loads(candidate)
+    except json.JSONDecodeError as e:
+        raise RoutingOutputError(f"Invalid JSON in routing output: {e}", text) from e
+    if isinstance(data, dict) and not data.get("summary"):
+        prose = text[:marker if marker >= 0 else search_from].strip().rstrip("-").strip()
+        if prose:
+            data["summary"] = prose
+    try:
+        return RoutingDecision.model_validate(data)
+    except ValidationError as e:
+        raise RoutingOutputError(f"Routing output failed validation: {e}", text) from e
+
+
+def key_fields(events: Iterable[JSONEvent]) -> List[Tuple[str, Any]]:
+    """The (path, value) pairs among events that downstream automation acts on."""
+    return [(e.path, e.value) for e in events if not e.partial and e.path in KEY_FIELDS]
@@ -0,0 +1,448 @@
+"""
+Deterministic Action routing stages mirroring config/instructions_routing.md.
+
+Identifier extraction, service taxonomy matching, requestor classification and
+the Phase 4-6 rule sequence run as plain Python so bulk re-routing doesn't
+need a model call per Action. Decisions the keyword heuristics can't make
+confidently are flagged for an optional model fallback.
+"""
+
+import html
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+TAG_PREFIX = "Tech RoB | "
+
+CONFIDENCE_HIGH = "HIGH"
+CONFIDENCE_MEDIUM = "MEDIUM"
+CONFIDENCE_LOW = "LOW"
+
+# ---------------------------------------------------------------------------
+# Phase 1: identifier extraction
+# ---------------------------------------------------------------------------
+
+_LABELED_IDENTIFIERS = [
+    ("IcM", re.compile(r"\b(?:icm|incident)\s*[#:]?\s*(\d{9})\b", re.IGNORECASE)),
+    ("SR", re.compile(r"\b(?:sr|support\s+request|case)\s*[#:]?\s*(\d{16})\b", re.IGNORECASE)),
+    ("GH", re.compile(r"\b(?:gh|gethelp|get\s+help)\s*[#:]?\s*(\d{8,10})\b", re.IGNORECASE)),
+]
+_BARE_NUMBER = re.compile(r"\b\d{8,16}\b")
+
+
+def extract_identifiers(text: str) -> List[str]:
+    """
+    Find support ticket identifiers, normalized as "SR#...", "IcM#..." and "GH#...".
+
+    Labeled numbers ("IcM 123456789", "GetHelp #12345678") are trusted first.
+    Unlabeled numbers are classified by length: 16 digits SR, 9 digits IcM,
+    8 or 10 digits GetHelp.
+    """
+    found: List[str] = []
+    claimed = set()
+    for label, pattern in _LABELED_IDENTIFIERS:
+        for match in pattern.finditer(text or ""):
+            found.append(f"{label}#{match.group(1)}")
+            claimed.add(match.group(1))
+    for match in _BARE_NUMBER.finditer(text or ""):
+        number = match.group(0)
+        if number in claimed:
+            continue
+        label = {16: "SR", 9: "IcM", 8: "GH", 10: "GH"}.get(len(number))
+        if label:
+            found.append(f"{label}#{number}")
+            claimed.add(number)
+    return list(dict.fromkeys(found))
+
+
+# ---------------------------------------------------------------------------
+# Phase 3: service taxonomy
+# ---------------------------------------------------------------------------
+
+# (solution area, sub-area owner, service names). More specific entries come first
+# so e.g. "GitHub Copilot" is not read as Microsoft Copilot.
+SERVICE_TAXONOMY: List[Tuple[str, Optional[str], List[str]]] = [
+    ("DATA_AI", "@GitHub Triage", ["GitHub Copilot", "GitHub"]),
+    ("SECURITY", None, [
+        "Microsoft Defender for Cloud", "Defender for Cloud", "Microsoft Defender", "Defender",
+        "Microsoft Sentinel", "Sentinel", "Microsoft Entra", "Entra ID", "Entra", "Azure AD",
+        "Microsoft Priva", "Priva", "Microsoft Purview", "Purview",
+    ]),
+    ("BUSINESS_APPS", None, [
+        "Dynamics 365", "D365", "Customer Engagement", "Finance & Operations", "Finance and Operations",
+        "Supply Chain Management",
+    ]),
+    ("MODERN_WORK", None, [
+        "Microsoft Teams", "Teams", "SharePoint Online", "SharePoint", "OneDrive for Business", "OneDrive",
+        "Microsoft 365 Apps", "Microsoft 365", "M365", "Office 365", "Microsoft Viva", "Viva",
+        "Microsoft Windows", "Windows 11", "Windows 365", "Microsoft Edge", "Microsoft Intune", "Intune",
+        "Copilot Studio", "Copilot Chat", "Microsoft 365 Copilot", "Microsoft Copilot", "Copilot",
+    ]),
+    ("DATA_AI", "@AI Apps and Agents Triage", [
+        "Azure OpenAI", "AOAI", "OpenAI", "Azure AI Search", "Cognitive Search", "Azure AI Foundry", "AI Foundry",
+        "Bot Service", "QnA Maker", "Azure Machine Learning", "Azure ML", "Document Intelligence",
+        "Form Recognizer", "Computer Vision", "Vision", "Speech", "Translator", "Anomaly Detector",
+        "Content Moderator", "Content Safety", "Personalizer", "Video Indexer", "Immersive Reader",
+        "Metrics Advisor",
+    ]),
+    ("DATA_AI", "@Analytics Triage", [
+        "Data Lake", "Databricks", "Stream Analytics", "Synapse", "Data Explorer", "Kusto", "Data Factory",
+        "Event Hubs", "Event Hub", "HDInsight", "Microsoft Fabric", "Fabric", "Time Series Insights", "Power BI",
+    ]),
+    ("DATA_AI", "@Data Platform Triage", [
+        "Azure SQL", "SQL Managed Instance", "SQL Server", "Cosmos DB", "PostgreSQL", "MySQL", "Redis",
+    ]),
+    ("DIGITAL_APP_INNOVATION", "@Developer Triage", [
+        ".NET Core", ".NET", "Azure SDK", "SDK", "Azure DevOps", "DevOps", "Visual Studio Code", "VS Code",
+        "Visual Studio", "App Center", "Azure App Service", "App Service", "Azure Functions", "Functions",
+        "API Management", "APIM", "Dapr", "Azure Kubernetes Service", "AKS", "Kubernetes",
+        "Azure Container Instances", "Container Instances", "Azure Container Registry", "Container Registry",
+        "Container Apps",
+    ]),
+    ("DIGITAL_APP_INNOVATION", "Niels Buit", ["Logic Apps", "Service Bus", "Event Grid", "Static Web Apps"]),
+    ("INFRASTRUCTURE", "Infrastructure Triage", [
+        "Virtual Machines", "Virtual Machine", "VMSS", "VMs", "VM", "Azure Virtual Desktop", "Networking",
+        "Virtual Network", "VNet", "Storage", "Blob Storage", "Compute", "Load Balancer", "Application Gateway",
+        "Front Door", "DNS", "ExpressRoute", "VPN Gateway", "VPN", "Azure Arc", "Azure Backup", "Site Recovery",
+    ]),
+]
+
+ROUTING_TAGS = {
+    "MODERN_WORK": "MW Triage",
+    "SECURITY": "Security Triage",
+    "BUSINESS_APPS": "BA Triage",
+}
+
+AREA_PATHS = {
+    "DATA_AI": "Data & AI",
+    "INFRASTRUCTURE": "Infrastructure",
+    "DIGITAL_APP_INNOVATION": "Digital & App Innovation",
+}
+
+
+# One alternation in taxonomy order: the leftmost match wins and, at the same
+# position, the earlier (more specific) entry wins. "\b" doesn't work around
+# leading punctuation such as ".NET", hence the explicit lookarounds.
+_SERVICE_PATTERN = re.compile(
+    r"(?<![\w.])(?:"
+    + "|".join(re.escape(name) for _, _, names in SERVICE_TAXONOMY for name in names)
+    + r")(?!\w)",
+    re.IGNORECASE,
+)
+_SERVICE_LOOKUP: Dict[str, Tuple[str, Optional[str], str]] = {}
+for _area, _owner, _names in SERVICE_TAXONOMY:
+    for _name in _names:
+        _SERVICE_LOOKUP.setdefault(_name.lower(), (_area, _owner, _name))
+
+
+def match_service(*texts: str) -> Dict[str, Optional[str]]:
+    """
+    Identify the primary service and map it to a solution area.
+
+    Texts are checked in order (e.g. title, then description); within the first
+    text that mentions any service, the earliest mention wins.
+
+    Returns:
+        {"service", "solution_area", "owner"}; "UNKNOWN" service/area when nothing matches
+    """
+    for text in texts:
+        match = _SERVICE_PATTERN.search(text) if text else None
+        if match:
+            area, owner, name = _SERVICE_LOOKUP[match.group(0).lower()]
+            return {"service": name, "solution_area": area, "owner": owner}
+    return {"service": "UNKNOWN", "solution_area": "UNKNOWN", "owner": None}
+
+
+# ---------------------------------------------------------------------------
+# Phase 2: requestor classification
+# ---------------------------------------------------------------------------
+
+_CSU_TITLE = re.compile(r"customer success account manager|\bcsam\b|cloud solution architect|\bcsa\b|\bcsu\b", re.IGNORECASE)
+_STU_TITLE = re.compile(r"specialist|sales engineer|account executive|\bstu\b", re.IGNORECASE)
+
+
+def classify_requestor(job_title: Optional[str], team: Optional[str] = None) -> str:
+    """Classify the requestor as CSU, STU or UNKNOWN from job title (or explicit team)."""
+    for value in (team, job_title):
+        if not value:
+            continue
+        if _CSU_TITLE.search(value):
+            return "CSU"
+        if _STU_TITLE.search(value):
+            return "STU"
+    return "UNKNOWN"
+
+
+# ---------------------------------------------------------------------------
+# Record normalization
+# ---------------------------------------------------------------------------
+
+# Normalized key -> accepted export column names (ADO reference names or friendly names)
+FIELD_ALIASES: Dict[str, List[str]] = {
+    "id": ["System.Id", "id", "Action ID", "ID", "work_item_id"],
+    "title": ["System.Title", "title"],
+    "description": ["System.Description", "description"],
+    "scenario": ["Custom.CustomerScenarioAndDesiredOutcome", "CustomerScenarioAndDesiredOutcome", "customer_scenario"],
+    "impact": ["Custom.CustomerImpactData", "CustomerImpactData", "customer_impact"],
+    "workarounds": ["Custom.Workarounds", "workarounds"],
+    "comments": ["System.History", "comments", "discussion", "Discussion"],
+    "requestor": ["Custom.Requestors", "requestors", "requestor", "Requestor"],
+    "job_title": ["requestor_job_title", "job_title", "requestor_role", "Requestor Role"],
+    "team": ["requestor_team", "team", "Requestor Team"],
+    "milestone_id": ["Custom.MilestoneID", "Milestone ID", "milestone_id"],
+    "milestone_present": ["milestone_present"],
+    "commitment": ["Custom.Customer_Commitment", "Customer_Commitment", "commitment", "commitment_level"],
+    "milestone_status": ["Custom.MilestoneStatus", "Milestone Status", "milestone_status"],
+}
+
+
+def _alias_key(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+_ALIAS_LOOKUP = {_alias_key(alias): key for key, aliases in FIELD_ALIASES.items() for alias in aliases}
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+
+
+def normalize_record(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Map an exported Action (JSONL object or CSV row) onto the fields the rules use.
+
+    Accepts ADO work item shape ({"id", "fields": {...}}) or flat rows with
+    reference or friendly column names. HTML markup is stripped from text.
+    """
+    flat: Dict[str, Any] = dict(raw)
+    if isinstance(raw.get("fields"), dict):
+        flat.update(raw["fields"])
+    record: Dict[str, Any] = {key: None for key in FIELD_ALIASES}
+    for name, value in flat.items():
+        key = _ALIAS_LOOKUP.get(_alias_key(str(name)))
+        if key and record[key] in (None, "") and value not in (None, ""):
+            if isinstance(value, dict):
+                value = value.get("displayName") or value.get("uniqueName") or str(value)
+            record[key] = value
+    for key in ("title", "description", "scenario", "impact", "workarounds", "comments"):
+        if record[key] is not None:
+            record[key] = html.unescape(_TAG_PATTERN.sub(" ", str(record[key])))
+    present = record["milestone_present"]
+    if isinstance(present, str):
+        present = present.strip().lower() in ("1", "true", "yes", "y")
+    record["milestone_present"] = bool(present) or bool(record["milestone_id"])
+    return record
+
+
+# ---------------------------------------------------------------------------
+# Phases 4-6: rule engine
+# ---------------------------------------------------------------------------
+
+_CAPACITY = re.compile(
+    r"\bquota\b|\bcapacity\b|\ballocation|high demand|cannot fulfill|\bsku\b.*\bnot available|out of stock|"
+    r"insufficient (?:cores|resources)",
+    re.IGNORECASE,
+)
+_AI_INFRA_SKU = re.compile(
+    r"\bND\s?H[12]00|\bH[12]00s?\b|\bGB[23]00|\bNC[a-z0-9_]*\b|\bNG[a-z0-9_]*\b|\bNV[a-z0-9_]*\b|\bMI300X?\b|"
+    r"\bNDA?100|\bA100s?\b|\bGPUs?\b",
+    re.IGNORECASE,
+)
+_AOAI = re.compile(r"azure openai|\baoai\b|\bptus?\b|provisioned throughput|\bpaygo\b|openai", re.IGNORECASE)
+_BUG = re.compile(
+    r"\berror|\bfail|\bbug\b|\boutage|\bbroken\b|\btimeout|\btime out|\bexception|not working|\bcrash|"
+    r"\bincident\b|\bdegrad",
+    re.IGNORECASE,
+)
+_FEATURE = re.compile(
+    r"\bfeature|\benhancement|\broadmap|\bsupport for\b|\bcapabilit|\bnot supported\b|\bneeds? .* to support\b|"
+    r"\bintegration with\b|\bfunctionality\b|\bgap\b",
+    re.IGNORECASE,
+)
+_AVAILABILITY = re.compile(
+    r"not (?:yet )?available in|not (?:yet )?deployed in|available in (?:the )?[a-z]+ (?:region|[a-z]+ region)|"
+    r"region(?:al)? availability|not present in",
+    re.IGNORECASE,
+)
+_AT_RISK = re.compile(r"blocked|at[-\s]?risk", re.IGNORECASE)
+
+
+def _decision(
+    tag: Optional[str],
+    rule: str,
+    confidence: str,
+    factors: List[str],
+    context: Dict[str, Any],
+    direct: Optional[Dict[str, str]] = None,
+    flags: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    if direct:
+        decision_type = "DIRECT"
+    elif tag == TAG_PREFIX + "Missing Data":
+        decision_type = "MISSING_DATA"
+    else:
+        decision_type = "TAG"
+    return {
+        "id": context.get("id"),
+        "decision": {"type": decision_type, "tag": tag, "direct_routing": direct},
+        "reasoning": {"matched_rule": rule, "confidence": confidence, "factors": factors},
+        "requestor": {
+            "email": context["requestor"] or "UNKNOWN",
+            "job_title": context["job_title"] or "UNKNOWN",
+            "team": context["team"],
+        },
+        "ticket_context": {
+            "service": context["service"],
+            "solution_area": context["solution_area"],
+            "milestone_present": context["milestone_present"],
+            "commitment_level": context["commitment"],
+            "support_history": context["support_history"],
+        },
+        "flags": flags or [],
+        "needs_model": confidence != CONFIDENCE_HIGH,
+        "source": "rules",
+    }
+
+
+def _direct_routing(context: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    area = context["solution_area"]
+    if area not in AREA_PATHS:
+        return None
+    return {
+        "assigned_to": context["owner"] or "UNKNOWN",
+        "area_path": AREA_PATHS[area],
+        "priority": "P3",
+        "p_triage_type": "_Route DRI",
+    }
+
+
+def route_record(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run the deterministic routing pipeline on one exported Action.
+
+    Top-level and picklable so it can run in a process pool.
+
+    Args:
+        raw: Exported Action (see normalize_record)
+
+    Returns:
+        Routing decision shaped like the routing prompt's machine-readable JSON,
+        plus "needs_model" for decisions worth a model second opinion
+    """
+    record = normalize_record(raw)
+    text = " ".join(str(record[k] or "") for k in ("title", "description", "scenario", "impact", "workarounds"))
+    all_text = f"{text} {record['comments'] or ''}"
+
+    identifiers = extract_identifiers(all_text)
+    has_sr = any(i.startswith("SR#") for i in identifiers)
+    has_icm = any(i.startswith("IcM#") for i in identifiers)
+    has_gh = any(i.startswith("GH#") for i in identifiers)
+    service = match_service(record["title"] or "", text)
+    team = classify_requestor(record["job_title"], record["team"])
+    commitment = str(record["commitment"] or "").strip().capitalize() if record["milestone_present"] else "N/A"
+    if commitment not in ("Committed", "Uncommitted", "N/A"):
+        commitment = "Committed" if commitment.lower().startswith("commit") else "Uncommitted"
+
+    context = {
+        "id": record["id"],
+        "service": service["service"],
+        "solution_area": service["solution_area"],
+        "owner": service["owner"],
+        "milestone_present": record["milestone_present"],
+        "commitment": commitment,
+        "team": team,
+        "requestor": record["requestor"],
+        "job_title": record["job_title"],
+        "support_history": {
+            "has_sr": has_sr,
+            "has_icm": has_icm,
+            "has_gethelp": has_gh,
+            "ticket_numbers": identifiers,
+        },
+    }
+    area = service["solution_area"]
+    is_capacity = bool(_CAPACITY.search(text))
+
+    # Phase 4: mutually exclusive rules
+    if is_capacity and _AI_INFRA_SKU.search(text) and not _AOAI.search(text):
+        return _decision(TAG_PREFIX + "AI Infra Triage", "4.1 AI Infrastructure capacity", CONFIDENCE_HIGH,
+                         ["Capacity request for AI infrastructure SKUs"], context)
+    if area in ROUTING_TAGS:
+        rule = {"MODERN_WORK": "4.2 Modern Work service", "BUSINESS_APPS": "4.3 Business Applications service",
+                "SECURITY": "4.4 Security service"}[area]
+        return _decision(TAG_PREFIX + ROUTING_TAGS[area], rule, CONFIDENCE_HIGH,
+                         [f"Service {service['service']} maps to {area}"], context)
+    if is_capacity and _AOAI.search(text):
+        return _decision(TAG_PREFIX + "AOAI Triage", "4.5 AOAI capacity", CONFIDENCE_HIGH,
+                         ["Capacity/quota request for Azure OpenAI"], context)
+    if is_capacity:
+        return _decision(TAG_PREFIX + "Capacity Triage", "4.6 Non-AI capacity", CONFIDENCE_HIGH,
+                         ["Quota/capacity/allocation request for non-AI resources"], context)
+
+    # Phase 5: milestone-driven direct routing
+    if record["milestone_present"] and team == "CSU" and area in AREA_PATHS:
+        status = str(record["milestone_status"] or "")
+        if commitment == "Committed":
+            return _decision(None, "5.1 Committed milestone + CSU", CONFIDENCE_HIGH,
+                             ["Committed milestone", "CSU requestor"], context, direct=_direct_routing(context))
+        if _AT_RISK.search(status):
+            if area == "INFRASTRUCTURE":
+                return _decision(TAG_PREFIX + "Tech Feedback", "5.2 Uncommitted at-risk milestone + CSU (Infrastructure)",
+                                 CONFIDENCE_HIGH, ["Uncommitted milestone", f"Milestone status {status}"], context)
+            return _decision(None, "5.2 Uncommitted at-risk milestone + CSU", CONFIDENCE_HIGH,
+                             ["Uncommitted milestone", f"Milestone status {status}", "CSU requestor"], context,
+                             direct=_direct_routing(context))
+        return _decision(None, "5.3 Uncommitted milestone + CSU", CONFIDENCE_HIGH,
+                         ["Uncommitted milestone", "CSU requestor"], context, direct=_direct_routing(context))
+
+    # Rules 6.1 / 6.2 apply with or without a milestone
+    if (has_sr or has_icm) and has_gh:
+        return _decision(TAG_PREFIX + "Missing Data", "6.1 Support Escalation (conflicting tickets)", CONFIDENCE_LOW,
+                         ["Both SR/IcM and GetHelp tickets present"], context,
+                         flags=["Conflicting ticket states: SR/IcM and GetHelp both present"])
+    if has_sr or has_icm:
+        return _decision(TAG_PREFIX + "Support Escalation", "6.1 Support Escalation", CONFIDENCE_HIGH,
+                         ["Existing SR/IcM ticket", "No GetHelp ticket"], context)
+    bug = bool(_BUG.search(text))
+    if bug and not identifiers:
+        return _decision(TAG_PREFIX + "Support Guidance", "6.2 Support Guidance", CONFIDENCE_MEDIUM,
+                         ["Issue with a live service", "No support history"], context)
+
+    # Phase 5B: remaining rules need a milestone
+    if not record["milestone_present"]:
+        return _decision(TAG_PREFIX + "Missing Data", "5B Milestone gate", CONFIDENCE_MEDIUM,
+                         ["No milestone", "Not a support escalation or support guidance request"], context,
+                         flags=["Milestone required to route non-support requests"])
+
+    if _AVAILABILITY.search(text):
+        return _decision(TAG_PREFIX + "Service Availability", "6.4 Service Availability", CONFIDENCE_MEDIUM,
+                         ["Service requested in a region where it is not available"], context)
+    if _FEATURE.search(text):
+        return _decision(TAG_PREFIX + "Tech Feedback", "6.3 Tech Feedback", CONFIDENCE_MEDIUM,
+                         ["Describes missing functionality"], context)
+    if team == "STU" and commitment == "Uncommitted":
+        return _decision(TAG_PREFIX + "STU", "6.5 STU", CONFIDENCE_MEDIUM,
+                         ["STU requestor", "Uncommitted milestone"], context)
+    if team == "STU":
+        return _decision(TAG_PREFIX + "Tech Feedback", "5.4 Milestone + STU requestor", CONFIDENCE_LOW,
+                         ["STU requestor", "Committed milestone", "No clear determination"], context)
+
+    missing = []
+    if area == "UNKNOWN":
+        missing.append("Missing service identification")
+    if team == "UNKNOWN":
+        missing.append("Missing requestor job title for team classification")
+    return _decision(TAG_PREFIX + "Missing Data", "6.6 Insufficient Data", CONFIDENCE_LOW,
+                     missing or ["No rule matched"], context, flags=missing or ["Ambiguous request type"])
+
+
+def route_batch(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Route a batch of records (one process pool task), isolating per-record failures."""
+    results = []
+    for raw in records:
+        try:
+            results.append(route_record(raw))
+        except Exception as e:
+            results.append({
+                "id": raw.get("id") or (raw.get("fields") or {}).get("System.Id"),
+                "error": f"{type(e).__name__}: {e}",
+                "needs_model": True,
+                "source": "rules",
+            })
+    return results
@@ -0,0 +1,293 @@
+"""
+Weighted fair scheduling of agent runs across priority classes.
+
+Model runs are admitted through a fixed number of slots. When a slot frees up,
+the class with the lowest virtual time is served next, and a class's virtual
+time advances by 1/weight per admitted run (start-time fair queuing). Within a
+class, callers are served round-robin so one caller's sweep can't starve
+another's requests. Some slots are reserved for the interactive class, so
+humans at the keyboard get a slot promptly even while routing and background
+work saturate the rest.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+from src.models.config import SchedulerConfig
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+ROUTING = "routing"
+BACKGROUND = "background"
+PRIORITY_CLASSES = (INTERACTIVE, ROUTING, BACKGROUND)
+
+
+class SchedulerBusy(Exception):
+    """A request waited longer than its class allows, or its queue is full."""
+
+
+class _Waiter:
+    __slots__ = ("priority", "caller", "future", "enqueued")
+
+    def __init__(self, priority: str, caller: str, future: asyncio.Future):
+        self.priority = priority
+        self.caller = caller
+        self.future = future
+        self.enqueued = time.monotonic()
+
+
+class _ClassState:
+    """Queues and counters for one priority class."""
+
+    def __init__(self, weight: float):
+        self.weight = max(weight, 0.001)
+        self.vtime = 0.0
+        # caller -> FIFO of waiters; key order is the round-robin order
+        self.callers: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self.queued = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.waits: Deque[float] = deque(maxlen=500)
+
+
+class FairScheduler:
+    """Admission control for agent runs with weighted fair queuing and reserved interactive capacity."""
+
+    def __init__(self, config: Optional[SchedulerConfig] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            config: Slots, reserved interactive slots, class weights and wait limits
+        """
+        self.config = config or SchedulerConfig()
+        self.classes: Dict[str, _ClassState] = {
+            name: _ClassState(self.config.weights.get(name, 1.0)) for name in PRIORITY_CLASSES
+        }
+        self.in_flight = 0
+        self._caller_in_flight: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "FairScheduler":
+        """Build a scheduler from SCHEDULER_* environment variables."""
+        return cls(scheduler_config_from_env())
+
+    def reconfigure(self, config: SchedulerConfig) -> None:
+        """
+        Apply new limits and weights without dropping queued or in-flight requests.
+
+        Extra capacity is handed to waiters immediately; lowered limits take
+        effect as running requests finish.
+        """
+        self.config = config
+        for name, state in self.classes.items():
+            state.weight = max(config.weights.get(name, 1.0), 0.001)
+        self._dispatch()
+
+    # -- admission ------------------------------------------------------------
+
+    def _shared_limit(self) -> int:
+        """Slots non-interactive classes may occupy together."""
+        return max(1, self.config.max_concurrency - self.config.reserved_interactive)
+
+    def _eligible(self, name: str) -> bool:
+        state = self.classes[name]
+        if not state.queued or self.in_flight >= self.config.max_concurrency:
+            return False
+        if name == INTERACTIVE:
+            return True
+        non_interactive = self.in_flight - self.classes[INTERACTIVE].in_flight
+        return non_interactive < self._shared_limit()
+
+    def _next_caller(self, state: _ClassState) -> Optional[str]:
+        """First caller in round-robin order that is under its concurrency cap."""
+        cap = self.config.max_per_caller
+        for caller, waiters in state.callers.items():
+            if waiters and (not cap or self._caller_in_flight.get(caller, 0) < cap):
+                return caller
+        return None
+
+    def _dispatch(self) -> None:
+        """Admit waiters while slots are free."""
+        while True:
+            candidates = [
+                (state.vtime, PRIORITY_CLASSES.index(name), name)
+                for name, state in self.classes.items()
+                if self._eligible(name) and self._next_caller(state) is not None
+            ]
+            if not candidates:
+                return
+            _, _, name = min(candidates)
+            state = self.classes[name]
+            caller = self._next_caller(state)
+            waiters = state.callers[caller]
+            waiter = waiters.popleft()
+            state.queued -= 1
+            # Rotate this caller to the back of the class's round-robin order
+            state.callers.move_to_end(caller)
+            if not waiters:
+                del state.callers[caller]
+            if waiter.future.done():  # cancelled or timed out while queued
+                continue
+            state.vtime += 1.0 / state.weight
+            self._acquire(state, caller)
+            state.waits.append(time.monotonic() - waiter.enqueued)
+            waiter.future.set_result(None)
+
+    def _acquire(self, state: _ClassState, caller: str) -> None:
+        state.in_flight += 1
+        state.admitted += 1
+        self.in_flight += 1
+        self._caller_in_flight[caller] = self._caller_in_flight.get(caller, 0) + 1
+
+    def _release(self, priority: str, caller: str) -> None:
+        self.classes[priority].in_flight -= 1
+        self.in_flight -= 1
+        remaining = self._caller_in_flight.get(caller, 1) - 1
+        if remaining:
+            self._caller_in_flight[caller] = remaining
+        else:
+            self._caller_in_flight.pop(caller, None)
+        self._dispatch()
+
+    def _activate(self, state: _ClassState) -> None:
+        """A class joining the queue can't spend credit banked while it was idle."""
+        if state.queued or state.in_flight:
+            return
+        active = [s.vtime for s in self.classes.values() if s is not state and (s.queued or s.in_flight)]
+        if active:
+            state.vtime = max(state.vtime, min(active))
+
+    async def acquire(self, priority: str = INTERACTIVE, caller: str = "anonymous") -> float:
+        """
+        Wait for a slot.
+
+        Args:
+            priority: "interactive", "routing" or "background"
+            caller: Identity used for per-caller fairness (user, API key or client address)
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            ValueError: For an unknown priority class
+            SchedulerBusy: When the class queue is full or the class's max wait elapses
+        """
+        if priority not in self.classes:
+            raise ValueError(f"Unknown priority '{priority}'. Valid: {', '.join(PRIORITY_CLASSES)}")
+        state = self.classes[priority]
+        if state.queued >= self.config.max_queue:
+            state.rejected += 1
+            raise SchedulerBusy(f"{priority} queue is full ({state.queued} waiting)")
+
+        self._activate(state)
+        waiter = _Waiter(priority, caller, asyncio.get_running_loop().create_future())
+        state.callers.setdefault(caller, deque()).append(waiter)
+        state.queued += 1
+        self._dispatch()
+
+        max_wait = self.config.max_wait_seconds.get(priority)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted just as we gave up: hand the slot back
+                self._release(priority, caller)
+            else:
+                waiter.future.cancel()
+                self._drop(state, caller, waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                state.rejected += 1
+                raise SchedulerBusy(f"Waited more than {max_wait:.0f}s for a {priority} slot") from None
+            raise
+        return time.monotonic() - waiter.enqueued
+
+    def _drop(self, state: _ClassState, caller: str, waiter: _Waiter) -> None:
+        waiters = state.callers.get(caller)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            state.queued -= 1
+            if not waiters:
+                del state.callers[caller]
+
+    def release(self, priority: str, caller: str = "anonymous") -> None:
+        """Return a slot obtained with acquire()."""
+        self._release(priority, caller)
+
+    @asynccontextmanager
+    async def slot(self, priority: str = INTERACTIVE, caller: str = "anonymous") -> AsyncIterator[float]:
+        """
+        Hold a slot for the duration of the block.
+
+        Yields:
+            Seconds spent waiting for the slot
+        """
+        waited = await self.acquire(priority, caller)
+        try:
+            yield waited
+        finally:
+            self.release(priority, caller)
+
+    # -- reporting ------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-class queue depth, in-flight runs and recent wait times."""
+        def _pct(values: List[float], pct: float) -> Optional[float]:
+            if not values:
+                return None
+            ordered = sorted(values)
+            return round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] * 1000, 1)
+
+        return {
+            "max_concurrency": self.config.max_concurrency,
+            "reserved_interactive": self.config.reserved_interactive,
+            "in_flight": self.in_flight,
+            "classes": {
+                name: {
+                    "weight": state.weight,
+                    "queued": state.queued,
+                    "in_flight": state.in_flight,
+                    "admitted": state.admitted,
+                    "rejected": state.rejected,
+                    "callers_waiting": len(state.callers),
+                    "wait_p50_ms": _pct(list(state.waits), 50),
+                    "wait_p95_ms": _pct(list(state.waits), 95),
+                }
+                for name, state in self.classes.items()
+            },
+        }
+
+
+def scheduler_config_from_env() -> SchedulerConfig:
+    """
+    Build scheduler settings from environment variables.
+
+    SCHEDULER_WEIGHTS and SCHEDULER_MAX_WAIT_SECONDS take "class=value" pairs,
+    e.g. "interactive=8,routing=3,background=1".
+    """
+    def _pairs(value: Optional[str]) -> Dict[str, float]:
+        pairs = {}
+        for item in (value or "").split(","):
+            if "=" in item:
+                name, number = item.split("=", 1)
+                pairs[name.strip()] = float(number)
+        return pairs
+
+    defaults = SchedulerConfig()
+    max_wait = dict(defaults.max_wait_seconds)
+    max_wait.update(_pairs(os.getenv("SCHEDULER_MAX_WAIT_SECONDS")))
+    return SchedulerConfig(
+        enabled=os.getenv("SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes"),
+        max_concurrency=int(os.getenv("SCHEDULER_MAX_CONCURRENCY", defaults.max_concurrency)),
+        reserved_interactive=int(os.getenv("SCHEDULER_RESERVED_INTERACTIVE", defaults.reserved_interactive)),
+        max_per_caller=int(os.getenv("SCHEDULER_MAX_PER_CALLER", defaults.max_per_caller)),
+        weights={**defaults.weights, **_pairs(os.getenv("SCHEDULER_WEIGHTS"))},
+        max_wait_seconds=max_wait,
+    )
@@ -0,0 +1,247 @@
+"""Bounded in-memory store for multi-turn conversation sessions."""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from src.models.config import SessionConfig
+
+logger = logging.getLogger(__name__)
+
+
+def _approx_size(value: Any) -> int:
+    """Approximate the memory footprint of a JSON-like value by its serialized length."""
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return len(str(value))
+
+
+@dataclass
+class Session:
+    """
+    State carried between queries of one conversation.
+
+    Holds the agent thread so follow-ups continue the same conversation, plus
+    the work items and tool results fetched so far.
+    """
+
+    session_id: str
+    thread: Any = None
+    instruction_type: Optional[str] = None
+    work_items: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    tool_results: "OrderedDict[str, Any]" = field(default_factory=OrderedDict)
+    created_at: float = field(default_factory=time.monotonic)
+    last_access: float = field(default_factory=time.monotonic)
+    turns: int = 0
+    size_bytes: int = 0
+    max_tool_results: int = 50
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def record_tool_result(self, tool_name: str, arguments: Any, result: Any) -> None:
+        """
+        Cache a tool result, and the work item it returned if there is one.
+
+        Args:
+            tool_name: Name of the tool that was called
+            arguments: Arguments the tool was called with
+            result: Tool output (JSON text or already-parsed value)
+        """
+        key = f"{tool_name}:{json.dumps(arguments, sort_keys=True, default=str)}"
+        parsed = result
+        if isinstance(result, str):
+            try:
+                parsed = json.loads(result)
+            except ValueError:
+                parsed = result
+
+        self.tool_results[key] = parsed
+        self.tool_results.move_to_end(key)
+        while len(self.tool_results) > self.max_tool_results:
+            self.tool_results.popitem(last=False)
+
+        items = parsed if isinstance(parsed, list) else [parsed]
+        for item in items:
+            if isinstance(item, dict) and "id" in item and "fields" in item:
+                self.work_items[str(item["id"])] = item
+
+        self.size_bytes = _approx_size(self.work_items) + _approx_size(list(self.tool_results.values()))
+
+    def record_run(self, result: Any) -> None:
+        """
+        Capture tool calls and results from an agent run result.
+
+        Pairs function call and function result contents by call id.
+        """
+        calls: Dict[str, Any] = {}
+        for message in getattr(result, "messages", None) or []:
+            for content in getattr(message, "contents", None) or []:
+                content_type = getattr(content, "type", None)
+                call_id = getattr(content, "call_id", None)
+                if content_type == "function_call" and call_id:
+                    calls[call_id] = content
+                elif content_type == "function_result" and call_id in calls:
+                    call = calls.pop(call_id)
+                    arguments = getattr(call, "arguments", None)
+                    if isinstance(arguments, str):
+                        try:
+                            arguments = json.loads(arguments)
+                        except ValueError:
+                            pass
+                    self.record_tool_result(getattr(call, "name", "unknown"), arguments, getattr(content, "result", None))
+        self.turns += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summary of the session for API responses."""
+        return {
+            "session_id": self.session_id,
+            "instruction_type": self.instruction_type,
+            "turns": self.turns,
+            "work_items": sorted(self.work_items),
+            "tool_results": len(self.tool_results),
+            "size_bytes": self.size_bytes,
+            "idle_seconds": round(time.monotonic() - self.last_access, 1),
+        }
+
+
+class SessionStore:
+    """
+    LRU session store with idle TTL and an approximate memory cap.
+
+    Sessions are evicted least-recently-used first when either the session
+    count or the total cached bytes exceed their limits.
+    """
+
+    def __init__(self, config: Optional[SessionConfig] = None):
+        """
+        Initialize the store.
+
+        Args:
+            config: Session limits. Defaults to SessionConfig() defaults.
+        """
+        self.config = config or SessionConfig()
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        logger.info(
+            f"[SESSION] Store initialized (max_sessions={self.config.max_sessions}, "
+            f"ttl={self.config.ttl_seconds}s, max_bytes={self.config.max_bytes})"
+        )
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        """Build a store from SESSION_MAX_COUNT, SESSION_TTL_SECONDS and SESSION_MAX_BYTES."""
+        return cls(session_config_from_env())
+
+    def reconfigure(self, config: SessionConfig) -> None:
+        """Apply new limits to the live store, evicting sessions now over them."""
+        self.config = config
+        self.enforce_limits()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def total_bytes(self) -> int:
+        """Approximate bytes cached across all sessions."""
+        return sum(session.size_bytes for session in self._sessions.values())
+
+    def _expired(self, session: Session, now: float) -> bool:
+        return now - session.last_access > self.config.ttl_seconds
+
+    def get(self, session_id: str) -> Optional[Session]:
+        """
+        Look up a live session and mark it recently used.
+
+        Returns:
+            The session, or None if unknown or expired
+        """
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        now = time.monotonic()
+        if self._expired(session, now):
+            logger.info(f"[SESSION] Session {session_id} expired")
+            del self._sessions[session_id]
+            return None
+        session.last_access = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def get_or_create(self, session_id: Optional[str] = None) -> Session:
+        """
+        Return an existing session or start a new one.
+
+        Args:
+            session_id: Caller-supplied id. A new id is generated when omitted.
+        """
+        if session_id:
+            session = self.get(session_id)
+            if session is not None:
+                return session
+        session = Session(
+            session_id=session_id or uuid.uuid4().hex,
+            max_tool_results=self.config.max_tool_results,
+        )
+        self._sessions[session.session_id] = session
+        logger.info(f"[SESSION] Created session {session.session_id}")
+        self.enforce_limits()
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        """Drop a session. Returns True if it existed."""
+        return self._sessions.pop(session_id, None) is not None
+
+    def enforce_limits(self) -> List[str]:
+        """
+        Evict expired sessions, then least-recently-used ones until within limits.
+
+        Call after a session's cached data grows. Sessions busy with a query
+        are never evicted.
+
+        Returns:
+            Ids of the evicted sessions
+        """
+        now = time.monotonic()
+        evicted = [sid for sid, s in self._sessions.items() if self._expired(s, now) and not s.lock.locked()]
+        for sid in evicted:
+            del self._sessions[sid]
+
+        total = self.total_bytes
+        for sid in list(self._sessions):
+            if len(self._sessions) <= self.config.max_sessions and total <= self.config.max_bytes:
+                break
+            session = self._sessions[sid]
+            if session.lock.locked():
+                continue
+            total -= session.size_bytes
+            del self._sessions[sid]
+            evicted.append(sid)
+
+        if evicted:
+            logger.info(f"[SESSION] Evicted {len(evicted)} session(s)")
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        """Store-wide counters for diagnostics."""
+        return {
+            "sessions": len(self._sessions),
+            "total_bytes": self.total_bytes,
+            "max_sessions": self.config.max_sessions,
+            "max_bytes": self.config.max_bytes,
+            "ttl_seconds": self.config.ttl_seconds,
+        }
+
+
+def session_config_from_env() -> SessionConfig:
+    """Build a SessionConfig from SESSION_* environment variables."""
+    defaults = SessionConfig()
+    return SessionConfig(
+        max_sessions=int(os.getenv("SESSION_MAX_COUNT", defaults.max_sessions)),
+        ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", defaults.ttl_seconds)),
+        max_bytes=int(os.getenv("SESSION_MAX_BYTES", defaults.max_bytes)),
+    )
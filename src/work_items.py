@@ -0,0 +1,193 @@
+"""Direct, model-free access to Unified Action Tracker work items over the Azure DevOps MCP server."""
+
+import asyncio
+import json
+import logging
+import os
+from contextlib import AsyncExitStack
+from typing import Any, Dict, Iterable, List, Optional
+
+from agent_framework import MCPStdioTool
+
+logger = logging.getLogger(__name__)
+
+# Azure DevOps MCP tool names used for direct calls
+TOOL_QUERY_WIQL = "wit_query_by_wiql"
+TOOL_GET_WORK_ITEM = "wit_get_work_item"
+TOOL_GET_WORK_ITEMS_BATCH = "wit_get_work_items_batch_by_ids"
+TOOL_LIST_COMMENTS = "wit_list_work_item_comments"
+
+# Azure DevOps caps batch work item reads at 200 ids per call
+BATCH_SIZE = 200
+
+
+def ado_mcp_args(org_name: str, project_name: Optional[str] = None) -> List[str]:
+    """
+    Build the npx arguments that start the Azure DevOps MCP server.
+
+    The server accepts: org_name [project_name]. Passing the project sets the
+    default project context for tool calls.
+    """
+    args = ["-y", "@azure-devops/mcp@next", org_name]
+    if project_name:
+        args.append(project_name)
+    return args
+
+
+def parse_tool_result(result: Any) -> Any:
+    """
+    Turn an MCP tool result into Python data.
+
+    Tool output arrives as a string or a list of content items whose text is
+    usually JSON. Non-JSON text is returned as-is.
+    """
+    if isinstance(result, str):
+        text = result
+    elif isinstance(result, list) and all(hasattr(item, "text") for item in result):
+        text = "".join(item.text or "" for item in result)
+    else:
+        return result
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _chunks(values: List[int], size: int) -> Iterable[List[int]]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class WorkItemClient:
+    """
+    Calls Azure DevOps MCP tools directly, without a model in the loop.
+
+    Used for deterministic paths (lists, sync, prefetch) where the agent would
+    otherwise spend model turns composing the same tool calls.
+    """
+
+    def __init__(
+        self,
+        ado_org_name: Optional[str] = None,
+        ado_project_name: Optional[str] = None,
+        mcp_tool: Optional[Any] = None,
+        max_concurrency: int = 4,
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            ado_org_name: Azure DevOps organization name. Defaults to env var.
+            ado_project_name: Azure DevOps project name. Defaults to env var.
+            mcp_tool: Object exposing `call_tool(name, **kwargs)`. Defaults to a new MCPStdioTool.
+            max_concurrency: Maximum concurrent MCP calls
+        """
+        self.ado_org_name = ado_org_name or os.getenv("ADO_ORG_NAME", "UnifiedActionTracker")
+        self.ado_project_name = ado_project_name or os.getenv("ADO_PROJECT_NAME", "Unified Action Tracker")
+        self._mcp_tool = mcp_tool
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._connect_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def connect(self) -> None:
+        """Start the MCP server (if this client owns it). Safe to call repeatedly."""
+        async with self._connect_lock:
+            if self._mcp_tool is not None:
+                return
+            self._exit_stack = AsyncExitStack()
+            tool = MCPStdioTool(
+                name="Azure DevOps MCP (direct)",
+                description="Direct Azure DevOps work item access",
+                command="npx",
+                args=ado_mcp_args(self.ado_org_name, self.ado_project_name),
+            )
+            self._mcp_tool = await self._exit_stack.enter_async_context(tool)
+            logger.info(f"[MCP] Direct work item client connected (org={self.ado_org_name})")
+
+    async def close(self) -> None:
+        """Stop the MCP server if this client started it."""
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+            self._exit_stack = None
+            self._mcp_tool = None
+            logger.info("[MCP] Direct work item client closed")
+
+    async def __aenter__(self) -> "WorkItemClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def call(self, tool_name: str, **kwargs: Any) -> Any:
+        """
+        Call an MCP tool and parse its result.
+
+        Args:
+            tool_name: MCP tool name
+            **kwargs: Tool arguments
+
+        Returns:
+            Parsed tool output
+        """
+        if self._mcp_tool is None:
+            await self.connect()
+        async with self._semaphore:
+            logger.debug(f"[MCP] Direct call {tool_name} {kwargs}")
+            result = await self._mcp_tool.call_tool(tool_name, **kwargs)
+        return parse_tool_result(result)
+
+    async def query_ids(self, wiql: str) -> List[int]:
+        """
+        Run a WIQL query and return matching work item ids in query order.
+
+        Args:
+            wiql: WIQL query text
+        """
+        result = await self.call(TOOL_QUERY_WIQL, project=self.ado_project_name, query=wiql)
+        if isinstance(result, dict):
+            rows = result.get("workItems") or result.get("work_items") or []
+        else:
+            rows = result or []
+        return [int(row["id"] if isinstance(row, dict) else row) for row in rows]
+
+    async def get_work_items(self, ids: List[int], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch work items in batches, running batches concurrently.
+
+        Args:
+            ids: Work item ids
+            fields: Field reference names to return (all fields when omitted)
+
+        Returns:
+            Work items as {"id", "rev", "fields"} dicts, in no particular order
+        """
+        if not ids:
+            return []
+
+        async def _batch(batch: List[int]) -> List[Dict[str, Any]]:
+            kwargs: Dict[str, Any] = {"project": self.ado_project_name, "ids": batch}
+            if fields:
+                kwargs["fields"] = fields
+            result = await self.call(TOOL_GET_WORK_ITEMS_BATCH, **kwargs)
+            if isinstance(result, dict):
+                result = result.get("value") or []
+            return [item for item in result or [] if isinstance(item, dict)]
+
+        batches = await asyncio.gather(*(_batch(batch) for batch in _chunks(list(ids), BATCH_SIZE)))
+        return [item for batch in batches for item in batch]
+
+    async def get_work_item(self, work_item_id: int, expand_relations: bool = False) -> Optional[Dict[str, Any]]:
+        """Fetch a single work item, optionally with its relations."""
+        kwargs: Dict[str, Any] = {"project": self.ado_project_name, "id": int(work_item_id)}
+        if expand_relations:
+            kwargs["expand"] = "relations"
+        result = await self.call(TOOL_GET_WORK_ITEM, **kwargs)
+        return result if isinstance(result, dict) else None
+
+    async def get_comments(self, work_item_id: int) -> List[Dict[str, Any]]:
+        """Fetch the discussion comments of a work item."""
+        result = await self.call(TOOL_LIST_COMMENTS, project=self.ado_project_name, workItemId=int(work_item_id))
+        if isinstance(result, dict):
+            result = result.get("comments") or []
+        return [comment for comment in result or [] if isinstance(comment, dict)]
@@ -0,0 +1,92 @@
+"""Tests for the native Action list path."""
+
+import pytest
+from src.action_list import ActionLister, build_wiql, paginate, render_table
+from src.models.actions import ActionListQuery
+
+
+def _item(work_item_id: int, changed: str, state: str = "Active") -> dict:
+    return {
+        "id": work_item_id,
+        "fields": {
+            "System.Title": f"Action {work_item_id}",
+            "System.State": state,
+            "System.ChangedDate": changed,
+            "System.AssignedTo": {"displayName": "Pat Doe", "uniqueName": "pat@contoso.com"},
+        },
+    }
+
+
+class FakeSource:
+    """Work item source returning canned items."""
+
+    ado_project_name = "Unified Action Tracker"
+
+    def __init__(self, items):
+        self.items = items
+        self.wiql = None
+
+    async def query_ids(self, wiql):
+        self.wiql = wiql
+        return [item["id"] for item in self.items]
+
+    async def get_work_items(self, ids, fields=None):
+        return [item for item in self.items if item["id"] in ids]
+
+
+def test_build_wiql_escapes_literals():
+    """Test that filter values are quoted safely."""
+    wiql = build_wiql(ActionListQuery(keywords="O'Brien", state=["Active", "New"]), "Unified Action Tracker")
+    assert "[System.Title] CONTAINS 'O''Brien'" in wiql
+    assert "[System.State] IN ('Active', 'New')" in wiql
+    assert "[System.WorkItemType] = 'Action'" in wiql
+
+
+def test_cursor_walks_all_pages_without_duplicates():
+    """Test keyset pagination across pages, newest first."""
+    rows = [{"id": i, "changed_date": f"2024-01-{i:02d}"} for i in range(1, 8)]
+    query = ActionListQuery(page_size=3)
+    seen = []
+    while True:
+        page = paginate(rows, query)
+        seen.extend(row["id"] for row in page.items)
+        if not page.next_cursor:
+            break
+        query = query.model_copy(update={"cursor": page.next_cursor})
+    assert seen == [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_missing_values_sort_last_in_both_directions():
+    """Test that rows without the sort column come after the rest, ascending and descending, across pages."""
+    rows = [{"id": 1, "changed_date": None}] + [{"id": i, "changed_date": f"2024-01-{i:02d}"} for i in (2, 3)]
+    for descending, expected in ((False, [2, 3, 1]), (True, [3, 2, 1])):
+        query = ActionListQuery(page_size=1, descending=descending)
+        seen = []
+        while True:
+            page = paginate(rows, query)
+            seen.extend(row["id"] for row in page.items)
+            if not page.next_cursor:
+                break
+            query = query.model_copy(update={"cursor": page.next_cursor})
+        assert seen == expected
+
+
+def test_cursor_rejected_for_different_filters():
+    """Test that a cursor can't be reused with other filters."""
+    rows = [{"id": i, "changed_date": f"2024-01-{i:02d}"} for i in range(1, 5)]
+    page = paginate(rows, ActionListQuery(page_size=2))
+    with pytest.raises(ValueError):
+        paginate(rows, ActionListQuery(page_size=2, state=["Closed"], cursor=page.next_cursor))
+
+
+@pytest.mark.asyncio
+async def test_lister_renders_table():
+    """Test an end-to-end page rendered in the summary table format."""
+    source = FakeSource([_item(1, "2024-02-01T10:00:00Z"), _item(2, "2024-03-01T10:00:00Z")])
+    page = await ActionLister(source).list_page(ActionListQuery(page_size=1))
+    assert page.total == 2
+    assert page.items[0]["id"] == 2
+    assert page.items[0]["assigned_to"] == "Pat Doe"
+    table = render_table(page)
+    assert table.startswith("**Showing 1 of 2 results**")
+    assert "| 2 | Action 2 | Active |" in table
@@ -0,0 +1,148 @@
+"""Tests for the local work item mirror and sync worker."""
+
+import re
+import time
+from datetime import datetime, timezone
+
+import pytest
+from src.action_list import ActionLister
+from src.action_mirror import LAST_SYNC_KEY, ActionMirror, MirroredWorkItemSource, MirrorSyncWorker
+from src.models.actions import ActionListQuery
+from src.models.config import MirrorConfig
+
+
+def _item(work_item_id: int, rev: int, changed: str, **fields) -> dict:
+    return {
+        "id": work_item_id,
+        "rev": rev,
+        "fields": {
+            "System.WorkItemType": "Action",
+            "System.Title": fields.pop("title", f"Action {work_item_id}"),
+            "System.State": fields.pop("state", "Active"),
+            "System.AreaPath": fields.pop("area_path", "Unified Action Tracker\\Data"),
+            "System.ChangedDate": changed,
+            **fields,
+        },
+    }
+
+
+class FakeClient:
+    """Live client over an in-memory set of work items, counting full fetches."""
+
+    ado_project_name = "Unified Action Tracker"
+
+    def __init__(self, items):
+        self.items = {item["id"]: item for item in items}
+        self.full_fetches = []
+
+    async def query_ids(self, wiql):
+        return list(self.items)
+
+    async def get_work_items(self, ids, fields=None):
+        if fields is None:
+            self.full_fetches.append(sorted(ids))
+        return [self.items[i] for i in ids if i in self.items]
+
+
+def test_upsert_keeps_newest_revision():
+    """Test that stale revisions never overwrite newer ones."""
+    mirror = ActionMirror(keep_revisions=2)
+    assert len(mirror.upsert([_item(1, 3, "2024-01-03")])) == 1
+    assert mirror.upsert([_item(1, 2, "2024-01-02")]) == []
+    mirror.upsert([_item(1, 4, "2024-01-04")])
+    mirror.upsert([_item(1, 5, "2024-01-05")])
+    assert mirror.revisions([1]) == {1: 5}
+    kept = mirror.connection.execute("SELECT rev FROM work_item_revisions WHERE id = 1 ORDER BY rev").fetchall()
+    assert [row[0] for row in kept] == [4, 5]
+
+
+def test_query_ids_applies_filters():
+    """Test local evaluation of list filters."""
+    mirror = ActionMirror()
+    mirror.upsert([
+        _item(1, 1, "2024-01-01", title="Need GPU quota", state="Active"),
+        _item(2, 1, "2024-01-02", title="Teams rollout", state="Closed"),
+        _item(3, 1, "2024-01-03", title="gpu capacity", area_path="Unified Action Tracker\\Infra"),
+    ])
+    assert sorted(mirror.query_ids(ActionListQuery(keywords="GPU"))) == [1, 3]
+    assert mirror.query_ids(ActionListQuery(state=["Closed"])) == [2]
+    assert mirror.query_ids(ActionListQuery(area_path="Unified Action Tracker\\Infra")) == [3]
+
+
+@pytest.mark.asyncio
+async def test_sync_fetches_only_changed_items():
+    """Test that a second sync refetches only items whose revision moved."""
+    client = FakeClient([_item(1, 1, "2024-01-01T10:00:00Z"), _item(2, 1, "2024-01-02T10:00:00Z")])
+    mirror = ActionMirror()
+    worker = MirrorSyncWorker(mirror, client)
+
+    changed = await worker.sync_once()
+    assert sorted(item["id"] for item in changed) == [1, 2]
+    assert mirror.watermark == "2024-01-02T10:00:00Z"
+
+    client.items[2] = _item(2, 2, "2024-01-03T09:00:00Z", state="Resolved")
+    changed = await worker.sync_once()
+    assert [item["id"] for item in changed] == [2]
+    assert client.full_fetches[-1] == [2]
+    assert mirror.watermark == "2024-01-03T09:00:00Z"
+
+
+@pytest.mark.asyncio
+async def test_source_falls_back_to_live_for_misses():
+    """Test mirror-first reads with live fallback."""
+    mirror = ActionMirror()
+    mirror.upsert([_item(1, 1, "2024-01-01")])
+    client = FakeClient([_item(1, 1, "2024-01-01"), _item(2, 1, "2024-01-02")])
+    source = MirroredWorkItemSource(mirror, client)
+    assert source.local_ids(ActionListQuery()) is None  # never synced, so not fresh
+
+    mirror.set_state(LAST_SYNC_KEY, str(time.time()))
+    items = await source.get_work_items([1, 2], ["System.Title"])
+    assert sorted(item["id"] for item in items) == [1, 2]
+    assert client.full_fetches == [[2]]
+    assert mirror.revisions([2]) == {2: 1}
+
+
+@pytest.mark.asyncio
+async def test_stale_mirror_reads_live():
+    """Test that a stale mirror's rows aren't served; every id is fetched live and re-mirrored."""
+    mirror = ActionMirror()
+    mirror.upsert([_item(1, 1, "2024-01-01", state="Active")])
+    mirror.set_state(LAST_SYNC_KEY, str(time.time() - 3600))
+    client = FakeClient([_item(1, 2, "2024-01-05", state="Closed")])
+    source = MirroredWorkItemSource(mirror, client, max_staleness_seconds=900)
+
+    items = await source.get_work_items([1], ["System.State"])
+    assert items[0]["fields"] == {"System.State": "Closed"}
+    assert client.full_fetches == [[1]]
+    assert mirror.revisions([1]) == {1: 2}
+
+
+class DatedClient(FakeClient):
+    """Live client that honours the WIQL changed-date filter, like ADO does."""
+
+    async def query_ids(self, wiql):
+        match = re.search(r"\[System.ChangedDate\] >= '([^']+)'", wiql)
+        since = match.group(1) if match else ""
+        return [i for i, item in self.items.items() if item["fields"]["System.ChangedDate"] >= since]
+
+
+@pytest.mark.asyncio
+async def test_list_includes_actions_older_than_lookback():
+    """Test that Actions outside the initial lookback are listed, live until the backfill completes."""
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    client = DatedClient([_item(1, 1, "2020-01-01T10:00:00Z"), _item(2, 1, today)])
+    mirror = ActionMirror()
+    source = MirroredWorkItemSource(mirror, client)
+    lister = ActionLister(source)
+
+    worker = MirrorSyncWorker(mirror, client, MirrorConfig(backfill=False))
+    await worker.sync_once()
+    assert mirror.revisions([1, 2]) == {2: 1}
+    assert source.local_ids(ActionListQuery()) is None  # fresh, but incomplete
+    assert sorted(row["id"] for row in (await lister.list_page(ActionListQuery())).items) == [1, 2]
+
+    await worker.backfill()
+    assert mirror.complete
+    assert sorted(source.local_ids(ActionListQuery())) == [1, 2]
+    assert sorted(row["id"] for row in (await lister.list_page(ActionListQuery())).items) == [1, 2]
@@ -0,0 +1,80 @@
+"""Tests for the local Action search index."""
+
+import json
+
+import pytest
+from src.action_mirror import ActionMirror
+from src.action_search import ActionSearchIndex, fts_query
+
+
+def _item(
+    work_item_id: int, title: str, description: str = "", state: str = "Active", changed: str = "2024-01-01",
+    area_path: str = "Unified Action Tracker",
+) -> dict:
+    return {
+        "id": work_item_id,
+        "rev": 1,
+        "fields": {
+            "System.WorkItemType": "Action",
+            "System.Title": title,
+            "System.Description": description,
+            "System.State": state,
+            "System.ChangedDate": changed,
+            "System.AreaPath": area_path,
+        },
+    }
+
+
+@pytest.fixture
+def index():
+    mirror = ActionMirror()
+    items = [
+        _item(1, "Need GPU quota in East US", "<div>Customer blocked on <b>NDH100</b> capacity</div>"),
+        _item(2, "Teams meeting recording issue", "Recording fails for large meetings", state="Closed", changed="2024-01-03"),
+        _item(3, "Azure OpenAI quota increase", "PTU capacity for production", changed="2024-01-02",
+              area_path="Unified Action Tracker\\AI\\OpenAI"),
+    ]
+    mirror.upsert(items)
+    search_index = ActionSearchIndex(mirror)
+    search_index.index_items(items, comments={3: ["Escalated to AOAI triage"]})
+    return search_index
+
+
+def test_fts_query_neutralizes_operators():
+    """Test that user input can't inject FTS5 syntax."""
+    assert fts_query('quota OR "capacity') == '"quota" "OR" "capacity"*'
+    assert fts_query("  ") is None
+
+
+def test_keyword_search_strips_html_and_ranks(index):
+    """Test keyword matching over titles, descriptions and comments."""
+    results = index.search("capacity")
+    assert {item["id"] for item in results["items"]} == {1, 3}
+    assert index.search("NDH100")["items"][0]["id"] == 1
+    assert index.search("triage")["items"][0]["id"] == 3
+
+
+def test_facet_filters_and_counts(index):
+    """Test facet filtering and per-facet counts."""
+    results = index.search(filters={"state": ["Active"]})
+    assert results["total"] == 2
+    assert [item["id"] for item in results["items"]] == [3, 1]
+    assert index.search()["facets"]["state"] == {"Active": 2, "Closed": 1}
+    with pytest.raises(ValueError):
+        index.search(filters={"color": ["blue"]})
+
+
+def test_area_path_facet_matches_subtree(index):
+    """Test that an area path filter includes child areas, like WIQL UNDER."""
+    assert [item["id"] for item in index.search(filters={"area_path": ["Unified Action Tracker\\AI"]})["items"]] == [3]
+    assert index.search(filters={"area_path": ["Unified Action Tracker"]})["total"] == 3
+    assert index.search(filters={"area_path": ["Unified Action Tracker\\A"]})["total"] == 0
+
+
+@pytest.mark.asyncio
+async def test_agent_tool_returns_json(index):
+    """Test the search_actions tool wrapper."""
+    tool = index.as_tool()
+    assert tool.__name__ == "search_actions"
+    results = json.loads(await tool(keywords="quota", state=["Active"]))
+    assert results["total"] == 2
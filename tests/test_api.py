@@ -0,0 +1,50 @@
+"""Tests for the REST API wiring."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from aiohttp.streams import StreamReader
+from aiohttp.test_utils import make_mocked_request
+
+from src.api import AgentAPI
+from src.models.config import SessionConfig
+from src.session_store import SessionStore
+
+
+def _agent():
+    return SimpleNamespace(ado_org_name="contoso", ado_project_name="Unified Action Tracker", mirror=None, search_index=None)
+
+
+def test_injected_session_store_is_kept():
+    """Test that an empty injected store (falsy by length) isn't replaced by env defaults."""
+    store = SessionStore(SessionConfig(max_sessions=3))
+    api = AgentAPI(_agent(), sessions=store)
+    assert api.sessions is store
+    assert api.sessions.config.max_sessions == 3
+
+
+@pytest.mark.asyncio
+async def test_webhook_rejects_non_ascii_secret(monkeypatch):
+    """Test that a non-ASCII webhook secret header is refused with 401 rather than failing."""
+    monkeypatch.setenv("WEBHOOK_SECRET", "s3cret")
+    api = AgentAPI(_agent())
+    request = make_mocked_request("POST", "/api/webhooks/workitem", headers={"X-Webhook-Secret": "s3crét"})
+    response = await api.workitem_webhook_handler(request)
+    assert response.status == 401
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("body", [b'["state"]', b'"Active"'])
+async def test_actions_list_rejects_non_object_body(body):
+    """Test that a JSON body that isn't an object is a 400, not a 500."""
+    api = AgentAPI(_agent())
+    payload = StreamReader(mock.Mock(), 2**16, loop=asyncio.get_running_loop())
+    payload.feed_data(body)
+    payload.feed_eof()
+    request = make_mocked_request(
+        "POST", "/api/actions/list", headers={"Content-Type": "application/json"}, payload=payload
+    )
+    response = await api.actions_list_handler(request)
+    assert response.status == 400
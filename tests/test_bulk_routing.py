@@ -0,0 +1,77 @@
+"""Tests for offline bulk routing."""
+
+import csv
+import json
+
+import pytest
+from src.bulk_routing import BulkRouter, extract_routing_json, load_checkpoint
+
+
+def _write_export(path, count):
+    with open(path, "w") as f:
+        for i in range(1, count + 1):
+            title = "Teams meeting issue" if i % 2 else "Databricks roadmap question"
+            f.write(json.dumps({"id": i, "fields": {"System.Title": title}}) + "\n")
+
+
+def _read(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.asyncio
+async def test_bulk_run_resumes_from_output(tmp_path):
+    """Test that a re-run skips routed ids and recovers from a torn last line."""
+    export, output = tmp_path / "export.jsonl", tmp_path / "out.jsonl"
+    _write_export(export, 10)
+    router = BulkRouter(workers=0, batch_size=3)
+
+    first = await router.run(str(export), str(output), limit=4)
+    assert first["routed"] == 4
+    with open(output, "a") as f:
+        f.write('{"id": 9, "decis')  # interrupted write
+
+    second = await router.run(str(export), str(output))
+    assert second["skipped"] == 4 and second["routed"] == 6
+    assert sorted(int(r["id"]) for r in _read(output)) == list(range(1, 11))
+    assert load_checkpoint(str(output)) == {str(i) for i in range(1, 11)}
+
+
+@pytest.mark.asyncio
+async def test_process_pool_and_csv(tmp_path):
+    """Test routing a CSV export on a process pool."""
+    export, output = tmp_path / "export.csv", tmp_path / "out.jsonl"
+    with open(export, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["ID", "Title"])
+        writer.writeheader()
+        for i in range(1, 21):
+            writer.writerow({"ID": i, "Title": "Microsoft Sentinel connector"})
+    summary = await BulkRouter(workers=2, batch_size=4).run(str(export), str(output))
+    assert summary["routed"] == 20
+    assert summary["tags"] == {"Tech RoB | Security Triage": 20}
+
+
+@pytest.mark.asyncio
+async def test_model_fallback_for_low_confidence(tmp_path):
+    """Test that only uncertain decisions go to the fallback."""
+    export, output = tmp_path / "export.jsonl", tmp_path / "out.jsonl"
+    _write_export(export, 6)
+    calls = []
+
+    async def fallback(raw, decision):
+        calls.append(raw["id"])
+        return {"decision": {"type": "TAG", "tag": "Tech RoB | Tech Feedback"}}
+
+    summary = await BulkRouter(workers=0, fallback=fallback, fallback_concurrency=2).run(str(export), str(output))
+    assert sorted(calls) == [2, 4, 6]
+    assert summary["model_routed"] == 3
+    by_id = {r["id"]: r for r in _read(output)}
+    assert by_id[2]["source"] == "model" and by_id[2]["rules"]["decision"]["type"] == "MISSING_DATA"
+    assert by_id[1]["source"] == "rules"
+
+
+def test_extract_routing_json():
+    """Test parsing the JSON block from a routing response."""
+    text = 'ROUTING DECISION: x\n--- MACHINE READABLE JSON ---\n{"decision": {"type": "TAG"}}\n'
+    assert extract_routing_json(text) == {"decision": {"type": "TAG"}}
+    assert extract_routing_json("no json") is None
@@ -0,0 +1,163 @@
+"""Tests for the unified configuration loader and hot reload."""
+
+import os
+
+import pytest
+
+from src.config_loader import ConfigApplyError, ConfigError, ConfigReloader, build_config, interpolate, load_config
+
+
+def test_interpolation_defaults_and_unset_variables():
+    """Test ${VAR} substitution, ${VAR:-default} fallbacks and dropping of unset references."""
+    env = {"ORG": "contoso", "PORT": "9000"}
+    raw = {
+        "mcp": {"organization_name": "${ORG}", "project_name": "${PROJECT}", "args": ["-y", "${ORG}"]},
+        "api": {"port": "${PORT}", "host": "${HOST:-127.0.0.1}"},
+    }
+    assert interpolate(raw, env) == {
+        "mcp": {"organization_name": "contoso", "args": ["-y", "contoso"]},
+        "api": {"port": "9000", "host": "127.0.0.1"},
+    }
+
+    config = build_config(raw, env)
+    assert config.agent.api.port == 9000
+    assert config.agent.mcp.organization_name == "contoso"
+    assert config.agent.mcp.project_name == "Unified Action Tracker"
+
+
+def test_yaml_overrides_environment(monkeypatch):
+    """Test that sections start from env vars and YAML keys win; unknown sections are rejected."""
+    monkeypatch.setenv("SESSION_MAX_COUNT", "42")
+    monkeypatch.setenv("SCHEDULER_MAX_CONCURRENCY", "3")
+    config = build_config({"scheduler": {"max_concurrency": 16}, "mcp": {"type": "http", "command": "node"}})
+    assert config.sessions.max_sessions == 42
+    assert config.scheduler.max_concurrency == 16
+    assert config.agent.mcp.server_type == "http"
+    assert config.agent.mcp.server_command == "node"
+
+    with pytest.raises(ConfigError):
+        build_config({"schedular": {}})
+    with pytest.raises(ConfigError):
+        build_config({"sessions": {"max_sessions": "many"}})
+
+
+def test_agent_sections_may_be_nested():
+    """Test that foundry/mcp/api nested under agent are accepted, and duplicates rejected."""
+    config = build_config({"agent": {"name": "Bot", "api": {"port": 9100}, "mcp": {"organization_name": "fabrikam"}}})
+    assert config.agent.name == "Bot"
+    assert config.agent.api.port == 9100
+    assert config.agent.mcp.organization_name == "fabrikam"
+
+    with pytest.raises(ConfigError):
+        build_config({"agent": {"api": {"port": 9100}}, "api": {"port": 9200}})
+    with pytest.raises(ConfigError):
+        build_config({"agent": ["not", "a", "mapping"]})
+
+
+@pytest.mark.asyncio
+async def test_reload_notifies_listeners_of_changed_sections(tmp_path):
+    """Test that a valid edit is applied and listeners receive the changed sections."""
+    path = tmp_path / "agent_config.yaml"
+    path.write_text("sessions:\n  max_sessions: 10\n")
+    reloader = ConfigReloader(path, poll_interval_seconds=0)
+    seen = []
+
+    async def listener(old, new, changed):
+        seen.append((old.sessions.max_sessions, new.sessions.max_sessions, changed))
+
+    reloader.add_listener(listener)
+    path.write_text("sessions:\n  max_sessions: 20\nlogging:\n  level: DEBUG\n")
+    assert await reloader.reload() == {"sessions", "logging"}
+    assert seen == [(10, 20, {"sessions", "logging"})]
+    assert reloader.config.sessions.max_sessions == 20
+
+    assert await reloader.reload() == set()
+    assert len(seen) == 1
+
+
+@pytest.mark.asyncio
+async def test_invalid_reload_keeps_current_config(tmp_path):
+    """Test that a broken file is reported and the running config stays in force."""
+    path = tmp_path / "agent_config.yaml"
+    path.write_text("scheduler:\n  max_concurrency: 4\n")
+    reloader = ConfigReloader(path, poll_interval_seconds=0)
+    calls = []
+    reloader.add_listener(lambda old, new, changed: calls.append(changed))
+
+    path.write_text("scheduler:\n  max_concurrency: [\n")
+    assert await reloader.reload() == set()
+    assert reloader.config.scheduler.max_concurrency == 4
+    assert reloader.last_error
+    assert calls == []
+    assert load_config(tmp_path / "missing.yaml").scheduler.max_concurrency == int(
+        os.getenv("SCHEDULER_MAX_CONCURRENCY", 8)
+    )
+
+
+@pytest.mark.asyncio
+async def test_failed_apply_is_reported_and_retried(tmp_path):
+    """Test that a listener failure keeps the old config current so the next reload applies it again."""
+    path = tmp_path / "agent_config.yaml"
+    path.write_text("sessions:\n  max_sessions: 10\n")
+    reloader = ConfigReloader(path, poll_interval_seconds=0)
+    attempts = []
+
+    def listener(old, new, changed):
+        attempts.append(changed)
+        if len(attempts) == 1:
+            raise ValueError("budget too small")
+
+    reloader.add_listener(listener)
+    path.write_text("sessions:\n  max_sessions: 20\n")
+    assert await reloader.reload() == set()
+    assert "budget too small" in reloader.last_error
+    assert reloader.config.sessions.max_sessions == 10
+    assert reloader.reloads == 0
+
+    assert await reloader.reload() == {"sessions"}
+    assert attempts == [{"sessions"}, {"sessions"}]
+    assert reloader.last_error is None
+    assert reloader.config.sessions.max_sessions == 20
+
+
+@pytest.mark.asyncio
+async def test_unexpected_load_error_is_reported(tmp_path, monkeypatch):
+    """Test that an unexpected exception while loading is recorded instead of escaping reload()."""
+    path = tmp_path / "agent_config.yaml"
+    path.write_text("sessions:\n  max_sessions: 10\n")
+    reloader = ConfigReloader(path, poll_interval_seconds=0)
+
+    def broken(path):
+        raise TypeError("unexpected")
+
+    monkeypatch.setattr("src.config_loader.load_config", broken)
+    assert await reloader.reload() == set()
+    assert "unexpected" in reloader.last_error
+    assert reloader.config.sessions.max_sessions == 10
+
+
+@pytest.mark.asyncio
+async def test_partially_applied_reload_tracks_live_settings(tmp_path):
+    """Test that sections applied before a failure are recorded, so reverting the file rolls them back."""
+    path = tmp_path / "agent_config.yaml"
+    path.write_text("sessions:\n  max_sessions: 10\nlogging:\n  level: INFO\n")
+    reloader = ConfigReloader(path, poll_interval_seconds=0)
+    live = {"sessions": 10, "logging": "INFO"}
+
+    def listener(old, new, changed):
+        if "sessions" in changed:
+            live["sessions"] = new.sessions.max_sessions
+        if "logging" in changed:
+            raise ConfigApplyError("logging: handler busy", {"logging"})
+
+    reloader.add_listener(listener)
+    path.write_text("sessions:\n  max_sessions: 20\nlogging:\n  level: DEBUG\n")
+    assert await reloader.reload() == {"sessions"}
+    assert "handler busy" in reloader.last_error
+    assert reloader.config.sessions.max_sessions == 20
+    assert reloader.config.logging.level == "INFO"
+
+    path.write_text("sessions:\n  max_sessions: 10\nlogging:\n  level: INFO\n")
+    assert await reloader.reload() == {"sessions"}
+    assert live["sessions"] == 10
+    assert reloader.last_error is None
@@ -0,0 +1,89 @@
+"""Tests for the shared credential and token cache."""
+
+import asyncio
+import os
+import time
+
+import pytest
+from azure.core.credentials import AccessToken
+
+from src.credentials import CachedTokenCredential
+from src.models.config import CredentialConfig
+
+SCOPE = "https://ai.azure.com/.default"
+
+
+class FakeCredential:
+    """Credential stub issuing numbered tokens after a short delay."""
+
+    def __init__(self, lifetime=3600):
+        self.lifetime = lifetime
+        self.calls = 0
+        self.closed = False
+
+    async def get_token(self, *scopes, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return AccessToken(f"token-{self.calls}", int(time.time()) + self.lifetime)
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_acquisition():
+    """Test that a cold cache acquires once for many concurrent callers, then serves hits."""
+    fake = FakeCredential()
+    credential = CachedTokenCredential(lambda: fake, CredentialConfig())
+    tokens = await asyncio.gather(*(credential.get_token(SCOPE) for _ in range(10)))
+    assert {t.token for t in tokens} == {"token-1"}
+    assert fake.calls == 1
+
+    await credential.get_token(SCOPE)
+    assert credential.stats()["hits"] >= 1
+    await credential.close()
+    assert fake.closed
+
+
+@pytest.mark.asyncio
+async def test_background_refresh_before_expiry():
+    """Test that a token inside the refresh margin is replaced without a caller waiting."""
+    fake = FakeCredential(lifetime=600)
+    credential = CachedTokenCredential(lambda: fake, CredentialConfig(refresh_margin_seconds=600))
+    first = await credential.get_token(SCOPE)
+    await asyncio.sleep(0.1)
+    second = await credential.get_token(SCOPE)
+    assert first.token == "token-1"
+    assert second.token != first.token
+    assert credential.stats()["refreshes"] >= 1
+    await credential.close()
+
+
+@pytest.mark.asyncio
+async def test_shared_file_cache_across_processes(tmp_path):
+    """Test that a second worker (or a restart) reuses a token acquired by the first."""
+    path = str(tmp_path / "tokens.json")
+    first_fake, second_fake = FakeCredential(), FakeCredential()
+    first = CachedTokenCredential(lambda: first_fake, CredentialConfig(shared_cache_path=path))
+    second = CachedTokenCredential(lambda: second_fake, CredentialConfig(shared_cache_path=path))
+
+    token = await first.get_token(SCOPE)
+    assert (await second.get_token(SCOPE)).token == token.token
+    assert second_fake.calls == 0
+    assert second.stats()["shared_hits"] == 1
+    if os.name == "posix":
+        assert os.stat(path).st_mode & 0o077 == 0
+    await first.close()
+    await second.close()
+
+
+@pytest.mark.asyncio
+async def test_claims_challenge_bypasses_cache():
+    """Test that a claims challenge always gets a fresh token."""
+    fake = FakeCredential()
+    credential = CachedTokenCredential(lambda: fake, CredentialConfig())
+    await credential.get_token(SCOPE)
+    challenged = await credential.get_token(SCOPE, claims='{"access_token":{}}')
+    assert challenged.token == "token-2"
+    assert (await credential.get_token(SCOPE)).token == "token-1"
+    await credential.close()
@@ -0,0 +1,83 @@
+"""Tests for the instruction compiler."""
+
+import pytest
+from src.instruction_compiler import (
+    InstructionBudgetError,
+    compile_file,
+    compile_instructions,
+    split_sections,
+    strip_decoration,
+)
+from src.models.config import InstructionConfig
+
+SEPARATOR = "━" * 40
+RAW = f"""ROLE: You route tickets.
+
+
+{SEPARATOR}
+PHASE 1: EXTRACT
+{SEPARATOR}
+
+Extract the service name from the description and customer scenario fields.
+
+Today is {{{{ today }}}} in {{{{ads_org}}}}.
+
+---
+
+EXAMPLE 1: TEAMS
+{SEPARATOR}
+Title: Teams upgrade needs more concurrent users in the tenant
+
+Extract the service name from the description and customer scenario fields.
+
+EXAMPLE 2: SENTINEL
+{SEPARATOR}
+Title: Sentinel connector for a third-party firewall appliance
+"""
+
+
+def test_split_and_strip_decoration():
+    """Test banner/markdown headings and decoration removal."""
+    titles = [title for title, _ in split_sections(RAW)]
+    assert titles == ["", "PHASE 1: EXTRACT", "EXAMPLE 1: TEAMS", "EXAMPLE 2: SENTINEL"]
+    assert [t for t, _ in split_sections("# A\ntext\n## B\nmore")] == ["A", "B"]
+    assert strip_decoration(f"a \t\n\n\n{SEPARATOR}\n---\nb\n\n") == "a\n\nb"
+    # Markdown hard line breaks (two trailing spaces) survive
+    assert strip_decoration("**Owner:** x   \n**State:** y\t\n") == "**Owner:** x  \n**State:** y"
+
+
+def test_dedupe_and_dynamic_suffix():
+    """Test duplicate paragraph removal and the static prefix / dynamic suffix layout."""
+    compiled = compile_instructions(RAW)
+    assert "━" not in compiled.prefix and "---" not in compiled.prefix
+    assert compiled.render().count("Extract the service name") == 1
+    assert compiled.sections[2].duplicates_removed == 1
+    # The placeholder section moves after every static section
+    assert "PHASE 1" not in compiled.prefix and "EXAMPLE 2" in compiled.prefix
+    assert compiled.placeholders == ["ads_org", "today"]
+    first = compiled.render({"today": "2024-01-01", "ads_org": "UAT"})
+    second = compiled.render({"today": "2024-01-02", "ads_org": "UAT"})
+    assert first.startswith(compiled.prefix) and second.startswith(compiled.prefix)
+    assert first.endswith("Today is 2024-01-01 in UAT.")
+    assert compiled.tokens < compiled.raw_tokens
+
+
+def test_budget_drops_examples_then_fails():
+    """Test that later examples are dropped first and an unmeetable budget raises."""
+    full = compile_instructions(RAW).tokens
+    trimmed = compile_instructions(RAW, InstructionConfig(token_budget=full - 1))
+    assert [s.title for s in trimmed.sections if s.dropped] == ["EXAMPLE 2: SENTINEL"]
+    assert trimmed.tokens <= full - 1
+    with pytest.raises(InstructionBudgetError):
+        compile_instructions(RAW, InstructionConfig(token_budget=5))
+    assert compile_instructions(RAW, InstructionConfig(strip_decoration=False, dedupe=False)).prefix.count("━") > 0
+
+
+def test_compile_file_cached_until_changed(tmp_path):
+    """Test that a file is recompiled only when it changes."""
+    path = tmp_path / "instructions_test.md"
+    path.write_text("# A\nfirst version")
+    first = compile_file(path)
+    assert compile_file(path) is first
+    path.write_text("# A\nsecond version, edited")
+    assert "second" in compile_file(path).prefix
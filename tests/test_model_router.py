@@ -0,0 +1,90 @@
+"""Tests for the quota-aware model router."""
+
+import random
+
+import pytest
+from src.model_router import ModelRouter, throttle_details
+from src.models.config import ModelDeploymentConfig, ModelRouterConfig
+
+
+def _router(*deployments: ModelDeploymentConfig) -> ModelRouter:
+    return ModelRouter(ModelRouterConfig(deployments=list(deployments)), rng=random.Random(0))
+
+
+def test_instruction_type_selects_dedicated_deployment():
+    """Test that instruction types pick their dedicated deployments."""
+    router = _router(
+        ModelDeploymentConfig(name="mini", deployment="gpt-4o-mini", instruction_types=["summary"]),
+        ModelDeploymentConfig(name="large", deployment="gpt-4o"),
+    )
+    assert router.select("summary").name == "mini"
+    assert router.select("routing").name == "large"
+
+
+def test_throttled_deployment_is_skipped():
+    """Test that a 429 takes a deployment out of rotation."""
+    router = _router(
+        ModelDeploymentConfig(name="a", deployment="gpt-4o"),
+        ModelDeploymentConfig(name="b", deployment="gpt-4o"),
+    )
+    router.record_throttle("a", retry_after=30)
+    assert all(router.select().name == "b" for _ in range(20))
+
+
+def test_headroom_learned_from_headers():
+    """Test that rate limit headers steer load toward the emptier deployment."""
+    router = _router(
+        ModelDeploymentConfig(name="busy", deployment="gpt-4o"),
+        ModelDeploymentConfig(name="idle", deployment="gpt-4o"),
+    )
+    router.record_response("busy", {"x-ratelimit-limit-tokens": "100000", "x-ratelimit-remaining-tokens": "1000"})
+    router.record_response("idle", {"x-ratelimit-limit-tokens": "100000", "x-ratelimit-remaining-tokens": "100000"})
+    picks = [router.select().name for _ in range(50)]
+    for name in picks:
+        router.release(name)
+    assert picks.count("idle") > picks.count("busy")
+
+
+def test_throttle_details_reads_retry_after():
+    """Test 429 detection through wrapped exceptions."""
+    class _Response:
+        status_code = 429
+        headers = {"Retry-After": "7"}
+
+    class _RateLimitError(Exception):
+        response = _Response()
+
+    try:
+        try:
+            raise _RateLimitError("throttled")
+        except _RateLimitError as inner:
+            raise RuntimeError("agent run failed") from inner
+    except RuntimeError as e:
+        details = throttle_details(e)
+    assert details is not None
+    assert details["retry_after"] == 7.0
+    assert throttle_details(ValueError("boom")) is None
+
+
+def test_requires_deployments():
+    """Test that an empty router is rejected."""
+    with pytest.raises(ValueError):
+        ModelRouter(ModelRouterConfig())
+
+
+def test_reconfigure_reports_changed_and_removed_deployments():
+    """Test that reconfiguring keeps unchanged state and names deployments whose clients are stale."""
+    router = _router(
+        ModelDeploymentConfig(name="keep", deployment="gpt-4o"),
+        ModelDeploymentConfig(name="move", deployment="gpt-4o", project_endpoint="https://old.example"),
+        ModelDeploymentConfig(name="drop", deployment="gpt-4o"),
+    )
+    router.record_throttle("keep", retry_after=30)
+    stale = router.reconfigure(ModelRouterConfig(deployments=[
+        ModelDeploymentConfig(name="keep", deployment="gpt-4o"),
+        ModelDeploymentConfig(name="move", deployment="gpt-4o", project_endpoint="https://new.example"),
+        ModelDeploymentConfig(name="add", deployment="gpt-4o-mini"),
+    ]))
+    assert stale == {"move", "drop"}
+    assert [d.name for d in router.deployments] == ["keep", "move", "add"]
+    assert all(router.select().name != "keep" for _ in range(20))
@@ -0,0 +1,70 @@
+"""Tests for background pre-computation."""
+
+import pytest
+from src.action_mirror import ActionMirror
+from src.models.config import PrecomputeConfig
+from src.precompute import PrecomputeStore, PrecomputeWorker, TokenBudget, simple_action_id
+
+
+class FakeAgent:
+    """Agent stub recording queries."""
+
+    instructions = "x" * 400
+
+    def __init__(self, label):
+        self.label = label
+        self.queries = []
+        self.last_usage_tokens = 1500
+
+    async def process_query(self, query):
+        self.queries.append(query)
+        return f"{self.label}: {query}"
+
+
+def _item(work_item_id, rev):
+    return {"id": work_item_id, "rev": rev, "fields": {"System.WorkItemType": "Action", "System.Title": "t"}}
+
+
+def test_simple_action_id_matches_only_plain_requests():
+    """Test that only standard single-Action queries are served from the store."""
+    assert simple_action_id("Show me action 676893") == 676893
+    assert simple_action_id("Analyze action 12345 and provide routing recommendation") == 12345
+    assert simple_action_id("Show me action 12345 but only the milestone fields") is None
+    assert simple_action_id("List all active actions") is None
+
+
+def test_token_budget_blocks_when_spent():
+    """Test the rolling hourly budget."""
+    budget = TokenBudget(tokens_per_hour=1000)
+    budget.record(600)
+    assert budget.wait_seconds() == 0
+    budget.record(600)
+    assert budget.wait_seconds() > 0
+
+
+@pytest.mark.asyncio
+async def test_precomputed_response_invalidated_by_new_revision():
+    """Test that stored responses are served until the Action changes."""
+    mirror = ActionMirror()
+    mirror.upsert([_item(12345, 1)])
+    agents = {"summary": FakeAgent("summary"), "routing": FakeAgent("routing")}
+    worker = PrecomputeWorker(PrecomputeStore(mirror), agents, PrecomputeConfig(token_budget_per_hour=100000))
+
+    assert await worker.process(12345) == 2
+    assert await worker.process(12345) == 0  # already computed for rev 1
+    assert worker.lookup("Show me action 12345", "summary").startswith("summary:")
+    assert worker.lookup("Analyze action 12345 and provide routing recommendation", "routing").startswith("routing:")
+    assert worker.budget.spent == 3000
+
+    mirror.upsert([_item(12345, 2)])
+    assert worker.lookup("Show me action 12345", "summary") is None
+
+
+def test_enqueue_dedupes_pending():
+    """Test that an Action is queued at most once at a time."""
+    mirror = ActionMirror()
+    worker = PrecomputeWorker(PrecomputeStore(mirror), {}, PrecomputeConfig(max_queue=2))
+    assert worker.enqueue(1)
+    assert not worker.enqueue(1)
+    assert worker.enqueue(2)
+    assert not worker.enqueue(3)
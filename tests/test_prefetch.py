@@ -0,0 +1,120 @@
+"""Tests for speculative fetching of related work items."""
+
+import asyncio
+import json
+
+import pytest
+
+from src.models.config import PrefetchConfig
+from src.prefetch import RelatedItemPrefetcher, related_ids
+
+
+def _link(rel, work_item_id):
+    return {"rel": rel, "url": f"https://dev.azure.com/org/_apis/wit/workItems/{work_item_id}"}
+
+
+class FakeClient:
+    """Work item client stub counting calls; fetches block until released."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = asyncio.Event()
+
+    async def get_work_item(self, work_item_id, expand_relations=False):
+        self.calls.append(("item", work_item_id))
+        await self.release.wait()
+        return {
+            "id": work_item_id,
+            "fields": {"System.Title": "t"},
+            "relations": [
+                _link("System.LinkTypes.Related", 2),
+                _link("System.LinkTypes.Hierarchy-Reverse", 3),
+                {"rel": "Hyperlink", "url": "https://example.com"},
+            ],
+        }
+
+    async def get_comments(self, work_item_id):
+        self.calls.append(("comments", work_item_id))
+        await self.release.wait()
+        return [{"text": "hello"}]
+
+    async def get_work_items(self, ids, fields=None):
+        self.calls.append(("batch", tuple(ids)))
+        return [{"id": i, "fields": {}} for i in ids]
+
+
+def test_related_ids_skips_artifact_links():
+    """Test that only work item links are followed."""
+    item = {"id": 1, "relations": [
+        _link("System.LinkTypes.Related", 5),
+        _link("System.LinkTypes.Related", 5),
+        {"rel": "ArtifactLink", "url": "vstfs:///Git/Commit/abc"},
+    ]}
+    assert related_ids(item) == [5]
+    assert related_ids(None) == []
+
+
+@pytest.mark.asyncio
+async def test_tool_call_awaits_inflight_prefetch():
+    """Test that a tool call during a speculative fetch reuses it instead of fetching again."""
+    client = FakeClient()
+    prefetcher = RelatedItemPrefetcher(client, PrefetchConfig())
+    prefetcher.prefetch(1)
+    await asyncio.sleep(0)
+    assert ("item", 1) in client.calls and ("comments", 1) in client.calls
+
+    tool = asyncio.create_task(prefetcher.as_tool()(work_item_id=1))
+    await asyncio.sleep(0)
+    client.release.set()
+    details = json.loads(await tool)
+
+    assert details["work_item"]["id"] == 1
+    assert details["comments"] == [{"text": "hello"}]
+    assert [item["id"] for item in details["related"]] == [2, 3]
+    assert client.calls.count(("item", 1)) == 1
+    assert client.calls.count(("comments", 1)) == 1
+    assert prefetcher.stats()["hits"] == 3
+    assert prefetcher.stats()["misses"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_is_retried_and_reported():
+    """Test that a failed part is reported without failing the call, and retried next time."""
+    client = FakeClient()
+    client.release.set()
+    failures = iter([RuntimeError("MCP timeout")])
+
+    async def flaky_comments(work_item_id):
+        error = next(failures, None)
+        if error:
+            raise error
+        return []
+
+    client.get_comments = flaky_comments
+    prefetcher = RelatedItemPrefetcher(client, PrefetchConfig(include_related=False))
+    first = await prefetcher.get_details(1, include_related=False)
+    assert first["errors"] == {"comments": "MCP timeout"}
+    assert first["work_item"]["id"] == 1
+
+    second = await prefetcher.get_details(1, include_related=False)
+    assert "errors" not in second
+    assert second["comments"] == []
+
+
+@pytest.mark.asyncio
+async def test_mirrored_item_still_prefetches_comments_and_related():
+    """Test that a supplied copy skips the item fetch but not its comments or related items."""
+    client = FakeClient()
+    client.release.set()
+    prefetcher = RelatedItemPrefetcher(client, PrefetchConfig())
+    mirrored = {"id": 1, "fields": {"System.Title": "t"}, "relations": [_link("System.LinkTypes.Related", 4)]}
+    prefetcher.prefetch(1, item=mirrored)
+    assert [item["id"] for item in await prefetcher.get_related(1)] == [4]
+    assert await prefetcher.get_comments(1) == [{"text": "hello"}]
+    assert ("item", 1) not in client.calls
+
+    # A mirror copy without relations falls back to a live item fetch for the related ids
+    prefetcher.prefetch(5, item={"id": 5, "fields": {}})
+    assert [item["id"] for item in await prefetcher.get_related(5)] == [2, 3]
+    assert ("comments", 5) in client.calls
+    assert prefetcher.stats()["misses"] == 0
@@ -0,0 +1,74 @@
+"""Tests for the CPU sampler, memory snapshot diffs and event-loop lag monitor."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from pydantic import SecretStr
+
+from src.models.config import ProfilingConfig
+from src.profiling import LoopLagMonitor, MemoryTracker, SamplingProfiler, token_matches
+
+
+def _spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+
+@pytest.mark.asyncio
+async def test_cpu_profile_finds_busy_function():
+    """Test that a function burning CPU on the sampled thread dominates the profile."""
+    worker = threading.Thread(target=_spin, args=(0.3,))
+    worker.start()
+    report = await SamplingProfiler(0.002, [worker.ident]).run(0.2)
+    worker.join()
+    assert report["samples"] > 10
+    assert report["self"][0]["function"].startswith("_spin")
+    assert any(f["function"].startswith("_spin") and f["percent"] > 90 for f in report["total"])
+    assert any("_spin" in line for line in report["collapsed"])
+
+
+def test_memory_diff_reports_growth():
+    """Test that allocations made between two snapshots show up at their allocation site."""
+    tracker = MemoryTracker(frames=5)
+    try:
+        tracker.snapshot()
+        leak = [bytearray(1024) for _ in range(500)]
+        tracker.snapshot()
+        diff = tracker.diff()
+        assert diff["size_diff_bytes"] > 400 * 1024
+        assert "test_profiling.py" in diff["top"][0]["location"]
+        with pytest.raises(ValueError):
+            tracker.diff(base_id=99)
+    finally:
+        tracker.stop()
+    assert len(leak) == 500
+
+
+@pytest.mark.asyncio
+async def test_loop_monitor_captures_blocking_call():
+    """Test that a synchronous sleep on the loop is measured and its stack captured."""
+    monitor = LoopLagMonitor(interval_seconds=0.01, threshold_ms=50)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    time.sleep(0.25)
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    stats = monitor.stats()
+    assert stats["max_ms"] >= 200
+    assert sum(b["count"] for b in stats["histogram"]) == stats["samples"]
+    assert any("test_loop_monitor_captures_blocking_call" in frame for frame in stats["blocking"][0]["stack"])
+
+
+def test_debug_token_required():
+    """Test that debug access needs a configured token and an exact match."""
+    assert not token_matches(ProfilingConfig(enabled=True), "anything")
+    config = ProfilingConfig(enabled=True, token=SecretStr("s3cret"))
+    assert token_matches(config, "s3cret")
+    assert not token_matches(config, "s3cre")
+    assert not token_matches(config, None)
+    assert not token_matches(config, "s3crét")
+    assert token_matches(ProfilingConfig(enabled=True, token=SecretStr("clé")), "clé")
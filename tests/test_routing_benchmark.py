@@ -0,0 +1,115 @@
+"""Tests for the routing benchmark harness."""
+
+import asyncio
+import json
+
+import pytest
+from src.routing_benchmark import (
+    AgentBackend,
+    ReplayBackend,
+    RulesBackend,
+    compare,
+    is_correct,
+    instruction_fingerprint,
+    load_cases,
+    percentile,
+    prompt_text,
+    run_benchmark,
+)
+from src.instruction_compiler import compile_instructions
+from src.models.config import InstructionConfig
+
+CASES = [
+    {"id": 1, "expected": {"tag": "Tech RoB | MW Triage"}, "action": {"Title": "Teams meeting issue"}},
+    {"id": 2, "expected": {"tag": "Tech RoB | AOAI Triage"}, "action": {"Title": "Azure OpenAI PTU quota"}},
+]
+
+
+class FakeAgent:
+    """Agent stand-in answering with a fixed tag and reporting run stats."""
+
+    instructions = "route things"
+    model_deployment_name = "gpt-4o"
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.last_run_stats = {}
+
+    async def process_query(self, query):
+        self.last_run_stats = {"total_tokens": 1200, "model_turns": 2, "tool_calls": 1}
+        return "summary\n--- MACHINE READABLE JSON ---\n" + json.dumps({"decision": {"type": "TAG", "tag": self.tag}})
+
+
+def test_matching_and_percentiles():
+    """Test expected-decision matching and nearest-rank percentiles."""
+    assert is_correct({"tag": "mw triage"}, {"decision": {"tag": "Tech RoB | MW Triage"}})
+    assert is_correct(
+        {"type": "DIRECT", "assigned_to": "@Analytics Triage"},
+        {"decision": {"type": "DIRECT", "direct_routing": {"assigned_to": "@Analytics Triage"}}},
+    )
+    assert not is_correct({"tag": "STU"}, None)
+    assert percentile([5, 1, 3, 2, 4], 50) == 3
+    assert percentile([1, 2, 3, 4], 95) == 4
+    assert percentile([], 50) is None
+
+
+@pytest.mark.asyncio
+async def test_rules_backend_on_bundled_cases():
+    """Test that the bundled example cases load and run offline."""
+    cases = load_cases("config/benchmarks/routing_cases.jsonl")
+    report = await run_benchmark(cases, RulesBackend())
+    assert report["summary"]["errors"] == 0
+    assert report["summary"]["tokens_total"] == 0
+    assert report["meta"]["cases"] == len(cases) >= 8
+
+
+@pytest.mark.asyncio
+async def test_record_replay_and_baseline_diff(tmp_path):
+    """Test recording an agent run, replaying it and flagging regressions."""
+    recording = tmp_path / "recording.jsonl"
+    backend = AgentBackend(FakeAgent("Tech RoB | MW Triage"), record_path=str(recording))
+    baseline = await run_benchmark(CASES, backend)
+    assert baseline["summary"]["accuracy"] == 0.5
+    assert baseline["summary"]["tokens_mean"] == 1200 and baseline["summary"]["tool_calls_mean"] == 1
+
+    replayed = await run_benchmark(CASES, ReplayBackend(str(recording), fingerprint=backend.fingerprint))
+    assert [c["correct"] for c in replayed["cases"]] == [c["correct"] for c in baseline["cases"]]
+    assert replayed["summary"]["tokens_total"] == 2400
+    assert ReplayBackend(str(recording), fingerprint="other").recordings == {}
+
+    worse = await run_benchmark(CASES, AgentBackend(FakeAgent("Tech RoB | STU")))
+    diff = compare(worse, baseline)
+    assert diff["regressed"] and "accuracy" in diff["regressions"]
+    assert diff["newly_wrong"] == ["1"]
+    assert not compare(baseline, baseline)["regressed"]
+
+
+@pytest.mark.asyncio
+async def test_agent_latency_excludes_lock_wait():
+    """Test that cases queued behind the shared agent don't count the wait as latency."""
+
+    class SlowAgent(FakeAgent):
+        async def process_query(self, query):
+            await asyncio.sleep(0.05)
+            return await super().process_query(query)
+
+    cases = [{**CASES[0], "id": i} for i in range(4)]
+    report = await run_benchmark(cases, AgentBackend(SlowAgent("Tech RoB | MW Triage")), concurrency=4)
+    assert all(40 <= c["latency_ms"] < 120 for c in report["cases"])
+
+
+@pytest.mark.asyncio
+async def test_replay_matches_recording_from_compiled_agent(tmp_path):
+    """Test that a replay fingerprinted from the raw file finds responses recorded by an agent using compiled instructions."""
+    raw = "# Routing\n\n━━━━━━━━━━━━━━━━\nRoute things.   \n\n\n\n# Today\n\nDate: {{today}}\n"
+    config = InstructionConfig()
+    agent = FakeAgent("Tech RoB | MW Triage")
+    agent.compiled_instructions = compile_instructions(raw, config)
+    agent.instructions = agent.compiled_instructions.prefix
+    assert agent.instructions != raw
+
+    recording = tmp_path / "recording.jsonl"
+    await run_benchmark(CASES, AgentBackend(agent, record_path=str(recording)))
+    fingerprint = instruction_fingerprint(prompt_text(raw, config), "gpt-4o")
+    replay = ReplayBackend(str(recording), fingerprint=fingerprint)
+    assert sorted(replay.recordings) == ["1", "2"]
@@ -0,0 +1,69 @@
+"""Tests for structured routing output parsing."""
+
+import json
+
+import pytest
+from src.routing_output import IncrementalJSONParser, RoutingOutputError, key_fields, parse_routing_decision
+
+DECISION = {
+    "decision": {
+        "type": "DIRECT",
+        "tag": None,
+        "direct_routing": {"assigned_to": "@Analytics Triage", "area_path": "Data & AI", "priority": "P3"},
+    },
+    "reasoning": {"matched_rule": "5.1", "confidence": "high", "factors": ["Committed \"milestone\"", "CSU"]},
+    "asks": [{"summary": "Tune Databricks", "scope": "Other"}],
+    "summary": "Route to Analytics — café \\ done",
+}
+
+
+def _feed(parser, text, size):
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return events
+
+
+@pytest.mark.parametrize("size", [1, 3, 17])
+def test_incremental_parser_surfaces_fields_in_order(size):
+    """Test that key fields arrive before the summary, at any chunk size."""
+    text = "```json\n" + json.dumps(DECISION) + "\n```\ntrailing prose"
+    parser = IncrementalJSONParser()
+    events = _feed(parser, text, size)
+
+    assert key_fields(events)[:3] == [
+        ("decision.type", "DIRECT"),
+        ("decision.tag", None),
+        ("decision.direct_routing.assigned_to", "@Analytics Triage"),
+    ]
+    first_summary = next(i for i, e in enumerate(events) if e.path == "summary")
+    assert all(e.path == "summary" for e in events[first_summary:])
+    assert "".join(e.value for e in events if e.partial) == DECISION["summary"]
+    assert ("reasoning.factors.0", 'Committed "milestone"') in [(e.path, e.value) for e in events]
+
+    decision = parser.result()
+    assert decision.reasoning.confidence == "HIGH"
+    assert decision.decision.direct_routing.priority == "P3"
+
+
+def test_parse_classic_output_keeps_prose_summary():
+    """Test parsing the summary-then-JSON layout of the routing prompt."""
+    text = (
+        "ROUTING DECISION:\n  Routing Tag: Tech RoB | MW Triage\n\n--- MACHINE READABLE JSON ---\n\n"
+        + json.dumps({"decision": {"type": "tag", "tag": "Tech RoB | MW Triage"}, "flags": []})
+    )
+    decision = parse_routing_decision(text)
+    assert decision.decision.type == "TAG"
+    assert decision.summary.startswith("ROUTING DECISION:")
+
+
+def test_invalid_output_raises_with_raw_text():
+    """Test that unusable output raises RoutingOutputError carrying the raw text."""
+    for text in ("no json here", '{"decision": {"type": "TAG"', '{"decision": {"type": "MAYBE"}}'):
+        with pytest.raises(RoutingOutputError) as excinfo:
+            parse_routing_decision(text)
+        assert excinfo.value.raw == text
+    parser = IncrementalJSONParser()
+    parser.feed('{"decision": {"type": "TAG"')
+    with pytest.raises(RoutingOutputError):
+        parser.result()
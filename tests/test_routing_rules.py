@@ -0,0 +1,50 @@
+"""Tests for the deterministic routing stages."""
+
+from src.routing_rules import classify_requestor, extract_identifiers, match_service, route_record
+
+
+def _action(title, description="", **fields):
+    return {"id": 1, "fields": {"System.Title": title, "System.Description": description, **fields}}
+
+
+def test_extract_identifiers_by_label_and_length():
+    """Test labeled ticket numbers and unlabeled numbers classified by length."""
+    text = "See IcM 123456789, case 1234567890123456 and GetHelp #12345678. Also 987654321."
+    assert extract_identifiers(text) == ["IcM#123456789", "SR#1234567890123456", "GH#12345678", "IcM#987654321"]
+
+
+def test_match_service_prefers_specific_and_earliest():
+    """Test that more specific names win and the earliest mention is primary."""
+    assert match_service("GitHub Copilot seats")["owner"] == "@GitHub Triage"
+    assert match_service("Copilot Studio agents")["solution_area"] == "MODERN_WORK"
+    assert match_service("Databricks jobs reading from Azure SQL")["owner"] == "@Analytics Triage"
+    assert match_service("", "Need help with .NET on App Service")["service"] == ".NET"
+    assert match_service("nothing here")["service"] == "UNKNOWN"
+    assert classify_requestor("Customer Success Account Manager") == "CSU"
+    assert classify_requestor("Data & AI Specialist") == "STU"
+
+
+def test_phase4_rules_take_precedence():
+    """Test capacity and solution-area tags from Phase 4."""
+    assert route_record(_action("Need ND H100 capacity in East US"))["decision"]["tag"] == "Tech RoB | AI Infra Triage"
+    assert route_record(_action("Azure OpenAI PTU quota increase"))["decision"]["tag"] == "Tech RoB | AOAI Triage"
+    teams = route_record(_action("Teams meeting recording fails"))
+    assert teams["decision"]["tag"] == "Tech RoB | MW Triage"
+    assert teams["reasoning"]["confidence"] == "HIGH" and not teams["needs_model"]
+
+
+def test_milestone_direct_routing_and_gate():
+    """Test Phase 5 direct routing, support escalation and the milestone gate."""
+    direct = route_record(_action(
+        "Databricks cluster sizing guidance",
+        **{"Custom.MilestoneID": "7-ABC", "Custom.Customer_Commitment": "Committed", "job_title": "CSAM"},
+    ))
+    assert direct["decision"]["type"] == "DIRECT"
+    assert direct["decision"]["direct_routing"]["assigned_to"] == "@Analytics Triage"
+
+    escalation = route_record(_action("Databricks jobs failing", "Opened SR 1234567890123456"))
+    assert escalation["decision"]["tag"] == "Tech RoB | Support Escalation"
+
+    gated = route_record(_action("Databricks roadmap question"))
+    assert gated["decision"]["type"] == "MISSING_DATA"
+    assert gated["needs_model"]
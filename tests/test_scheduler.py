@@ -0,0 +1,91 @@
+"""Tests for the weighted fair scheduler."""
+
+import asyncio
+
+import pytest
+
+from src.models.config import SchedulerConfig
+from src.scheduler import BACKGROUND, INTERACTIVE, ROUTING, FairScheduler, SchedulerBusy
+
+
+async def _admission_order(scheduler: FairScheduler, requests):
+    """Queue (priority, caller) requests behind a full scheduler and record the order they are admitted."""
+    order = []
+    blockers = [await scheduler.acquire(INTERACTIVE, "blocker") for _ in range(scheduler.config.max_concurrency)]
+    assert len(blockers) == scheduler.config.max_concurrency
+
+    async def _run(priority, caller):
+        async with scheduler.slot(priority, caller):
+            order.append((priority, caller))
+
+    tasks = [asyncio.create_task(_run(p, c)) for p, c in requests]
+    await asyncio.sleep(0)
+    for _ in blockers:
+        scheduler.release(INTERACTIVE, "blocker")
+    await asyncio.gather(*tasks)
+    return order
+
+
+@pytest.mark.asyncio
+async def test_weighted_share_between_classes():
+    """Test that queued classes are admitted in proportion to their weights."""
+    scheduler = FairScheduler(SchedulerConfig(
+        max_concurrency=1, reserved_interactive=0,
+        weights={INTERACTIVE: 3, ROUTING: 1, BACKGROUND: 1},
+    ))
+    requests = [(BACKGROUND, "sweep")] * 4 + [(INTERACTIVE, "alice")] * 6
+    order = await _admission_order(scheduler, requests)
+    first_four = [p for p, _ in order[:4]]
+    assert first_four.count(INTERACTIVE) == 3
+    assert first_four.count(BACKGROUND) == 1
+
+
+@pytest.mark.asyncio
+async def test_round_robin_between_callers():
+    """Test that one caller's burst doesn't delay another caller in the same class."""
+    scheduler = FairScheduler(SchedulerConfig(max_concurrency=1, reserved_interactive=0))
+    requests = [(ROUTING, "batch")] * 5 + [(ROUTING, "bob")]
+    order = await _admission_order(scheduler, requests)
+    assert order.index((ROUTING, "bob")) <= 1
+
+
+@pytest.mark.asyncio
+async def test_reserved_interactive_capacity():
+    """Test that background work can't take the slots reserved for interactive requests."""
+    scheduler = FairScheduler(SchedulerConfig(max_concurrency=3, reserved_interactive=1))
+    await scheduler.acquire(BACKGROUND, "sweep")
+    await scheduler.acquire(BACKGROUND, "sweep")
+    third = asyncio.create_task(scheduler.acquire(BACKGROUND, "sweep"))
+    await asyncio.sleep(0)
+    assert not third.done()
+
+    waited = await asyncio.wait_for(scheduler.acquire(INTERACTIVE, "alice"), timeout=1)
+    assert waited < 0.1
+    stats = scheduler.stats()["classes"]
+    assert stats[BACKGROUND]["in_flight"] == 2
+    assert stats[BACKGROUND]["queued"] == 1
+
+    scheduler.release(BACKGROUND, "sweep")
+    await asyncio.wait_for(third, timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_max_wait_and_cancellation_release_queue_position():
+    """Test that timed-out and cancelled waiters leave the queue without leaking slots."""
+    scheduler = FairScheduler(SchedulerConfig(max_concurrency=1, reserved_interactive=0,
+                                              max_wait_seconds={INTERACTIVE: 0.05}))
+    await scheduler.acquire(ROUTING, "long")
+    with pytest.raises(SchedulerBusy):
+        await scheduler.acquire(INTERACTIVE, "alice")
+
+    cancelled = asyncio.create_task(scheduler.acquire(BACKGROUND, "sweep"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+    scheduler.release(ROUTING, "long")
+    stats = scheduler.stats()
+    assert stats["in_flight"] == 0
+    assert all(c["queued"] == 0 for c in stats["classes"].values())
+    assert stats["classes"][INTERACTIVE]["rejected"] == 1
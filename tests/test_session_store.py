@@ -0,0 +1,59 @@
+"""Tests for the conversation session store."""
+
+import json
+import time
+from types import SimpleNamespace
+
+from src.models.config import SessionConfig
+from src.session_store import SessionStore
+
+
+def test_lru_eviction_by_count():
+    """Test that the least recently used session is evicted first."""
+    store = SessionStore(SessionConfig(max_sessions=2))
+    store.get_or_create("a")
+    store.get_or_create("b")
+    store.get("a")
+    store.get_or_create("c")
+    assert store.get("b") is None
+    assert store.get("a") is not None
+    assert store.get("c") is not None
+
+
+def test_ttl_expiry():
+    """Test that idle sessions expire."""
+    store = SessionStore(SessionConfig(ttl_seconds=60))
+    session = store.get_or_create("a")
+    session.last_access = time.monotonic() - 120
+    assert store.get("a") is None
+
+
+def test_memory_cap_evicts_oldest():
+    """Test that the byte cap evicts sessions holding cached data."""
+    store = SessionStore(SessionConfig(max_bytes=1200))
+    old = store.get_or_create("old")
+    old.record_tool_result("wit_get_work_item", {"id": 1}, {"id": 1, "fields": {"System.Title": "x" * 400}})
+    new = store.get_or_create("new")
+    new.record_tool_result("wit_get_work_item", {"id": 2}, {"id": 2, "fields": {"System.Title": "y" * 400}})
+    store.enforce_limits()
+    assert store.get("old") is None
+    assert store.get("new") is not None
+
+
+def test_record_run_pairs_tool_calls():
+    """Test that work items are captured from function call/result contents."""
+    store = SessionStore()
+    session = store.get_or_create()
+    work_item = {"id": 676893, "rev": 4, "fields": {"System.Title": "Need quota"}}
+    result = SimpleNamespace(messages=[
+        SimpleNamespace(contents=[
+            SimpleNamespace(type="function_call", call_id="c1", name="wit_get_work_item", arguments='{"id": 676893}'),
+        ]),
+        SimpleNamespace(contents=[
+            SimpleNamespace(type="function_result", call_id="c1", result=json.dumps(work_item)),
+        ]),
+    ])
+    session.record_run(result)
+    assert session.turns == 1
+    assert session.work_items["676893"]["rev"] == 4
+    assert len(session.tool_results) == 1